@@ -0,0 +1,264 @@
+# =============================================================================
+# AGENDADOR COM PRAZOS
+# =============================================================================
+# O relatório da manhã precisa chegar antes de as lojas abrirem e o lembrete
+# só serve antes do fim do dia de vendas. Cada campanha pode declarar em
+# campanhas.json um prazo ("prazo": "08:30", hora de hoje) e uma prioridade
+# ("prioridade", maior sai antes quando os prazos empatam).
+#
+# Antes do envio o agendador:
+#   1. ordena as campanhas pelo prazo mais próximo (e pela prioridade);
+#   2. prevê o término de cada uma com a vazão medida nas execuções
+#      anteriores (.cache/agendador/vazao.json), por conta ou backend;
+#   3. se algum prazo está em risco, escala: ativa remetentes de reserva
+#      ("reserva": true) e, no backend http, aumenta as requisições
+#      simultâneas; se nada disso basta, avisa logo no início.
+#
+# Durante o envio a previsão é refeita com a vazão real, e o aviso sai assim
+# que o atraso aparece, não no fim da manhã.
+# =============================================================================
+import datetime
+import json
+import logging
+import math
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+from limitador import ConfigLimitador
+from log_estruturado import evento
+from outbox import Outbox
+from remetentes import atribuir_remetente, carregar_remetentes
+from transporte import ConfigTransporte
+
+# =============================================================================
+# CONFIGURAÇÕES DO AGENDADOR
+# =============================================================================
+class ConfigAgendador:
+    ARQUIVO_VAZAO = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'agendador' / 'vazao.json'
+    # A duração prevista é multiplicada pela margem antes de comparar com o prazo.
+    MARGEM = float(os.environ.get('AUTOSENDER_MARGEM_PRAZO', '1.2'))
+    PESO_NOVA_MEDIDA = 0.3        # média móvel exponencial da vazão entre execuções
+    MINIMO_ENVIOS = 10            # envios para uma medida de vazão valer
+    MAX_EM_VOO_ESCALADO = int(os.environ.get('AUTOSENDER_MAX_EM_VOO_ESCALADO', '128'))
+    INTERVALO_REAVALIACAO = 30    # segundos entre previsões durante o envio
+
+class Previsao(NamedTuple):
+    campanha: str
+    pendentes: int
+    termino: datetime.datetime
+    prazo: Optional[datetime.datetime]
+
+    @property
+    def em_risco(self) -> bool:
+        return self.prazo is not None and self.termino > self.prazo
+
+# =============================================================================
+# PRAZOS E ORDEM
+# =============================================================================
+def ler_prazo(campanha: Dict, hoje: Optional[datetime.date] = None) -> Optional[datetime.datetime]:
+    """Prazo da campanha hoje ("prazo": "HH:MM"), ou None se ela não tiver prazo."""
+    texto = campanha.get('prazo')
+    if not texto: return None
+    try:
+        hora = datetime.datetime.strptime(texto, '%H:%M').time()
+    except ValueError:
+        raise ValueError(f"Campanha '{campanha['nome']}' tem prazo inválido '{texto}' (use HH:MM).")
+    return datetime.datetime.combine(hoje or datetime.date.today(), hora)
+
+def ordenar_campanhas(campanhas: List[Dict]) -> List[Dict]:
+    """Prazo mais próximo primeiro; sem prazo por último; empates pela prioridade (maior primeiro)."""
+    return sorted(campanhas, key=lambda c: (ler_prazo(c) or datetime.datetime.max, -c.get('prioridade', 0)))
+
+def prever(campanhas: List[Dict], pendentes: Dict[str, int], vazao: float,
+           agora: Optional[datetime.datetime] = None) -> List[Previsao]:
+    """Término de cada campanha enviando na ordem dada, a `vazao` msg/min (0 = sem limite)."""
+    agora = agora or datetime.datetime.now()
+    previsoes, acumulado = [], 0
+    for campanha in campanhas:
+        quantidade = pendentes.get(campanha['nome'], 0)
+        acumulado += quantidade
+        minutos = acumulado / vazao * ConfigAgendador.MARGEM if vazao > 0 else 0.0
+        previsoes.append(Previsao(campanha['nome'], quantidade, agora + datetime.timedelta(minutes=minutos),
+                                  ler_prazo(campanha, agora.date())))
+    return previsoes
+
+def vazao_necessaria(previsoes: List[Previsao], agora: Optional[datetime.datetime] = None) -> float:
+    """Menor vazão (msg/min) que cumpre todos os prazos ainda alcançáveis."""
+    agora = agora or datetime.datetime.now()
+    necessaria, acumulado = 0.0, 0
+    for previsao in previsoes:
+        acumulado += previsao.pendentes
+        if previsao.prazo is None or not previsao.pendentes: continue
+        minutos = (previsao.prazo - agora).total_seconds() / 60
+        if minutos > 0: necessaria = max(necessaria, acumulado * ConfigAgendador.MARGEM / minutos)
+    return necessaria
+
+# =============================================================================
+# VAZÃO MEDIDA
+# =============================================================================
+def _vazao_padrao(backend: str, limitador: Optional[Dict] = None) -> float:
+    perfil = {**ConfigLimitador.PERFIS.get(backend, ConfigLimitador.PERFIS['pywhatkit']), **(limitador or {})}
+    vazao = perfil['taxa_inicial']
+    if perfil.get('limite_por_minuto'): vazao = min(vazao, perfil['limite_por_minuto'])
+    return float(vazao)
+
+def ler_vazoes() -> Dict[str, float]:
+    try:
+        return json.loads(ConfigAgendador.ARQUIVO_VAZAO.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logging.warning(f"Vazões medidas ignoradas: {e}")
+        return {}
+
+def gravar_vazoes(vazoes: Dict[str, float]):
+    try:
+        ConfigAgendador.ARQUIVO_VAZAO.parent.mkdir(parents=True, exist_ok=True)
+        temporario = ConfigAgendador.ARQUIVO_VAZAO.with_suffix('.tmp')
+        temporario.write_text(json.dumps(vazoes, indent=2), encoding='utf-8')
+        os.replace(temporario, ConfigAgendador.ARQUIVO_VAZAO)
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar as vazões medidas: {e}")
+
+# =============================================================================
+# AGENDADOR
+# =============================================================================
+class Agendador:
+    """Ordena as campanhas, prevê o término e decide como escalar para cumprir os prazos."""
+
+    def __init__(self, configuracao: Dict, campanhas: List[Dict]):
+        self.campanhas = ordenar_campanhas(campanhas)
+        self.transporte = dict(configuracao['transporte'])   # opções do envio por uma conta só
+        self.limitador: Dict = {}                             # ajustes do limitador dessa conta
+        todos = carregar_remetentes(configuracao, incluir_reserva=True)
+        self.remetentes = [r for r in todos if not r['reserva']]
+        self.reservas = [r for r in todos if r['reserva']]
+        self.vazoes = ler_vazoes()
+        self._avisados = set()
+        self._ultima_avaliacao = 0.0
+
+    # ---- vazão ---------------------------------------------------------------
+    @staticmethod
+    def _backend(transporte: Dict) -> str:
+        return (transporte.get('backend') or ConfigTransporte.BACKEND).lower()
+
+    def _chave(self, remetente: Optional[Dict] = None) -> str:
+        return f"remetente:{remetente['nome']}" if remetente else self._backend(self.transporte)
+
+    def _vazao_conta(self, remetente: Optional[Dict] = None) -> float:
+        transporte = remetente['transporte'] if remetente else self.transporte
+        ajustes = remetente['limitador'] if remetente else self.limitador
+        medida = self.vazoes.get(self._chave(remetente))
+        vazao = medida if medida is not None else _vazao_padrao(self._backend(transporte), ajustes)
+        # Mais requisições simultâneas que o padrão (escala no http) aumentam a vazão na mesma proporção.
+        if self._backend(transporte) == 'http':
+            vazao *= transporte.get('max_em_voo', ConfigTransporte.MAX_EM_VOO) / ConfigTransporte.MAX_EM_VOO
+        return vazao
+
+    def capacidade(self) -> float:
+        """Vazão prevista (msg/min) somando as contas que vão enviar; 0 = sem limite."""
+        contas = [self._vazao_conta(r) for r in self.remetentes] if self.remetentes else [self._vazao_conta()]
+        return 0.0 if any(vazao <= 0 for vazao in contas) else sum(contas)
+
+    def registrar_vazao(self, vazao: float, envios: int, remetente: Optional[Dict] = None):
+        """Incorpora a vazão medida nesta execução à média usada nas próximas previsões."""
+        if envios < ConfigAgendador.MINIMO_ENVIOS or vazao <= 0: return
+        chave = self._chave(remetente)
+        transporte = remetente['transporte'] if remetente else self.transporte
+        if self._backend(transporte) == 'http':
+            # Guarda a vazão por conta na concorrência padrão, para a escala não se acumular entre execuções.
+            vazao *= ConfigTransporte.MAX_EM_VOO / transporte.get('max_em_voo', ConfigTransporte.MAX_EM_VOO)
+        anterior = self.vazoes.get(chave)
+        peso = ConfigAgendador.PESO_NOVA_MEDIDA
+        self.vazoes[chave] = vazao if anterior is None else anterior * (1 - peso) + vazao * peso
+        gravar_vazoes(self.vazoes)
+
+    # ---- previsão ------------------------------------------------------------
+    def pendentes(self, outbox: Outbox) -> Dict[str, int]:
+        pendentes = {}
+        for campanha in self.campanhas:
+            contagem = outbox.contagem(campanha['nome'])
+            pendentes[campanha['nome']] = contagem.get('PENDENTE', 0) + contagem.get('EM_ENVIO', 0)
+        return pendentes
+
+    def prever(self, outbox: Outbox, vazao: Optional[float] = None) -> List[Previsao]:
+        return prever(self.campanhas, self.pendentes(outbox), self.capacidade() if vazao is None else vazao)
+
+    def _avisar(self, previsoes: Sequence[Previsao], vazao: float):
+        for previsao in previsoes:
+            if not previsao.em_risco or previsao.campanha in self._avisados: continue
+            self._avisados.add(previsao.campanha)
+            logging.warning(f"⚠️ Prazo em risco [{previsao.campanha}]: término previsto às {previsao.termino:%H:%M}, "
+                            f"prazo {previsao.prazo:%H:%M} ({previsao.pendentes} pendentes a {vazao:.1f} msg/min).")
+            evento('prazo_em_risco', logging.WARNING, campanha=previsao.campanha, pendentes=previsao.pendentes,
+                   termino=f"{previsao.termino:%H:%M}", prazo=f"{previsao.prazo:%H:%M}", vazao=round(vazao, 1))
+
+    # ---- escala --------------------------------------------------------------
+    def _ativar_reservas(self, outbox: Outbox, necessaria: float) -> int:
+        ativadas = 0
+        while self.reservas and self.remetentes and self.capacidade() < necessaria:
+            reserva = self.reservas.pop(0)
+            self.remetentes.append(reserva)
+            ativadas += 1
+            logging.info(f"Remetente de reserva '{reserva['nome']}' ativado para cumprir o prazo.")
+        if ativadas:
+            # Rendezvous hashing: só os telefones que passam a ser das novas contas mudam de remetente.
+            movidos = outbox.redistribuir([r['nome'] for r in self.remetentes], atribuir_remetente, todos=True)
+            logging.info(f"{movidos} mensagens pendentes movidas para os remetentes de reserva.")
+        return ativadas
+
+    def _escalar_http(self, necessaria: float):
+        contas = [r['transporte'] for r in self.remetentes] if self.remetentes else [self.transporte]
+        capacidade = self.capacidade()
+        if capacidade <= 0: return
+        fator = necessaria / capacidade
+        for transporte in contas:
+            if self._backend(transporte) != 'http': continue
+            atual = transporte.get('max_em_voo', ConfigTransporte.MAX_EM_VOO)
+            transporte['max_em_voo'] = min(ConfigAgendador.MAX_EM_VOO_ESCALADO, math.ceil(atual * fator))
+            if transporte['max_em_voo'] > atual:
+                logging.info(f"Requisições simultâneas: {atual} -> {transporte['max_em_voo']} para cumprir o prazo.")
+        if not self.remetentes and self._backend(self.transporte) == 'http':
+            # O limitador parte já da taxa necessária, em vez de subir aos poucos a partir do padrão.
+            perfil = ConfigLimitador.PERFIS['http']
+            self.limitador['taxa_inicial'] = min(perfil['taxa_maxima'], max(perfil['taxa_inicial'], necessaria))
+
+    def planejar(self, outbox: Outbox) -> List[Previsao]:
+        """Prevê o envio e, se algum prazo estiver em risco, escala ou avisa. Chamar antes de enviar."""
+        previsoes = self.prever(outbox)
+        for previsao in previsoes:
+            if previsao.pendentes:
+                logging.info(f"Previsão [{previsao.campanha}]: {previsao.pendentes} pendentes, término às "
+                             f"{previsao.termino:%H:%M}" + (f" (prazo {previsao.prazo:%H:%M})" if previsao.prazo else ''))
+        if not any(previsao.em_risco for previsao in previsoes): return previsoes
+
+        necessaria = vazao_necessaria(previsoes)
+        if necessaria > self.capacidade():
+            self._ativar_reservas(outbox, necessaria)
+        if necessaria > self.capacidade():
+            self._escalar_http(necessaria)
+        previsoes = self.prever(outbox)
+        self._avisar(previsoes, self.capacidade())
+        return previsoes
+
+    def acompanhar(self, outbox: Outbox, limitador, transporte=None):
+        """Refaz a previsão com a vazão real durante o envio (no máximo a cada INTERVALO_REAVALIACAO)."""
+        agora = time.monotonic()
+        if agora - self._ultima_avaliacao < ConfigAgendador.INTERVALO_REAVALIACAO: return
+        self._ultima_avaliacao = agora
+        if limitador.sucessos < ConfigAgendador.MINIMO_ENVIOS: return
+        vazao = limitador.vazao()
+        previsoes = self.prever(outbox, vazao)
+        if not any(previsao.em_risco for previsao in previsoes): return
+        necessaria = vazao_necessaria(previsoes)
+        atual = getattr(transporte, 'max_em_voo', None)
+        if atual and vazao > 0 and atual < ConfigAgendador.MAX_EM_VOO_ESCALADO:
+            # Vale a partir do próximo lote: o http cria o semáforo a cada lote.
+            transporte.max_em_voo = min(ConfigAgendador.MAX_EM_VOO_ESCALADO, math.ceil(atual * necessaria / vazao))
+            limitador.taxa = max(limitador.taxa, min(limitador.taxa_maxima, necessaria))
+            logging.info(f"Vazão abaixo do necessário ({vazao:.1f} de {necessaria:.1f} msg/min): "
+                         f"requisições simultâneas {atual} -> {transporte.max_em_voo}.")
+            return   # se a escala não bastar, a próxima avaliação avisa
+        self._avisar(previsoes, vazao)
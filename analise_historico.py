@@ -1,69 +1,146 @@
+# =============================================================================
+# ANÁLISE DO HISTÓRICO DE ENVIOS
+# =============================================================================
+# Lê só os resumos que historico_db.py mantém a cada envio (por dia e por
+# vendedor/dia da semana), nunca a tabela de envios: um ano de histórico de
+# milhares de vendedores cabe em algumas dezenas de milhares de linhas.
+#
+#   python analise_historico.py                      # todas as campanhas
+#   python analise_historico.py parabens --desde 2025-01-01
+# =============================================================================
+import argparse
+from typing import List, Optional
+
 import pandas as pd
-import json
-import matplotlib.pyplot as plt
-import seaborn as sns
 
-# Garanta que a biblioteca de gráficos esteja instalada: pip install matplotlib seaborn
+from historico_db import ConfigHistorico, conectar
 
-def analisar_historico_de_metas():
-    """Carrega o histórico, analisa e gera visualizações sobre metas batidas."""
-    
-    print("Iniciando análise do histórico de metas batidas...")
-    
-    # --- 1. CARREGAR OS DADOS DO HISTÓRICO ---
+# Garanta que a biblioteca de gráficos esteja instalada: pip install matplotlib
+
+DIAS_SEMANA = {0: 'Segunda', 1: 'Terça', 2: 'Quarta', 3: 'Quinta', 4: 'Sexta', 5: 'Sábado', 6: 'Domingo'}
+
+def _filtros(campanhas: Optional[List[str]], desde: Optional[str], coluna_data: str):
+    condicoes, parametros = [], []
+    if campanhas:
+        condicoes.append(f"campanha IN ({', '.join('?' * len(campanhas))})")
+        parametros += campanhas
+    if desde:
+        condicoes.append(f"{coluna_data} >= ?")
+        parametros.append(desde)
+    return (' WHERE ' + ' AND '.join(condicoes)) if condicoes else '', parametros
+
+def carregar_resumos(campanhas: Optional[List[str]] = None, desde: Optional[str] = None):
+    """Retorna (resumo_diario, resumo_vendedor) como DataFrames.
+
+    Com `desde`, o resumo por vendedor considera quem recebeu algo a partir da data
+    (os totais do vendedor são os acumulados, a tabela não guarda a data de cada envio).
+    """
+    conexao = conectar()
     try:
-        with open('historico_parabens.json', 'r', encoding='utf-8') as f:
-            dados_historico = json.load(f)
-        
-        if not dados_historico:
-            print("ℹ️ Histórico de envios está vazio. Nada para analisar.")
-            return
-
-        df = pd.DataFrame.from_dict(dados_historico, orient='index')
-        print(f"✅ Histórico carregado com {len(df)} registros.")
-
-    except FileNotFoundError:
-        print("❌ Arquivo 'historico_parabens.json' não encontrado. Rode o script de envio primeiro.")
-        return
+        filtro, parametros = _filtros(campanhas, desde, 'data_envio')
+        diario = pd.read_sql_query(
+            f"SELECT campanha, data_envio, dia_da_semana, envios FROM resumo_diario{filtro}", conexao, params=parametros)
+        filtro, parametros = _filtros(campanhas, desde, 'ultimo_envio')
+        vendedores = pd.read_sql_query(
+            f"SELECT campanha, telefone, dia_da_semana, nome, envios FROM resumo_vendedor{filtro}", conexao,
+            params=parametros)
+    finally:
+        conexao.close()
+    return diario, vendedores
+
+def top_vendedores(vendedores: pd.DataFrame, quantidade: int = 5) -> pd.DataFrame:
+    """Vendedores com mais envios em cada campanha."""
+    totais = (vendedores.groupby(['campanha', 'telefone'], as_index=False)
+              .agg(nome=('nome', 'last'), envios=('envios', 'sum')))
+    return (totais.sort_values(['campanha', 'envios'], ascending=[True, False])
+            .groupby('campanha').head(quantidade))
+
+def envios_por_dia_semana(diario: pd.DataFrame) -> pd.DataFrame:
+    """Tabela dia da semana x campanha com o total de envios."""
+    tabela = diario.pivot_table(index='dia_da_semana', columns='campanha', values='envios', aggfunc='sum')
+    return tabela.reindex(range(7)).fillna(0).astype(int).rename(index=DIAS_SEMANA)
+
+def envios_por_mes(diario: pd.DataFrame) -> pd.DataFrame:
+    meses = diario.assign(mes=diario['data_envio'].str[:7])
+    return meses.pivot_table(index='mes', columns='campanha', values='envios', aggfunc='sum').fillna(0).astype(int)
+
+def gerar_graficos(por_dia: pd.DataFrame, por_mes: pd.DataFrame):
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.style.use('seaborn-v0_8-whitegrid')
+    if 'parabens' in por_dia:
+        # Gráfico original: metas batidas (parabéns enviados) por dia da semana.
+        eixo = por_dia['parabens'].plot.bar(figsize=(10, 6), color='#3b8bba', rot=45)
+        eixo.set_title('Total de Metas Diárias Batidas por Dia da Semana', fontsize=16, pad=20)
+        eixo.set_ylabel('Quantidade de Metas Batidas')
+        eixo.set_xlabel('Dia da Semana')
+        eixo.figure.tight_layout()
+        eixo.figure.savefig('metas_por_dia_semana.png')
+        plt.close(eixo.figure)
+        print("✅ Gráfico 'metas_por_dia_semana.png' salvo.")
+
+    eixo = por_dia.plot.bar(figsize=(10, 6), rot=45)
+    eixo.set_title('Envios por Dia da Semana e Campanha', fontsize=16, pad=20)
+    eixo.set_ylabel('Envios')
+    eixo.set_xlabel('Dia da Semana')
+    eixo.figure.tight_layout()
+    eixo.figure.savefig('envios_por_dia_semana.png')
+    plt.close(eixo.figure)
+    print("✅ Gráfico 'envios_por_dia_semana.png' salvo.")
+
+    if not por_mes.empty:
+        eixo = por_mes.plot(figsize=(10, 6), marker='o')
+        eixo.set_title('Envios por Mês e Campanha', fontsize=16, pad=20)
+        eixo.set_ylabel('Envios')
+        eixo.set_xlabel('Mês')
+        eixo.figure.tight_layout()
+        eixo.figure.savefig('envios_por_mes.png')
+        plt.close(eixo.figure)
+        print("✅ Gráfico 'envios_por_mes.png' salvo.")
+
+def analisar_historico(campanhas: Optional[List[str]] = None, desde: Optional[str] = None, graficos: bool = True):
+    """Carrega os resumos, imprime os principais números e gera os gráficos."""
+    print("Iniciando análise do histórico de envios...")
+    try:
+        diario, vendedores = carregar_resumos(campanhas, desde)
     except Exception as e:
         print(f"❌ Erro ao carregar os dados: {e}")
         return
+    if diario.empty:
+        print(f"ℹ️ Nenhum envio registrado em '{ConfigHistorico.ARQUIVO_BANCO}'. Rode o script de envio primeiro.")
+        return
+    print(f"✅ Resumos carregados: {diario['envios'].sum()} envios em {diario['data_envio'].nunique()} dias, "
+          f"{vendedores['telefone'].nunique()} vendedores.")
 
-    # --- 2. PREPARAÇÃO DOS DADOS PARA ANÁLISE ---
-    print("\n🧹 Preparando dados para análise...")
-    df['data_envio'] = pd.to_datetime(df['data_envio'])
-    
-    dias_semana_map = {0: 'Segunda', 1: 'Terça', 2: 'Quarta', 3: 'Quinta', 4: 'Sexta', 5: 'Sábado', 6: 'Domingo'}
-    df['nome_dia_semana'] = df['dia_da_semana'].map(dias_semana_map)
-    print("✅ Dados preparados!")
-
-    # --- 3. ANÁLISE E INSIGHTS ---
     print("\n💡 Extraindo Insights:")
+    for campanha, top in top_vendedores(vendedores).groupby('campanha'):
+        print(f"\n🏆 Top 5 Vendedores [{campanha}]:")
+        print(top[['nome', 'telefone', 'envios']].to_string(index=False))
+
+    por_dia = envios_por_dia_semana(diario)
+    print("\n📅 Envios por Dia da Semana:")
+    print(por_dia)
+    por_mes = envios_por_mes(diario)
+    print("\n🗓️ Envios por Mês:")
+    print(por_mes)
+
+    if graficos:
+        print("\n🎨 Gerando visualizações...")
+        gerar_graficos(por_dia, por_mes)
+
+def analisar_historico_de_metas():
+    """Análise original, restrita aos parabéns por meta batida."""
+    analisar_historico(['parabens'])
 
-    # Pergunta 1: Qual vendedor mais recebeu parabéns?
-    top_performers = df['nome'].value_counts().head(5)
-    print("\n🏆 Top 5 Vendedores com Mais Metas Batidas:")
-    print(top_performers)
-
-    # Pergunta 2: Em quais dias da semana as metas são mais batidas?
-    metas_por_dia = df['nome_dia_semana'].value_counts().reindex(dias_semana_map.values()).fillna(0)
-    print("\n📅 Metas Batidas por Dia da Semana:")
-    print(metas_por_dia)
-    
-    # --- 4. VISUALIZAÇÃO DOS DADOS ---
-    print("\n🎨 Gerando visualizações...")
-    sns.set_style("whitegrid")
-
-    plt.figure(figsize=(10, 6))
-    sns.barplot(x=metas_por_dia.index, y=metas_por_dia.values, palette="viridis")
-    plt.title('Total de Metas Diárias Batidas por Dia da Semana', fontsize=16, pad=20)
-    plt.ylabel('Quantidade de Metas Batidas')
-    plt.xlabel('Dia da Semana')
-    plt.xticks(rotation=45)
-    plt.tight_layout()
-    plt.savefig('metas_por_dia_semana.png')
-    print("✅ Gráfico 'metas_por_dia_semana.png' salvo.")
-    # plt.show() # Descomente para exibir na tela
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Analisa os envios registrados (todas as campanhas).")
+    parser.add_argument('campanhas', nargs='*', help="Campanhas a analisar (padrão: todas).")
+    parser.add_argument('--desde', help="Data inicial (AAAA-MM-DD).")
+    parser.add_argument('--sem-graficos', action='store_true', help="Só imprime os números.")
+    args = parser.parse_args(argv)
+    analisar_historico(args.campanhas, args.desde, graficos=not args.sem_graficos)
 
 if __name__ == "__main__":
-    analisar_historico_de_metas()
\ No newline at end of file
+    main()
@@ -0,0 +1,278 @@
+# =============================================================================
+# BENCHMARK DE PONTA A PONTA
+# =============================================================================
+# Gera planilhas sintéticas no formato da aba 'basededados' (1k a 1M linhas) e
+# executa o pipeline de todas as campanhas de campanhas.json com o transporte
+# nulo: nenhuma mensagem sai e o limitador não espera. Mede, por fase, o tempo
+# de relógio e o pico de memória, e grava tudo em JSON para comparar versões.
+#
+#   python benchmark.py                                   # 1k, 10k, 100k e 1M
+#   python benchmark.py --tamanhos 1000 10000
+#   python benchmark.py --comparar benchmark_resultados/anterior.json
+#
+# As planilhas geradas ficam em .cache/benchmark/ e são reaproveitadas.
+# O pico de memória vem do tracemalloc, que deixa o código mais lento; use
+# --sem-memoria para medir só o tempo. Compare sempre execuções do mesmo modo.
+# =============================================================================
+import argparse
+import contextlib
+import datetime
+import json
+import logging
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+import cache_planilha
+import historico_db
+import telefones
+from historico_db import abrir_historico
+from limitador import criar_limitador
+from motor_campanhas import (ConfigMotor, Despachante, carregar_configuracao, carregar_template, filtrar_campanha,
+                             montar_itens, preparar_contatos, processar_outbox, selecionar_pendentes, separar_rejeitados,
+                             validar_colunas)
+from outbox import Outbox
+from transporte import TransporteNulo
+
+# =============================================================================
+# CONFIGURAÇÕES DO BENCHMARK
+# =============================================================================
+class ConfigBenchmark:
+    TAMANHOS = [1_000, 10_000, 100_000, 1_000_000]
+    PASTA_PLANILHAS = Path('.cache') / 'benchmark'
+    PASTA_RESULTADOS = Path('benchmark_resultados')
+    NOME_DA_ABA = ConfigMotor.NOME_DA_ABA
+    # Fração de linhas com telefone repetido, como acontece na planilha real.
+    FRACAO_REPETIDOS = 0.01
+    SEMENTE = 42
+    # Incrementar quando os dados sintéticos mudarem, para não reaproveitar planilhas antigas.
+    VERSAO_DADOS = 2
+
+def colunas_obrigatorias() -> List[str]:
+    """Colunas base mais as exigidas por todos os tipos de campanha, sem repetição."""
+    colunas = list(ConfigMotor.COLUNAS_BASE)
+    for exigidas in ConfigMotor.COLUNAS_POR_TIPO.values():
+        colunas += [c for c in exigidas if c not in colunas]
+    return colunas
+
+# =============================================================================
+# PLANILHAS SINTÉTICAS
+# =============================================================================
+def dados_sinteticos(linhas: int) -> pd.DataFrame:
+    """DataFrame com as colunas da aba 'basededados' e valores plausíveis."""
+    aleatorio = np.random.default_rng(ConfigBenchmark.SEMENTE)
+    ddd = aleatorio.choice(sorted(int(d) for d in telefones.ConfigTelefones.DDDS_VALIDOS), linhas)
+    numeros = ddd * 1_000_000_000 + 900_000_000 + aleatorio.integers(0, 100_000_000, linhas)
+    repetidos = aleatorio.random(linhas) < ConfigBenchmark.FRACAO_REPETIDOS
+    numeros[repetidos] = numeros[aleatorio.integers(0, linhas, int(repetidos.sum()))]
+    meta = aleatorio.uniform(50_000, 600_000, linhas).round(2)
+    faturado = (meta * aleatorio.uniform(0, 1.5, linhas)).round(2)
+    alcance = faturado / meta
+    dados = pd.DataFrame({
+        'Nome': [f'VENDEDOR{i} LOJA {i % 500}' for i in range(linhas)],
+        'Telefone': numeros,
+        'Faturado_mes': faturado,
+        'Meta': meta,
+        'Alcance': alcance.round(4),
+        'falta_meta_mes': np.maximum(meta - faturado, 0).round(2),
+        'Fat_Projetado': (faturado * 1.2).round(2),
+        'Pct_Projetado': (alcance * 1.2).round(4),
+        'Meta_diaria': (meta / 26).round(2),
+        'META_BATIDA': np.where(aleatorio.random(linhas) < 0.5, 'SIM', 'NÃO'),
+        'Falta_Meta_Dia': aleatorio.uniform(0, 1.2, linhas).round(4),
+    })
+    return dados[colunas_obrigatorias()]
+
+def gerar_planilha(linhas: int, destino: Path) -> Path:
+    """Grava a planilha sintética com o openpyxl em modo write-only (muito mais rápido que to_excel)."""
+    from openpyxl import Workbook
+
+    dados = dados_sinteticos(linhas)
+    livro = Workbook(write_only=True)
+    aba = livro.create_sheet(ConfigBenchmark.NOME_DA_ABA)
+    aba.append(list(dados.columns))
+    for linha in dados.itertuples(index=False, name=None):
+        aba.append(linha)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix('.tmp.xlsx')
+    livro.save(temporario)
+    temporario.replace(destino)
+    return destino
+
+def obter_planilha(linhas: int) -> Path:
+    destino = ConfigBenchmark.PASTA_PLANILHAS / f'basededados_{linhas}_v{ConfigBenchmark.VERSAO_DADOS}.xlsx'
+    if not destino.exists():
+        print(f"📝 Gerando planilha sintética com {linhas:,} linhas em {destino}...")
+        inicio = time.perf_counter()
+        gerar_planilha(linhas, destino)
+        print(f"   pronta em {time.perf_counter() - inicio:.1f}s")
+    return destino
+
+# =============================================================================
+# MEDIÇÃO
+# =============================================================================
+class Medidor:
+    """Acumula tempo de relógio e pico de memória (tracemalloc) de cada fase."""
+
+    def __init__(self, medir_memoria: bool = True):
+        self.medir_memoria = medir_memoria
+        self.resultados: List[Dict] = []
+
+    @contextlib.contextmanager
+    def fase(self, linhas: int, fase: str, campanha: Optional[str] = None):
+        registro = {'linhas': linhas, 'campanha': campanha, 'fase': fase, 'itens': None}
+        if self.medir_memoria: tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            registro['segundos'] = round(time.perf_counter() - inicio, 4)
+            registro['pico_mb'] = (round(tracemalloc.get_traced_memory()[1] / 2**20, 2)
+                                   if self.medir_memoria else None)
+            self.resultados.append(registro)
+            itens = f" ({registro['itens']:,} itens)" if registro['itens'] is not None else ''
+            memoria = f", pico {registro['pico_mb']:.1f} MB" if registro['pico_mb'] is not None else ''
+            print(f"   {campanha or '-':<12} {fase:<16} {registro['segundos']:>9.3f}s{memoria}{itens}")
+
+def pico_rss_mb() -> Optional[float]:
+    """Maior RSS do processo até agora (indisponível no Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux informa em KB e macOS em bytes.
+    return round(pico / (2**20 if sys.platform == 'darwin' else 2**10), 1)
+
+# =============================================================================
+# PIPELINE
+# =============================================================================
+def executar_tamanho(linhas: int, configuracao: Dict, medidor: Medidor, pasta_temporaria: Path):
+    """Executa carga, preparo, cache e todas as campanhas sobre uma planilha de `linhas` linhas."""
+    planilha = obter_planilha(linhas)
+    aba = ConfigBenchmark.NOME_DA_ABA
+    print(f"\n📊 {linhas:,} linhas")
+
+    with medidor.fase(linhas, 'leitura') as r:
+        bruto = pd.read_excel(planilha, sheet_name=aba)
+        r['itens'] = len(bruto)
+    # Sem o cache de telefones de execuções anteriores: o preparo é medido a frio.
+    telefones.ConfigTelefones.PASTA_CACHE = pasta_temporaria / 'telefones'
+    telefones.descartar_cache()
+    with medidor.fase(linhas, 'preparo') as r:
+        validar_colunas(bruto, ConfigMotor.COLUNAS_BASE)
+        df = separar_rejeitados(preparar_contatos(bruto))
+        r['itens'] = len(df)
+    del bruto
+
+    cache_planilha.ConfigCache.PASTA_CACHE = pasta_temporaria / 'cache'
+    with medidor.fase(linhas, 'cache_gravacao'):
+        cache_planilha.carregar_com_cache(str(planilha), aba, lambda: df)
+    with medidor.fase(linhas, 'cache_leitura') as r:
+        r['itens'] = len(cache_planilha.carregar_com_cache(str(planilha), aba, lambda: df))
+
+    banco = str(pasta_temporaria / f'historico_{linhas}.db')
+    historico_db.ConfigHistorico.ARQUIVO_BANCO = banco
+    with TransporteNulo() as transporte, Outbox(str(pasta_temporaria / f'outbox_{linhas}.db')) as outbox:
+        despachante = Despachante(transporte, criar_limitador(transporte.nome))
+        for campanha in configuracao['campanhas']:
+            nome = campanha['nome']
+            validar_colunas(df, ConfigMotor.COLUNAS_POR_TIPO.get(campanha['tipo'], []))
+            template = carregar_template(campanha)
+            with medidor.fase(linhas, 'filtro', nome) as r:
+                df_campanha = filtrar_campanha(df, campanha)
+                r['itens'] = len(df_campanha)
+            with abrir_historico(nome, banco) as historico:
+                with medidor.fase(linhas, 'deduplicacao', nome) as r:
+                    df_pendente, _ = selecionar_pendentes(df_campanha, campanha, historico)
+                    r['itens'] = len(df_pendente)
+                with medidor.fase(linhas, 'renderizacao', nome) as r:
+                    pendentes = montar_itens(df_pendente, campanha, template)
+                    r['itens'] = len(pendentes)
+            with medidor.fase(linhas, 'enfileiramento', nome) as r:
+                r['itens'] = outbox.enfileirar(nome, pendentes, campanha['tentativas'])
+            # Com o transporte nulo, o que sobra nesta fase é o custo do outbox e do histórico.
+            with medidor.fase(linhas, 'envio_historico', nome) as r:
+                r['itens'] = processar_outbox(outbox, despachante, [campanha]).get(nome, (0, 0))[0]
+
+# =============================================================================
+# RESULTADOS
+# =============================================================================
+def versao_codigo() -> Optional[str]:
+    try:
+        saida = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, timeout=10)
+        return saida.stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def gravar_resultados(medidor: Medidor, tamanhos: List[int], destino: Optional[str] = None) -> Path:
+    agora = datetime.datetime.now()
+    caminho = Path(destino) if destino else ConfigBenchmark.PASTA_RESULTADOS / f"benchmark_{agora:%Y%m%d_%H%M%S}.json"
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    documento = {
+        'versao': versao_codigo(),
+        'data': agora.isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'plataforma': platform.platform(),
+        'tamanhos': tamanhos,
+        'memoria_tracemalloc': medidor.medir_memoria,
+        'pico_rss_mb': pico_rss_mb(),
+        'resultados': medidor.resultados,
+    }
+    with open(caminho, 'w', encoding='utf-8') as f:
+        json.dump(documento, f, ensure_ascii=False, indent=2)
+    return caminho
+
+def comparar_resultados(anterior: str, atual: str):
+    """Imprime, fase a fase, o tempo da execução anterior, o atual e a variação."""
+    with open(anterior, 'r', encoding='utf-8') as f: base = json.load(f)
+    with open(atual, 'r', encoding='utf-8') as f: novo = json.load(f)
+    if base.get('memoria_tracemalloc') != novo.get('memoria_tracemalloc'):
+        print("⚠️  As execuções usaram modos de medição de memória diferentes; os tempos não são comparáveis.")
+    chave = lambda r: (r['linhas'], r['campanha'] or '', r['fase'])
+    anteriores = {chave(r): r for r in base['resultados']}
+    print(f"\n🔍 {base.get('versao') or anterior} → {novo.get('versao') or atual}")
+    for r in novo['resultados']:
+        a = anteriores.get(chave(r))
+        if not a: continue
+        variacao = (r['segundos'] / a['segundos'] - 1) * 100 if a['segundos'] else 0.0
+        print(f"   {r['linhas']:>9,} {r['campanha'] or '-':<12} {r['fase']:<16} "
+              f"{a['segundos']:>9.3f}s → {r['segundos']:>9.3f}s ({variacao:+.1f}%)")
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Benchmark do pipeline de campanhas com planilhas sintéticas.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=ConfigBenchmark.TAMANHOS,
+                        help="Quantidades de linhas (padrão: 1k, 10k, 100k e 1M).")
+    parser.add_argument('--config', default=ConfigMotor.ARQUIVO_CAMPANHAS, help="Arquivo de campanhas.")
+    parser.add_argument('--saida', help="Arquivo JSON de resultados (padrão: benchmark_resultados/<data>.json).")
+    parser.add_argument('--comparar', help="JSON de uma execução anterior para comparar com esta.")
+    parser.add_argument('--sem-memoria', action='store_true', help="Não usa o tracemalloc (só tempo).")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    configuracao = carregar_configuracao(args.config)
+    medidor = Medidor(medir_memoria=not args.sem_memoria)
+    if medidor.medir_memoria: tracemalloc.start()
+
+    with tempfile.TemporaryDirectory(prefix='autosender_benchmark_') as pasta:
+        for linhas in args.tamanhos:
+            executar_tamanho(linhas, configuracao, medidor, Path(pasta))
+
+    caminho = gravar_resultados(medidor, args.tamanhos, args.saida)
+    print(f"\n💾 Resultados gravados em {caminho}")
+    if args.comparar: comparar_resultados(args.comparar, str(caminho))
+
+if __name__ == "__main__":
+    main()
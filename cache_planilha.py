@@ -0,0 +1,117 @@
+# =============================================================================
+# CACHE COLUNAR DA PLANILHA DE CONTATOS
+# =============================================================================
+# O pd.read_excel (openpyxl) é de longe a etapa mais lenta da inicialização.
+# Este módulo guarda o DataFrame já preparado (com Telefone_Formatado e
+# primeiro_nome) em Feather e o reaproveita enquanto a planilha não mudar.
+#
+# Chave do cache: caminho + aba + mtime + hash do conteúdo. Enquanto mtime e
+# tamanho não mudam, o hash guardado no índice é reaproveitado e o arquivo nem
+# é relido. Cada planilha/aba mantém só o snapshot mais recente.
+# Sem o pyarrow instalado, o cache cai para pickle.
+# =============================================================================
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import pandas as pd
+
+# =============================================================================
+# CONFIGURAÇÕES DO CACHE
+# =============================================================================
+class ConfigCache:
+    PASTA_CACHE = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'planilhas'
+    ATIVO = os.environ.get('AUTOSENDER_CACHE_PLANILHA', '1') == '1'
+    # Incrementar quando a preparação dos dados mudar, para invalidar caches antigos.
+    VERSAO_PREPARO = 2
+    COLUNA_INDICE = '__indice__'
+
+def _hash_arquivo(caminho: Path) -> str:
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as f:
+        for bloco in iter(lambda: f.read(1 << 20), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def _prefixo(caminho: Path, aba: str) -> str:
+    return hashlib.sha1(f"{caminho.resolve()}|{aba}".encode('utf-8')).hexdigest()[:16]
+
+def _caminho_indice() -> Path:
+    return ConfigCache.PASTA_CACHE / 'indice.json'
+
+def _ler_indice() -> dict:
+    try:
+        with open(_caminho_indice(), 'r', encoding='utf-8') as f: return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def _gravar_indice(indice: dict):
+    # Temporário por processo: o lote regional prepara várias planilhas ao mesmo tempo.
+    temporario = _caminho_indice().with_suffix(f'.{os.getpid()}.tmp')
+    with open(temporario, 'w', encoding='utf-8') as f: json.dump(indice, f)
+    os.replace(temporario, _caminho_indice())
+
+def chave_planilha(caminho_excel: str, nome_aba: str) -> str:
+    """Calcula a chave (caminho, aba, mtime, hash do conteúdo) reaproveitando o hash quando possível."""
+    caminho = Path(caminho_excel)
+    estado = caminho.stat()
+    referencia = f"{caminho.resolve()}|{nome_aba}"
+    indice = _ler_indice()
+    registro = indice.get(referencia)
+    if registro and registro['mtime_ns'] == estado.st_mtime_ns and registro['tamanho'] == estado.st_size:
+        hash_conteudo = registro['hash']
+    else:
+        hash_conteudo = _hash_arquivo(caminho)
+        ConfigCache.PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+        indice[referencia] = {'mtime_ns': estado.st_mtime_ns, 'tamanho': estado.st_size, 'hash': hash_conteudo}
+        _gravar_indice(indice)
+    chave = f"{referencia}|{estado.st_mtime_ns}|{hash_conteudo}|v{ConfigCache.VERSAO_PREPARO}"
+    return hashlib.sha256(chave.encode('utf-8')).hexdigest()[:24]
+
+def _ler_snapshot(base: Path) -> Optional[pd.DataFrame]:
+    feather, pickle = base.with_suffix('.feather'), base.with_suffix('.pkl')
+    if feather.exists():
+        df = pd.read_feather(feather)
+        return df.set_index(ConfigCache.COLUNA_INDICE).rename_axis(None)
+    if pickle.exists():
+        return pd.read_pickle(pickle)
+    return None
+
+def _gravar_snapshot(base: Path, df: pd.DataFrame):
+    base.parent.mkdir(parents=True, exist_ok=True)
+    # Remove snapshots anteriores da mesma planilha/aba: só a versão atual interessa.
+    for antigo in base.parent.glob(f"{base.name.split('_')[0]}_*"):
+        antigo.unlink(missing_ok=True)
+    try:
+        df.rename_axis(ConfigCache.COLUNA_INDICE).reset_index().to_feather(base.with_suffix('.feather'))
+    except (ImportError, ValueError, TypeError) as e:
+        # Sem pyarrow ou com colunas de tipos mistos: pickle ainda evita reler o Excel.
+        logging.info(f"Cache Feather indisponível ({e}); usando pickle.")
+        base.with_suffix('.feather').unlink(missing_ok=True)
+        df.to_pickle(base.with_suffix('.pkl'))
+
+def carregar_com_cache(caminho_excel: str, nome_aba: str, carregar: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """Devolve o DataFrame preparado do cache ou o gera com `carregar()` e o armazena."""
+    if not ConfigCache.ATIVO: return carregar()
+
+    caminho = Path(caminho_excel)
+    try:
+        base = ConfigCache.PASTA_CACHE / f"{_prefixo(caminho, nome_aba)}_{chave_planilha(caminho_excel, nome_aba)}"
+        df = _ler_snapshot(base)
+    except Exception as e:
+        logging.warning(f"Cache da planilha ignorado: {e}")
+        return carregar()
+
+    if df is not None:
+        logging.info(f"Planilha '{caminho_excel}' (aba '{nome_aba}') carregada do cache: {len(df)} registros")
+        return df
+
+    df = carregar()
+    try:
+        _gravar_snapshot(base, df)
+    except Exception as e:
+        logging.warning(f"Não foi possível gravar o cache da planilha: {e}")
+    return df
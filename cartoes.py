@@ -0,0 +1,232 @@
+# =============================================================================
+# CARTÕES DE DESEMPENHO POR VENDEDOR (PNG)
+# =============================================================================
+# Gera, para cada vendedor, um cartão com uma barra de progresso do
+# Faturado_mes contra a Meta e o Fat_Projetado, anexado ao relatório diário
+# quando a campanha tem "cartao": true em campanhas.json.
+#
+# O matplotlib é lento para iniciar e desenha em uma thread só, então:
+#   - cada cartão é identificado pelo hash dos valores desenhados (e da versão
+#     do desenho) e fica em .cache/cartoes/<hash>.png: um vendedor cujos
+#     números não mudaram não é redesenhado;
+#   - os cartões que faltam são desenhados por um pool de processos, cada um
+#     com o matplotlib importado uma única vez; poucos cartões são desenhados
+#     no próprio processo, sem pagar o início do pool.
+#
+# Cada uso de um cartão atualiza a data de modificação dele; os que ficam
+# AUTOSENDER_DIAS_CARTOES dias sem uso (padrão 7) são apagados do cache.
+#
+#   python cartoes.py --linhas 2000    # benchmark: primeira geração e cache
+# =============================================================================
+import argparse
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import metricas
+
+# =============================================================================
+# CONFIGURAÇÕES DOS CARTÕES
+# =============================================================================
+class ConfigCartoes:
+    PASTA = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'cartoes'
+    PROCESSOS = int(os.environ.get('AUTOSENDER_PROCESSOS_CARTOES', '0'))   # 0 = um por núcleo
+    # Cartões sem uso há mais dias que isso são apagados (0 = nunca apagar).
+    DIAS_MANTER = float(os.environ.get('AUTOSENDER_DIAS_CARTOES', '7'))
+    # Abaixo disso os cartões são desenhados no próprio processo: iniciar o pool custaria mais.
+    MINIMO_PARA_POOL = 8
+    # Incrementar quando o desenho mudar, para não reaproveitar imagens antigas.
+    VERSAO_DESENHO = 1
+    TAMANHO = (6.0, 2.0)   # polegadas
+    DPI = 110
+    COLUNAS = ['Nome', 'Faturado_mes', 'Meta', 'Fat_Projetado']
+
+# (nome, faturado, meta, projetado)
+DadosCartao = Tuple[str, float, float, float]
+
+# =============================================================================
+# CACHE POR HASH DOS VALORES
+# =============================================================================
+def chave_cartao(dados: DadosCartao) -> str:
+    nome, faturado, meta, projetado = dados
+    texto = f"v{ConfigCartoes.VERSAO_DESENHO}|{nome}|{faturado:.2f}|{meta:.2f}|{projetado:.2f}"
+    return hashlib.sha1(texto.encode('utf-8')).hexdigest()[:20]
+
+def caminho_cartao(chave: str, pasta: Path = ConfigCartoes.PASTA) -> Path:
+    return pasta / f"{chave}.png"
+
+_limpas = set()
+
+def limpar_cartoes(pasta: Path = ConfigCartoes.PASTA, dias: Optional[float] = None) -> int:
+    """Apaga os cartões (e temporários esquecidos) sem uso há mais de `dias`. Retorna quantos apagou.
+
+    O cartão de uma mensagem ainda na fila foi usado no dia em que ela foi planejada, e a
+    outbox expira o que não saiu no próprio dia: com o padrão de 7 dias nenhum anexo pendente some.
+    """
+    dias = ConfigCartoes.DIAS_MANTER if dias is None else dias
+    if dias <= 0 or not pasta.is_dir(): return 0
+    limite = time.time() - dias * 86400
+    apagados = 0
+    for arquivo in pasta.iterdir():
+        try:
+            if arquivo.stat().st_mtime < limite:
+                arquivo.unlink()
+                apagados += 1
+        except FileNotFoundError:
+            pass   # outro processo apagou ou renomeou antes
+    if apagados: logging.info(f"Cartões: {apagados} sem uso há mais de {dias:g} dias apagados de {pasta}.")
+    return apagados
+
+# =============================================================================
+# DESENHO (UM CARTÃO)
+# =============================================================================
+_cartao = None
+
+def _iniciar_matplotlib() -> dict:
+    """Importa o matplotlib (sem interface gráfica) e monta o cartão reaproveitado, uma vez por processo.
+
+    Cada cartão só atualiza valores, textos e cores desses elementos: recriar os eixos e
+    recalcular o layout custaria mais que o próprio desenho.
+    """
+    global _cartao
+    if _cartao is None:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        figura = plt.figure(figsize=ConfigCartoes.TAMANHO, dpi=ConfigCartoes.DPI)
+        eixo = figura.add_axes((0.03, 0.02, 0.94, 0.6))
+        eixo.set_ylim(-0.8, 0.8)
+        eixo.axis('off')
+        _cartao = {
+            'figura': figura, 'eixo': eixo,
+            'fundo': eixo.barh([0], [1], color='#eceff1', height=0.5)[0],
+            'barra': eixo.barh([0], [0], height=0.5)[0],
+            'meta': eixo.axvline(0, 0.25, 0.75, color='#263238', linewidth=2),
+            'projetado': eixo.axvline(0, 0.25, 0.75, color='#546e7a', linewidth=1.5, linestyle='--'),
+            'rotulo_meta': eixo.text(0, 0.42, 'Meta', ha='center', va='bottom', fontsize=8, color='#263238'),
+            'rotulo_projetado': eixo.text(0, -0.42, 'Projetado', ha='center', va='top', fontsize=8, color='#546e7a'),
+            # parse_math=False: o "R$" dos valores não é fórmula.
+            'titulo': figura.text(0.03, 0.86, '', fontsize=10, va='center', parse_math=False),
+            'detalhe': figura.text(0.03, 0.72, '', fontsize=8, va='center', color='#546e7a', parse_math=False),
+        }
+    return _cartao
+
+def desenhar_cartao(dados: DadosCartao, destino: str) -> str:
+    """Desenha o cartão de um vendedor em `destino` (PNG). Retorna o caminho."""
+    from renderizacao import formatar_moeda_brasileira
+    cartao = _iniciar_matplotlib()
+    nome, faturado, meta, projetado = dados
+    escala = max(meta, projetado, faturado, 1.0) * 1.08
+    batida = meta > 0 and faturado >= meta
+    cor = '#2e7d32' if batida else ('#f9a825' if projetado >= meta else '#c62828')
+
+    cartao['fundo'].set_width(escala)
+    cartao['barra'].set_width(faturado)
+    cartao['barra'].set_color(cor)
+    cartao['meta'].set_xdata([meta, meta])
+    cartao['projetado'].set_xdata([projetado, projetado])
+    cartao['rotulo_meta'].set_x(meta)
+    cartao['rotulo_projetado'].set_x(projetado)
+    alcance = faturado / meta * 100 if meta else 0.0
+    cartao['titulo'].set_text(f"{nome}: {formatar_moeda_brasileira(faturado)} de {formatar_moeda_brasileira(meta)} "
+                              f"({alcance:.1f}%)")
+    cartao['detalhe'].set_text(f"Projetado: {formatar_moeda_brasileira(projetado)}"
+                               + (f" ({projetado / meta * 100:.1f}% da meta)" if meta else ''))
+    cartao['eixo'].set_xlim(0, escala)
+    # Grava em um temporário e renomeia: outro processo nunca lê um PNG pela metade.
+    temporario = f"{destino}.{os.getpid()}.tmp"
+    cartao['figura'].savefig(temporario, format='png')
+    os.replace(temporario, destino)
+    return destino
+
+def _desenhar_tarefa(tarefa: Tuple[DadosCartao, str]) -> str:
+    return desenhar_cartao(*tarefa)
+
+# =============================================================================
+# GERAÇÃO EM LOTE
+# =============================================================================
+def dados_cartoes(df: pd.DataFrame) -> List[DadosCartao]:
+    from renderizacao import _para_numerico
+    nomes = (df['primeiro_nome'] if 'primeiro_nome' in df.columns else df['Nome']).fillna('').astype(str).tolist()
+    colunas = [np.round(_para_numerico(df[coluna]), 2).tolist() for coluna in ConfigCartoes.COLUNAS[1:]]
+    return list(zip(nomes, *colunas))
+
+def gerar_cartoes(df: pd.DataFrame, processos: Optional[int] = None,
+                  pasta: Path = ConfigCartoes.PASTA) -> List[str]:
+    """Garante um cartão por linha do DataFrame e devolve os caminhos, na mesma ordem.
+
+    Só os cartões que ainda não existem no cache são desenhados; com `processos=1`
+    (por exemplo, dentro de um processo que já faz parte de um pool) tudo é desenhado aqui.
+    Os reaproveitados têm a data de modificação renovada, e a limpeza do cache roda uma vez
+    por processo (ver `limpar_cartoes`).
+    """
+    if pasta not in _limpas:
+        _limpas.add(pasta)
+        limpar_cartoes(pasta)
+    dados = dados_cartoes(df)
+    chaves = [chave_cartao(item) for item in dados]
+    caminhos = [str(caminho_cartao(chave, pasta)) for chave in chaves]
+    faltando, vistos = {}, set()
+    for item, caminho in zip(dados, caminhos):
+        if caminho in vistos: continue
+        vistos.add(caminho)
+        try:
+            os.utime(caminho)   # marca como usado: a limpeza conta a idade a partir daqui
+        except FileNotFoundError:
+            faltando[caminho] = item
+    if not faltando: return caminhos
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    tarefas = [(item, caminho) for caminho, item in faltando.items()]
+    processos = processos or ConfigCartoes.PROCESSOS or os.cpu_count() or 1
+    processos = min(processos, len(tarefas))
+    inicio = time.perf_counter()
+    with metricas.fase('cartoes'):
+        if processos <= 1 or len(tarefas) < ConfigCartoes.MINIMO_PARA_POOL:
+            for tarefa in tarefas: _desenhar_tarefa(tarefa)
+        else:
+            import multiprocessing
+            with multiprocessing.Pool(processos, initializer=_iniciar_matplotlib) as pool:
+                for _ in pool.imap_unordered(_desenhar_tarefa, tarefas, chunksize=max(1, len(tarefas) // (processos * 4))):
+                    pass
+    logging.info(f"Cartões: {len(tarefas)} desenhados em {time.perf_counter() - inicio:.1f}s "
+                 f"({processos} processos), {len(set(caminhos)) - len(tarefas)} reaproveitados do cache.")
+    return caminhos
+
+def cartoes_por_telefone(df: pd.DataFrame, telefones: Sequence[str],
+                         processos: Optional[int] = None) -> List[Optional[str]]:
+    """Cartões dos telefones informados (na mesma ordem), desenhando só as linhas deles."""
+    linhas = df[df['Telefone_Formatado'].isin(set(telefones))].drop_duplicates('Telefone_Formatado')
+    if linhas.empty: return [None] * len(telefones)
+    por_telefone = dict(zip(linhas['Telefone_Formatado'], gerar_cartoes(linhas, processos)))
+    return [por_telefone.get(telefone) for telefone in telefones]
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    import tempfile
+    parser = argparse.ArgumentParser(description="Mede a geração dos cartões: desenho em pool e cache.")
+    parser.add_argument('--linhas', type=int, default=2000)
+    parser.add_argument('--processos', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    gerador = np.random.default_rng(42)
+    metas = gerador.uniform(5_000, 50_000, args.linhas).round(2)
+    df = pd.DataFrame({'Nome': [f"Vendedor {i}" for i in range(args.linhas)],
+                       'Faturado_mes': (metas * gerador.uniform(0.3, 1.3, args.linhas)).round(2),
+                       'Meta': metas, 'Fat_Projetado': (metas * gerador.uniform(0.5, 1.5, args.linhas)).round(2)})
+    with tempfile.TemporaryDirectory() as pasta:
+        for rodada in ('primeira geração', 'com cache'):
+            inicio = time.perf_counter()
+            gerar_cartoes(df, args.processos, Path(pasta))
+            print(f"{rodada:>16}: {time.perf_counter() - inicio:6.2f}s para {args.linhas} cartões")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# =============================================================================
+# HISTÓRICO DE ENVIOS EM SQLITE (WAL)
+# =============================================================================
+# Substitui os arquivos historico_*.json, que eram reescritos por inteiro só no
+# fim de cada execução. Aqui cada envio é gravado (e confirmado) no momento em
+# que acontece, então um Ctrl+C ou uma queda no meio do lote não faz ninguém
+# receber a mesma mensagem de novo.
+#
+# A chave primária (telefone, data_envio, campanha) é o próprio índice usado
+# por `ja_enviado_hoje`, que consulta uma linha sem carregar o histórico.
+# Registros antigos são descartados por data na abertura, para o custo de
+# inicialização não crescer com o tempo.
+#
+# Os resumos para análise (resumo_diario e resumo_vendedor) são atualizados
+# por gatilhos a cada envio registrado e nunca são podados: a análise de um
+# ano inteiro lê só essas tabelas pequenas, sem percorrer os envios.
+# =============================================================================
+import datetime
+import json
+import logging
+import os
+import sqlite3
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+# =============================================================================
+# CONFIGURAÇÕES DO HISTÓRICO
+# =============================================================================
+class ConfigHistorico:
+    ARQUIVO_BANCO = os.environ.get('AUTOSENDER_HISTORICO_DB', 'historico_envios.db')
+    DIAS_MANTER = 30
+    # Arquivos JSON das versões anteriores, importados uma única vez.
+    ARQUIVOS_LEGADOS = {
+        'relatorios': 'historico_relatorios.json',
+        'parabens': 'historico_parabens.json',
+        'lembretes': 'historico_lembretes.json',
+    }
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS envios (
+    telefone      TEXT NOT NULL,
+    data_envio    TEXT NOT NULL,
+    campanha      TEXT NOT NULL,
+    nome          TEXT,
+    hora_envio    TEXT,
+    dia_da_semana INTEGER,
+    status        TEXT NOT NULL DEFAULT 'SUCESSO',
+    PRIMARY KEY (telefone, data_envio, campanha)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_envios_data ON envios (data_envio, campanha);
+"""
+
+ESQUEMA_RESUMOS = """
+CREATE TABLE IF NOT EXISTS resumo_diario (
+    campanha      TEXT NOT NULL,
+    data_envio    TEXT NOT NULL,
+    dia_da_semana INTEGER,
+    envios        INTEGER NOT NULL,
+    PRIMARY KEY (campanha, data_envio)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS resumo_vendedor (
+    campanha      TEXT NOT NULL,
+    telefone      TEXT NOT NULL,
+    dia_da_semana INTEGER NOT NULL,
+    nome          TEXT,
+    envios        INTEGER NOT NULL,
+    ultimo_envio  TEXT,
+    PRIMARY KEY (campanha, telefone, dia_da_semana)
+) WITHOUT ROWID;
+
+-- Só INSERT conta: o registrar() atualiza um envio já existente com UPDATE, sem contar de novo.
+CREATE TRIGGER IF NOT EXISTS trg_envios_resumo AFTER INSERT ON envios WHEN NEW.status = 'SUCESSO'
+BEGIN
+    INSERT INTO resumo_diario (campanha, data_envio, dia_da_semana, envios)
+    VALUES (NEW.campanha, NEW.data_envio, NEW.dia_da_semana, 1)
+    ON CONFLICT (campanha, data_envio) DO UPDATE SET envios = envios + 1;
+    INSERT INTO resumo_vendedor (campanha, telefone, dia_da_semana, nome, envios, ultimo_envio)
+    VALUES (NEW.campanha, NEW.telefone, COALESCE(NEW.dia_da_semana, -1), NEW.nome, 1, NEW.data_envio)
+    ON CONFLICT (campanha, telefone, dia_da_semana) DO UPDATE SET
+        envios = envios + 1,
+        nome = COALESCE(excluded.nome, nome),
+        ultimo_envio = MAX(ultimo_envio, excluded.ultimo_envio);
+END;
+"""
+
+# Bancos criados antes dos resumos: preenche os resumos com o que ainda existe em envios.
+# Roda na mesma transação que cria os gatilhos, para nenhum envio ser contado duas vezes.
+VERSAO_ESQUEMA = 1
+PREENCHER_RESUMOS = """
+INSERT OR IGNORE INTO resumo_diario (campanha, data_envio, dia_da_semana, envios)
+SELECT campanha, data_envio, MAX(dia_da_semana), COUNT(*) FROM envios WHERE status = 'SUCESSO'
+GROUP BY campanha, data_envio;
+INSERT OR IGNORE INTO resumo_vendedor (campanha, telefone, dia_da_semana, nome, envios, ultimo_envio)
+SELECT campanha, telefone, COALESCE(dia_da_semana, -1), MAX(nome), COUNT(*), MAX(data_envio) FROM envios
+WHERE status = 'SUCESSO' GROUP BY campanha, telefone, COALESCE(dia_da_semana, -1);
+"""
+
+def conectar(caminho: Optional[str] = None) -> sqlite3.Connection:
+    """Abre o banco em modo WAL com autocommit: cada INSERT já é durável."""
+    conexao = sqlite3.connect(caminho or ConfigHistorico.ARQUIVO_BANCO, timeout=30, isolation_level=None, check_same_thread=False)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute('PRAGMA synchronous=NORMAL')
+    conexao.executescript(ESQUEMA)
+    if conexao.execute('PRAGMA user_version').fetchone()[0] < VERSAO_ESQUEMA:
+        conexao.executescript(f'BEGIN IMMEDIATE; {ESQUEMA_RESUMOS} {PREENCHER_RESUMOS} '
+                              f'PRAGMA user_version = {VERSAO_ESQUEMA}; COMMIT;')
+    return conexao
+
+# =============================================================================
+# HISTÓRICO POR CAMPANHA
+# =============================================================================
+class HistoricoEnvios:
+    """Histórico de envios de uma campanha (relatorios, parabens, lembretes...)."""
+
+    def __init__(self, campanha: str, caminho: Optional[str] = None):
+        self.campanha = campanha
+        self.caminho = caminho or ConfigHistorico.ARQUIVO_BANCO
+        self.conexao = conectar(self.caminho)
+
+    def ja_enviado_hoje(self, telefone: str) -> bool:
+        hoje = datetime.date.today().strftime('%Y-%m-%d')
+        cursor = self.conexao.execute(
+            'SELECT 1 FROM envios WHERE telefone = ? AND data_envio = ? AND campanha = ? LIMIT 1',
+            (telefone, hoje, self.campanha))
+        return cursor.fetchone() is not None
+
+    def telefones_enviados_hoje(self) -> Set[str]:
+        """Todos os telefones que já receberam a campanha hoje, em uma única consulta."""
+        hoje = datetime.date.today().strftime('%Y-%m-%d')
+        cursor = self.conexao.execute('SELECT telefone FROM envios WHERE data_envio = ? AND campanha = ?',
+                                      (hoje, self.campanha))
+        return {linha[0] for linha in cursor}
+
+    def registrar(self, telefone: str, nome: str, status: str = 'SUCESSO'):
+        """Grava o envio imediatamente (autocommit)."""
+        agora = datetime.datetime.now()
+        self.conexao.execute(
+            'INSERT INTO envios (telefone, data_envio, campanha, nome, hora_envio, dia_da_semana, status) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT (telefone, data_envio, campanha) DO UPDATE SET '
+            'nome = excluded.nome, hora_envio = excluded.hora_envio, status = excluded.status',
+            (telefone, agora.strftime('%Y-%m-%d'), self.campanha, nome, agora.strftime('%H:%M:%S'),
+             agora.weekday(), status))
+
+    def limpar_antigos(self, dias_manter: int = ConfigHistorico.DIAS_MANTER) -> int:
+        """Remove registros mais antigos que `dias_manter` dias desta campanha."""
+        limite = (datetime.date.today() - datetime.timedelta(days=dias_manter)).strftime('%Y-%m-%d')
+        cursor = self.conexao.execute('DELETE FROM envios WHERE data_envio < ? AND campanha = ?',
+                                      (limite, self.campanha))
+        if cursor.rowcount:
+            logging.info(f"Limpeza do histórico '{self.campanha}': {cursor.rowcount} registros antigos removidos.")
+        return cursor.rowcount
+
+    def importar_json(self, arquivo_json: str) -> int:
+        """Importa um historico_*.json legado e o renomeia para não importar de novo."""
+        caminho = Path(arquivo_json)
+        if not caminho.exists(): return 0
+        try:
+            with open(caminho, 'r', encoding='utf-8') as f: dados: Dict = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logging.error(f"Não foi possível importar o histórico legado '{arquivo_json}': {e}")
+            return 0
+
+        linhas = []
+        for chave, registro in dados.items():
+            telefone = registro.get('telefone') or chave.rsplit('_', 1)[0]
+            data_envio = registro.get('data_envio') or chave.rsplit('_', 1)[-1]
+            dia_da_semana = registro.get('dia_da_semana')
+            if dia_da_semana is None:
+                try:
+                    dia_da_semana = datetime.date.fromisoformat(data_envio).weekday()
+                except ValueError:
+                    dia_da_semana = None
+            linhas.append((telefone, data_envio, self.campanha, registro.get('nome'), registro.get('hora_envio'),
+                           dia_da_semana, registro.get('status', 'SUCESSO')))
+
+        with self.conexao:
+            self.conexao.execute('BEGIN')
+            self.conexao.executemany(
+                'INSERT OR IGNORE INTO envios (telefone, data_envio, campanha, nome, hora_envio, dia_da_semana, status) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', linhas)
+        caminho.rename(caminho.with_suffix(caminho.suffix + '.migrado'))
+        logging.info(f"Histórico legado '{arquivo_json}' importado: {len(linhas)} registros.")
+        return len(linhas)
+
+    def listar(self) -> List[Dict]:
+        """Retorna todos os registros da campanha como dicionários."""
+        cursor = self.conexao.execute(
+            'SELECT telefone, nome, data_envio, hora_envio, dia_da_semana, status FROM envios WHERE campanha = ? '
+            'ORDER BY data_envio, hora_envio', (self.campanha,))
+        colunas = [c[0] for c in cursor.description]
+        return [dict(zip(colunas, linha)) for linha in cursor.fetchall()]
+
+    def fechar(self):
+        try:
+            self.conexao.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Erro ao fechar o histórico: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def abrir_historico(campanha: str, caminho: Optional[str] = None,
+                    dias_manter: Optional[int] = ConfigHistorico.DIAS_MANTER) -> HistoricoEnvios:
+    """Abre o histórico da campanha, migra o JSON legado (se houver) e descarta registros antigos."""
+    historico = HistoricoEnvios(campanha, caminho)
+    arquivo_legado = ConfigHistorico.ARQUIVOS_LEGADOS.get(campanha)
+    if arquivo_legado: historico.importar_json(arquivo_legado)
+    if dias_manter is not None: historico.limpar_antigos(dias_manter)
+    return historico
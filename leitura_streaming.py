@@ -0,0 +1,94 @@
+# =============================================================================
+# LEITURA DA PLANILHA EM FLUXO (MEMÓRIA CONSTANTE)
+# =============================================================================
+# O pd.read_excel carrega a aba inteira, com todas as colunas, e cada etapa
+# seguinte (dropna, filtro de META_BATIDA) faz mais uma cópia completa. Aqui a
+# planilha é lida linha a linha (openpyxl em modo read-only ou csv) e entregue
+# em blocos de tamanho fixo, só com as colunas que as campanhas usam. Quem
+# consome o gerador prepara, filtra e enfileira um bloco por vez, então a
+# memória não cresce com o número de linhas.
+#
+# Observação: no .xlsx, o openpyxl ainda mantém em memória a tabela de textos
+# compartilhados do arquivo; para planilhas realmente enormes, prefira CSV.
+# =============================================================================
+import csv
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+# =============================================================================
+# CONFIGURAÇÕES DA LEITURA EM FLUXO
+# =============================================================================
+class ConfigStreaming:
+    TAMANHO_BLOCO = 5000
+    ENCODING_CSV = 'utf-8-sig'   # aceita o BOM que o Excel grava ao exportar CSV
+
+def eh_csv(caminho: str) -> bool:
+    return Path(caminho).suffix.lower() in ('.csv', '.txt')
+
+def _abrir_csv(caminho: str):
+    arquivo = open(caminho, 'r', encoding=ConfigStreaming.ENCODING_CSV, newline='')
+    amostra = arquivo.read(64 * 1024)
+    arquivo.seek(0)
+    try:
+        dialeto = csv.Sniffer().sniff(amostra, delimiters=';,\t')
+    except csv.Error:
+        dialeto = csv.excel
+    return arquivo, csv.reader(arquivo, dialeto)
+
+def _linhas(caminho: str, aba: Optional[str]) -> Iterator[Sequence]:
+    """Todas as linhas do arquivo, cabeçalho incluído, sem carregar o arquivo inteiro."""
+    if eh_csv(caminho):
+        arquivo, leitor = _abrir_csv(caminho)
+        with arquivo:
+            yield from leitor
+        return
+
+    from openpyxl import load_workbook
+    livro = load_workbook(caminho, read_only=True, data_only=True)
+    try:
+        planilha = livro[aba] if aba else livro.active
+        yield from planilha.iter_rows(values_only=True)
+    finally:
+        livro.close()
+
+def ler_cabecalho(caminho: str, aba: Optional[str] = None) -> List[str]:
+    """Nomes das colunas da primeira linha."""
+    linhas = _linhas(caminho, aba)
+    try:
+        return [str(c).strip() if c is not None else '' for c in next(linhas, [])]
+    finally:
+        linhas.close()
+
+def ler_em_blocos(caminho: str, aba: Optional[str], colunas: Sequence[str],
+                  tamanho_bloco: int = ConfigStreaming.TAMANHO_BLOCO) -> Iterator[pd.DataFrame]:
+    """Gera DataFrames de até `tamanho_bloco` linhas contendo apenas `colunas`.
+
+    As colunas ficam como object, do jeito que vieram do arquivo: um telefone numérico
+    não vira float só porque o bloco tem uma célula vazia. O índice continua a contagem
+    de linhas de dados da planilha, como no DataFrame lido de uma vez.
+    """
+    linhas = _linhas(caminho, aba)
+    cabecalho = [str(c).strip() if c is not None else '' for c in next(linhas, [])]
+    faltando = [c for c in colunas if c not in cabecalho]
+    if faltando:
+        raise ValueError(f"Coluna obrigatória '{faltando[0]}' não encontrada na planilha")
+    posicoes = [cabecalho.index(c) for c in colunas]
+
+    bloco, inicio = [], 0
+    for linha in linhas:
+        # Linhas curtas (CSV sem as últimas células) completam com vazio.
+        bloco.append(tuple(linha[p] if p < len(linha) else None for p in posicoes))
+        if len(bloco) >= tamanho_bloco:
+            yield _montar_bloco(bloco, colunas, inicio)
+            inicio += len(bloco)
+            bloco = []
+    if bloco:
+        yield _montar_bloco(bloco, colunas, inicio)
+
+def _montar_bloco(linhas: List[tuple], colunas: Sequence[str], inicio: int) -> pd.DataFrame:
+    df = pd.DataFrame(linhas, columns=list(colunas), dtype=object,
+                      index=pd.RangeIndex(inicio, inicio + len(linhas)))
+    # No CSV, célula vazia vem como '' e não como None; o dropna da preparação precisa ver NaN.
+    return df.mask(df.eq(''))
@@ -0,0 +1,135 @@
+# =============================================================================
+# LIMITADOR DE TAXA ADAPTATIVO (AIMD)
+# =============================================================================
+# Substitui as pausas fixas de 30s entre envios. A taxa (mensagens/minuto)
+# cresce de forma aditiva a cada envio bem-sucedido e cai de forma
+# multiplicativa quando há falha ou quando o envio demora mais que o normal.
+# Acima disso valem os tetos configuráveis por minuto e por hora.
+#
+# Só quem de fato é enviado consome vaga: mensagens puladas ou que falharam
+# ao montar não provocam espera nenhuma.
+# =============================================================================
+import os
+import threading
+import time
+from collections import deque
+from typing import Optional
+
+# =============================================================================
+# CONFIGURAÇÕES DO LIMITADOR
+# =============================================================================
+class ConfigLimitador:
+    LIMITE_POR_MINUTO = int(os.environ.get('AUTOSENDER_LIMITE_MINUTO', '0'))  # 0 = usa o padrão do backend
+    LIMITE_POR_HORA = int(os.environ.get('AUTOSENDER_LIMITE_HORA', '0'))
+    INCREMENTO = 0.5      # msg/min somados a cada sucesso
+    FATOR_RECUO = 0.5     # multiplicador aplicado em falha ou lentidão
+
+    # Padrões por backend: taxas em msg/min e latência (s) a partir da qual o envio conta como lento.
+    PERFIS = {
+        'pywhatkit': dict(taxa_inicial=2, taxa_minima=0.5, taxa_maxima=6, limite_por_minuto=6,
+                          limite_por_hora=200, latencia_lenta=90),
+        'sessao': dict(taxa_inicial=6, taxa_minima=1, taxa_maxima=20, limite_por_minuto=20,
+                       limite_por_hora=600, latencia_lenta=30),
+        'http': dict(taxa_inicial=600, taxa_minima=60, taxa_maxima=6000, limite_por_minuto=6000,
+                     limite_por_hora=80000, latencia_lenta=5),
+        # Transporte nulo: taxa 0 significa nenhuma espera entre envios.
+        'nulo': dict(taxa_inicial=0, taxa_minima=0, taxa_maxima=0, limite_por_minuto=0,
+                     limite_por_hora=0, latencia_lenta=None),
+    }
+
+# =============================================================================
+# LIMITADOR
+# =============================================================================
+class LimitadorAdaptativo:
+    """Token bucket de uma vaga por vez, com taxa ajustada por AIMD e tetos por janela."""
+
+    def __init__(self, taxa_inicial: float = 2, taxa_minima: float = 0.5, taxa_maxima: float = 6,
+                 limite_por_minuto: int = 0, limite_por_hora: int = 0, latencia_lenta: Optional[float] = None,
+                 incremento: float = ConfigLimitador.INCREMENTO, fator_recuo: float = ConfigLimitador.FATOR_RECUO):
+        self.taxa = float(taxa_inicial)
+        self.taxa_minima = float(taxa_minima)
+        self.taxa_maxima = float(taxa_maxima)
+        self.limite_por_minuto = limite_por_minuto
+        self.limite_por_hora = limite_por_hora
+        self.latencia_lenta = latencia_lenta
+        self.incremento = incremento
+        self.fator_recuo = fator_recuo
+
+        self._trava = threading.Lock()
+        self._proximo = 0.0
+        self._janela_minuto = deque()
+        self._janela_hora = deque()
+        self._inicio = None
+        self._fim = None
+        self.sucessos = 0
+        self.falhas = 0
+        self.recuos = 0
+
+    @staticmethod
+    def _liberacao_por_teto(janela: deque, limite: int, segundos: float) -> float:
+        """Instante mais cedo em que a janela aceita mais um envio."""
+        if not limite or len(janela) < limite: return 0.0
+        return janela[-limite] + segundos
+
+    def reservar(self) -> float:
+        """Reserva a próxima vaga e devolve quantos segundos esperar por ela (não bloqueia)."""
+        with self._trava:
+            agora = time.monotonic()
+            if self._inicio is None: self._inicio = agora
+            while self._janela_minuto and self._janela_minuto[0] <= agora - 60: self._janela_minuto.popleft()
+            while self._janela_hora and self._janela_hora[0] <= agora - 3600: self._janela_hora.popleft()
+
+            inicio = max(agora, self._proximo,
+                         self._liberacao_por_teto(self._janela_minuto, self.limite_por_minuto, 60),
+                         self._liberacao_por_teto(self._janela_hora, self.limite_por_hora, 3600))
+            self._proximo = inicio + (60.0 / self.taxa if self.taxa > 0 else 0.0)
+            if self.limite_por_minuto: self._janela_minuto.append(inicio)
+            if self.limite_por_hora: self._janela_hora.append(inicio)
+            return inicio - agora
+
+    def aguardar(self):
+        """Bloqueia até a próxima vaga liberada."""
+        espera = self.reservar()
+        if espera > 0: time.sleep(espera)
+
+    def registrar_sucesso(self, latencia: Optional[float] = None):
+        """Aumento aditivo; um envio lento conta como sinal de congestionamento."""
+        with self._trava:
+            self.sucessos += 1
+            self._fim = time.monotonic()
+            if self.latencia_lenta is not None and latencia is not None and latencia > self.latencia_lenta:
+                self._recuar()
+            else:
+                self.taxa = min(self.taxa_maxima, self.taxa + self.incremento)
+
+    def registrar_falha(self):
+        """Redução multiplicativa da taxa após uma falha."""
+        with self._trava:
+            self.falhas += 1
+            self._fim = time.monotonic()
+            self._recuar()
+
+    def _recuar(self):
+        self.recuos += 1
+        self.taxa = max(self.taxa_minima, self.taxa * self.fator_recuo)
+
+    def vazao(self) -> float:
+        """Vazão alcançada, em mensagens enviadas com sucesso por minuto."""
+        if self._inicio is None or self._fim is None or self._fim <= self._inicio: return 0.0
+        return self.sucessos / (self._fim - self._inicio) * 60
+
+    def resumo(self) -> str:
+        duracao = (self._fim - self._inicio) if self._inicio is not None and self._fim is not None else 0.0
+        return (f"Vazão alcançada: {self.vazao():.1f} msg/min ({self.sucessos} envios, {self.falhas} falhas "
+                f"em {duracao:.0f}s; {self.recuos} recuos; taxa final {self.taxa:.1f} msg/min)")
+
+def criar_limitador(backend: str, **ajustes) -> LimitadorAdaptativo:
+    """Cria o limitador com o perfil do backend, aplicando os tetos das variáveis de ambiente.
+
+    `ajustes` (por exemplo, o orçamento próprio de um remetente) têm a palavra final.
+    """
+    perfil = dict(ConfigLimitador.PERFIS.get(backend, ConfigLimitador.PERFIS['pywhatkit']))
+    if ConfigLimitador.LIMITE_POR_MINUTO: perfil['limite_por_minuto'] = ConfigLimitador.LIMITE_POR_MINUTO
+    if ConfigLimitador.LIMITE_POR_HORA: perfil['limite_por_hora'] = ConfigLimitador.LIMITE_POR_HORA
+    perfil.update(ajustes)
+    return LimitadorAdaptativo(**perfil)
@@ -0,0 +1,214 @@
+# =============================================================================
+# LOGGING ASSÍNCRONO E ESTRUTURADO
+# =============================================================================
+# Configuração de log única para todos os scripts. Quem loga só coloca o
+# registro em uma fila (QueueHandler); uma thread à parte (QueueListener)
+# formata e grava no disco, então o laço de envio nunca espera pelo arquivo.
+#
+# Cada execução escreve em logs/:
+#   - <prefixo>.log:   texto, no mesmo formato de antes (também no terminal);
+#   - <prefixo>.jsonl: um JSON por linha, com os eventos estruturados
+#     (telefone, campanha, tentativa, latência, resultado) além das mensagens.
+#
+# Os dois arquivos giram na virada do dia ou ao passar de TAMANHO_MAXIMO, o
+# que vier primeiro; o arquivo girado é comprimido (.gz) e só as últimas
+# COPIAS são mantidas. Processos filhos (remetentes, trabalhadores) mandam os
+# registros para a fila do processo principal, que é o único a escrever.
+#
+#   python log_estruturado.py --campanha parabens --resultado falha
+# =============================================================================
+import argparse
+import atexit
+import datetime
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import shutil
+import sys
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import metricas
+
+# =============================================================================
+# CONFIGURAÇÕES DO LOG
+# =============================================================================
+class ConfigLog:
+    PASTA = Path(os.environ.get('AUTOSENDER_PASTA_LOGS', 'logs'))
+    TAMANHO_MAXIMO = int(os.environ.get('AUTOSENDER_LOG_TAMANHO_MAXIMO', str(10 * 1024 * 1024)))
+    COPIAS = 30   # arquivos girados mantidos, por tipo
+    FORMATO = '%(asctime)s - %(levelname)s - %(message)s'
+    NIVEL = logging.INFO
+
+# Eventos estruturados vão só para o .jsonl: no terminal e no .log seriam uma linha a mais por envio.
+LOGGER_EVENTOS = 'autosender.eventos'
+
+# =============================================================================
+# EVENTOS ESTRUTURADOS
+# =============================================================================
+def evento(nome: str, nivel: int = logging.INFO, **campos):
+    """Registra um evento estruturado (ex.: evento('envio', telefone=..., resultado='sucesso'))."""
+    logging.getLogger(LOGGER_EVENTOS).log(nivel, nome, extra={'evento': nome, 'campos': campos})
+
+def _carimbar_contexto(registro: logging.LogRecord) -> bool:
+    # Roda na thread de quem loga, onde a campanha em andamento ainda é conhecida.
+    registro.campanha = metricas.campanha_em_andamento()
+    return True
+
+class FormatadorJson(logging.Formatter):
+    """Uma linha JSON por registro."""
+
+    def format(self, registro: logging.LogRecord) -> str:
+        dados = {
+            'ts': datetime.datetime.fromtimestamp(registro.created).isoformat(timespec='milliseconds'),
+            'nivel': registro.levelname,
+            'logger': registro.name,
+            'processo': registro.process,
+            'mensagem': registro.getMessage(),
+        }
+        if getattr(registro, 'campanha', ''): dados['campanha'] = registro.campanha
+        if hasattr(registro, 'evento'):
+            dados['evento'] = registro.evento
+            dados.update(registro.campos)
+        return json.dumps(dados, ensure_ascii=False, default=str)
+
+def _sem_eventos(registro: logging.LogRecord) -> bool:
+    return registro.name != LOGGER_EVENTOS
+
+# =============================================================================
+# ROTAÇÃO COM COMPRESSÃO
+# =============================================================================
+class ArquivoRotativo(logging.handlers.RotatingFileHandler):
+    """Gira o arquivo por tamanho ou na virada do dia e comprime o arquivo girado."""
+
+    def __init__(self, arquivo: Path, tamanho_maximo: int = ConfigLog.TAMANHO_MAXIMO, copias: int = ConfigLog.COPIAS):
+        super().__init__(arquivo, maxBytes=tamanho_maximo, backupCount=copias, encoding='utf-8', delay=True)
+        try:
+            self.dia = datetime.date.fromtimestamp(os.path.getmtime(self.baseFilename))
+        except OSError:
+            self.dia = datetime.date.today()
+
+    def shouldRollover(self, registro: logging.LogRecord) -> bool:
+        # Só a posição do arquivo, sem formatar o registro de novo como faz a classe base.
+        if self.dia != datetime.date.today(): return True
+        if self.stream is None: self.stream = self._open()
+        return self.stream.tell() >= self.maxBytes
+
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        base = Path(self.baseFilename)
+        if base.exists() and base.stat().st_size:
+            destino = base.with_name(f"{base.stem}_{self.dia:%Y%m%d}_{datetime.datetime.now():%H%M%S%f}{base.suffix}.gz")
+            with open(base, 'rb') as origem, gzip.open(destino, 'wb') as comprimido:
+                shutil.copyfileobj(origem, comprimido)
+            base.unlink()
+            girados = sorted(base.parent.glob(f"{base.stem}_*{base.suffix}.gz"))
+            for antigo in girados[:-self.backupCount]:
+                antigo.unlink()
+        self.dia = datetime.date.today()
+
+# =============================================================================
+# CONFIGURAÇÃO
+# =============================================================================
+_ouvinte: Optional[logging.handlers.QueueListener] = None
+_fila = None
+
+def _instalar_fila(fila):
+    raiz = logging.getLogger()
+    manipulador = logging.handlers.QueueHandler(fila)
+    manipulador.addFilter(_carimbar_contexto)
+    raiz.handlers = [manipulador]
+    raiz.setLevel(ConfigLog.NIVEL)
+
+def _parar():
+    global _ouvinte
+    if _ouvinte is not None:
+        # Esvazia a fila antes de sair: os últimos registros da execução também vão para o disco.
+        _ouvinte.stop()
+        _ouvinte = None
+
+def configurar_logging(prefixo: str = 'campanhas') -> Path:
+    """Configura o log de texto, o JSONL e o terminal, todos gravados fora da thread de quem loga.
+
+    Como o logging.basicConfig, não faz nada se o processo já tiver o log configurado.
+    """
+    global _ouvinte, _fila
+    log_file = ConfigLog.PASTA / f'{prefixo}.log'
+    if logging.getLogger().handlers: return log_file
+    # Import tardio: só quem configura o log paga o multiprocessing (a fila é compartilhada com os filhos).
+    import multiprocessing
+    import multiprocessing.util
+
+    ConfigLog.PASTA.mkdir(parents=True, exist_ok=True)
+    texto = ArquivoRotativo(log_file)
+    terminal = logging.StreamHandler(sys.stdout)
+    for manipulador in (texto, terminal):
+        manipulador.setFormatter(logging.Formatter(ConfigLog.FORMATO))
+        manipulador.addFilter(_sem_eventos)
+    estruturado = ArquivoRotativo(ConfigLog.PASTA / f'{prefixo}.jsonl')
+    estruturado.setFormatter(FormatadorJson())
+
+    _fila = multiprocessing.Queue()
+    _ouvinte = logging.handlers.QueueListener(_fila, texto, estruturado, terminal)
+    _ouvinte.start()
+    _instalar_fila(_fila)
+    # Processos do multiprocessing saem sem rodar o atexit; o Finalize cobre esse caso.
+    atexit.register(_parar)
+    multiprocessing.util.Finalize(None, _parar, exitpriority=10)
+    print(f"Sistema de logging configurado. Logs em: {log_file}")
+    return log_file
+
+def fila_logs():
+    """Fila do log deste processo, para repassar aos processos filhos (None se o log não foi configurado)."""
+    return _fila
+
+def encaminhar_logs(fila):
+    """Em um processo filho: manda os registros para a fila do processo pai em vez de gravar arquivos próprios."""
+    if fila is not None: _instalar_fila(fila)
+
+# =============================================================================
+# CONSULTA
+# =============================================================================
+def ler_eventos(prefixo: str = 'campanhas', pasta: Path = ConfigLog.PASTA) -> Iterator[Dict]:
+    """Lê o JSONL atual e os girados (.gz), do mais antigo para o mais novo."""
+    arquivos = sorted(pasta.glob(f'{prefixo}_*.jsonl.gz')) + [pasta / f'{prefixo}.jsonl']
+    for arquivo in arquivos:
+        if not arquivo.exists(): continue
+        abrir = gzip.open if arquivo.suffix == '.gz' else open
+        with abrir(arquivo, 'rt', encoding='utf-8') as f:
+            for linha in f:
+                try:
+                    yield json.loads(linha)
+                except json.JSONDecodeError:
+                    continue
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Filtra os eventos estruturados dos logs (.jsonl e girados).")
+    parser.add_argument('--prefixo', default='campanhas', help="Prefixo do log (campanhas, monitor, painel...).")
+    parser.add_argument('--evento', help="Tipo de evento (envio, reagendado, falha).")
+    parser.add_argument('--campanha')
+    parser.add_argument('--telefone')
+    parser.add_argument('--resultado', help="sucesso ou falha.")
+    parser.add_argument('--desde', help="Data/hora inicial (AAAA-MM-DD[THH:MM]).")
+    args = parser.parse_args(argv)
+
+    filtros = {chave: valor for chave, valor in (('evento', args.evento), ('campanha', args.campanha),
+                                                 ('telefone', args.telefone), ('resultado', args.resultado)) if valor}
+    encontrados = 0
+    for registro in ler_eventos(args.prefixo):
+        if 'evento' not in registro: continue
+        if args.desde and registro['ts'] < args.desde: continue
+        if any(registro.get(chave) != valor for chave, valor in filtros.items()): continue
+        print(json.dumps(registro, ensure_ascii=False))
+        encontrados += 1
+    print(f"ℹ️ {encontrados} eventos encontrados.", file=sys.stderr)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except BrokenPipeError:
+        pass
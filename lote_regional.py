@@ -0,0 +1,282 @@
+# =============================================================================
+# LOTE REGIONAL (VÁRIAS PLANILHAS EM PARALELO)
+# =============================================================================
+# Cada região mantém a sua própria planilha no formato de
+# contatosvendedores.xlsx. Em vez de uma execução por planilha, o lote recebe
+# uma pasta (todas as .xlsx dela) ou um manifesto JSON e:
+#
+#   1. lê, prepara e renderiza cada planilha em um processo próprio, usando
+#      todos os núcleos (a leitura do Excel e a renderização são CPU);
+#   2. junta as mensagens no processo principal, na ordem das regiões: um
+#      telefone que aparece em mais de uma região recebe cada campanha uma
+#      única vez (vale a primeira região);
+#   3. grava tudo em um só outbox e envia como o motor, registrando no mesmo
+#      historico_envios.db (SQLite em WAL: os processos que gravam nele, como
+#      os remetentes, se revezam pelo lock do próprio banco);
+#   4. imprime o relatório final consolidado de cada campanha e um resumo por região.
+#
+#   python lote_regional.py regioes/                      # todas as .xlsx da pasta
+#   python lote_regional.py regioes.json parabens         # manifesto, só parabéns
+#
+# Manifesto: {"regioes": [{"nome": "sul", "arquivo": "sul.xlsx", "aba": "basededados"}, ...]}
+# (ou só a lista). "nome" e "aba" são opcionais; caminhos relativos partem da pasta do manifesto.
+# =============================================================================
+import argparse
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+import metricas
+from motor_campanhas import (ConfigMotor, ItemEnvio, anexar_cartoes, carregar_configuracao, carregar_template,
+                             configurar_logging, enviar_pendentes, filtrar_campanha, ler_e_preparar_planilha, montar_itens,
+                             relatar_campanhas, selecionar_campanhas, selecionar_pendentes, validar_colunas)
+from historico_db import abrir_historico
+from log_estruturado import encaminhar_logs, fila_logs
+from outbox import abrir_outbox
+from remetentes import atribuir_remetentes, carregar_remetentes
+
+# =============================================================================
+# CONFIGURAÇÕES DO LOTE
+# =============================================================================
+class ConfigLote:
+    EXTENSOES = ('.xlsx', '.xlsm', '.xls')
+    PROCESSOS = int(os.environ.get('AUTOSENDER_PROCESSOS_LOTE', '0'))   # 0 = um por núcleo
+    COLUNAS_REJEITADOS = ['Nome', 'Telefone', 'motivo_telefone']
+
+# =============================================================================
+# ENTRADA: PASTA OU MANIFESTO
+# =============================================================================
+def listar_regioes(entrada: str, aba_padrao: str = ConfigMotor.NOME_DA_ABA) -> List[Dict[str, str]]:
+    """Lê a pasta ou o manifesto e devolve [{'nome', 'arquivo', 'aba'}] na ordem de prioridade."""
+    caminho = Path(entrada)
+    if caminho.is_dir():
+        # "~$…" são os arquivos de trava que o Excel cria enquanto a planilha está aberta.
+        arquivos = sorted(p for p in caminho.iterdir()
+                          if p.suffix.lower() in ConfigLote.EXTENSOES and not p.name.startswith('~$'))
+        return [{'nome': p.stem, 'arquivo': str(p), 'aba': aba_padrao} for p in arquivos]
+
+    with open(caminho, 'r', encoding='utf-8') as f:
+        manifesto = json.load(f)
+    entradas = manifesto.get('regioes', []) if isinstance(manifesto, dict) else manifesto
+    regioes = []
+    for entrada_regiao in entradas:
+        if isinstance(entrada_regiao, str): entrada_regiao = {'arquivo': entrada_regiao}
+        arquivo = Path(entrada_regiao['arquivo'])
+        if not arquivo.is_absolute(): arquivo = caminho.parent / arquivo
+        regioes.append({'nome': entrada_regiao.get('nome', arquivo.stem), 'arquivo': str(arquivo),
+                        'aba': entrada_regiao.get('aba', aba_padrao)})
+    nomes = [r['nome'] for r in regioes]
+    repetidos = {nome for nome in nomes if nomes.count(nome) > 1}
+    if repetidos: raise ValueError(f"Regiões repetidas no manifesto: {', '.join(sorted(repetidos))}")
+    return regioes
+
+# =============================================================================
+# PREPARO DE UMA REGIÃO (PROCESSO DO POOL)
+# =============================================================================
+def preparar_regiao(regiao: Dict[str, str], campanhas: List[Dict], enviados_hoje: Dict[str, Set[str]]) -> Dict:
+    """Lê a planilha da região e renderiza as mensagens de cada campanha.
+
+    Não grava nada: o outbox, o histórico e o relatório de rejeitados ficam com o processo
+    principal, que recebe os itens, os rejeitados e as métricas desta região.
+    """
+    from cache_planilha import carregar_com_cache
+    metricas.coletor.iniciar_execucao()
+    resultado = {'regiao': regiao['nome'], 'arquivo': regiao['arquivo'], 'registros': 0, 'rejeitados': None,
+                 'campanhas': {}, 'erro': None}
+    try:
+        if not Path(regiao['arquivo']).exists():
+            raise FileNotFoundError(f"Arquivo não encontrado: {regiao['arquivo']}")
+        with metricas.fase('carga'):
+            df = carregar_com_cache(regiao['arquivo'], regiao['aba'],
+                                    lambda: ler_e_preparar_planilha(regiao['arquivo'], regiao['aba']))
+    except Exception as e:
+        logging.error(f"[{regiao['nome']}] Erro ao carregar a planilha: {e}")
+        resultado['erro'] = str(e)
+        resultado['metricas'] = metricas.coletor.estado()
+        return resultado
+
+    invalidos = df['Telefone_Formatado'].isna()
+    if invalidos.any(): resultado['rejeitados'] = df.loc[invalidos, ConfigLote.COLUNAS_REJEITADOS]
+    df = df[~invalidos]
+    resultado['registros'] = len(df)
+    logging.info(f"[{regiao['nome']}] {len(df)} registros válidos ({int(invalidos.sum())} telefones inválidos).")
+
+    for campanha in campanhas:
+        nome_campanha = campanha['nome']
+        parcial = resultado['campanhas'][nome_campanha] = {'total': 0, 'pulados': 0, 'itens': []}
+        with metricas.campanha_atual(nome_campanha):
+            try:
+                validar_colunas(df, ConfigMotor.COLUNAS_POR_TIPO.get(campanha['tipo'], []))
+                df_campanha = filtrar_campanha(df, campanha)
+                parcial['total'] = len(df_campanha)
+                with metricas.fase('deduplicacao'):
+                    df_pendente, parcial['pulados'] = selecionar_pendentes(df_campanha, campanha, None,
+                                                                           enviados_hoje[nome_campanha])
+                with metricas.fase('renderizacao'):
+                    parcial['itens'] = montar_itens(df_pendente, campanha, carregar_template(campanha))
+                # Este processo já é um do pool: os cartões da região são desenhados aqui mesmo.
+                parcial['anexos'] = anexar_cartoes(df_pendente, campanha, parcial['itens'], processos=1)
+            except (ValueError, FileNotFoundError, KeyError, IndexError) as e:
+                logging.critical(f"[{regiao['nome']}] Campanha '{nome_campanha}' abortada: {e}")
+                parcial['erro'] = str(e)
+    resultado['metricas'] = metricas.coletor.estado()
+    return resultado
+
+# =============================================================================
+# CONSOLIDAÇÃO
+# =============================================================================
+def deduplicar_regioes(preparadas: List[Dict],
+                       campanhas: List[Dict]) -> Dict[str, Tuple[List[ItemEnvio], List[Optional[str]]]]:
+    """Junta os itens (e os anexos) das regiões por campanha; um telefone já visto em uma região anterior é descartado.
+
+    Acrescenta a cada campanha de cada região a quantidade de 'duplicados' descartados.
+    """
+    consolidados = {campanha['nome']: ([], []) for campanha in campanhas}
+    vistos: Dict[str, Set[str]] = {campanha['nome']: set() for campanha in campanhas}
+    for preparada in preparadas:
+        for nome_campanha, parcial in preparada['campanhas'].items():
+            anexos = parcial.get('anexos') or [None] * len(parcial['itens'])
+            novos = [(item, anexo) for item, anexo in zip(parcial['itens'], anexos) if item[0] not in vistos[nome_campanha]]
+            parcial['duplicados'] = len(parcial['itens']) - len(novos)
+            vistos[nome_campanha].update(item[0] for item, _ in novos)
+            itens, anexos_campanha = consolidados[nome_campanha]
+            itens.extend(item for item, _ in novos)
+            anexos_campanha.extend(anexo for _, anexo in novos)
+            if parcial['duplicados']:
+                logging.info(f"PULADO [{nome_campanha}]: {parcial['duplicados']} telefones de '{preparada['regiao']}' "
+                             f"já presentes em outra região.")
+    return consolidados
+
+def registrar_rejeitados_regioes(preparadas: List[Dict]):
+    rejeitados = [p['rejeitados'].assign(Regiao=p['regiao']) for p in preparadas if p['rejeitados'] is not None]
+    if not rejeitados: return
+    import pandas as pd
+    from telefones import contar_motivos, registrar_rejeitados
+    todos = pd.concat(rejeitados, ignore_index=True)
+    try:
+        arquivo = registrar_rejeitados(todos, colunas=('Regiao', *ConfigLote.COLUNAS_REJEITADOS))
+        logging.warning(f"{len(todos)} telefones inválidos fora do envio ({contar_motivos(todos['motivo_telefone'])}). "
+                        f"Relatório: {arquivo}")
+    except OSError as e:
+        logging.error(f"{len(todos)} telefones inválidos; não foi possível gravar o relatório: {e}")
+
+def resumo_regioes(preparadas: List[Dict], campanhas: List[Dict]) -> str:
+    """Tabela por região: registros válidos e, por campanha, novas mensagens / duplicadas em outra região."""
+    nomes = [campanha['nome'] for campanha in campanhas]
+    largura = max([len('Região')] + [len(p['regiao']) for p in preparadas])
+    linhas = [f"    {'Região':<{largura}}  {'Registros':>9}  " + '  '.join(f"{nome:>18}" for nome in nomes)]
+    for preparada in preparadas:
+        if preparada['erro']:
+            linhas.append(f"    {preparada['regiao']:<{largura}}  ❌ {preparada['erro']}")
+            continue
+        colunas = []
+        for nome in nomes:
+            parcial = preparada['campanhas'].get(nome, {})
+            if 'erro' in parcial:
+                colunas.append(f"{'erro':>18}")
+                continue
+            duplicados = parcial.get('duplicados', 0)
+            colunas.append(f"{len(parcial['itens']) - duplicados} (+{duplicados} dup)".rjust(18))
+        linhas.append(f"    {preparada['regiao']:<{largura}}  {preparada['registros']:>9}  " + '  '.join(colunas))
+    return '\n'.join(["\n    ========== LOTE REGIONAL: RESUMO POR REGIÃO ==========", *linhas,
+                      "    ======================================================"])
+
+# =============================================================================
+# EXECUÇÃO DO LOTE
+# =============================================================================
+def executar_lote(entrada: str, nomes: Optional[List[str]] = None,
+                  caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS, so_planejar: bool = False,
+                  processos: int = ConfigLote.PROCESSOS) -> Dict[str, Dict[str, int]]:
+    """Prepara as planilhas das regiões em paralelo, deduplica os telefones e envia tudo de uma vez."""
+    configuracao = carregar_configuracao(caminho_config)
+    campanhas = selecionar_campanhas(configuracao, nomes)
+    regioes = listar_regioes(entrada, configuracao['planilha']['aba'])
+    if not regioes:
+        logging.warning(f"Nenhuma planilha encontrada em '{entrada}'.")
+        return {}
+    metricas.coletor.iniciar_execucao()
+
+    try:
+        # Quem já recebeu hoje é consultado uma vez aqui, e não por cada processo.
+        enviados_hoje = {}
+        for campanha in campanhas:
+            with abrir_historico(campanha['nome']) as historico:
+                enviados_hoje[campanha['nome']] = historico.telefones_enviados_hoje()
+
+        import multiprocessing
+        processos = min(len(regioes), processos or os.cpu_count() or 1)
+        logging.info(f"Lote regional: {len(regioes)} planilhas em {processos} processos.")
+        with metricas.fase('preparo_regioes'):
+            # Os processos do pool logam pela fila deste processo, que continua sendo o único a gravar.
+            with multiprocessing.Pool(processos, initializer=encaminhar_logs, initargs=(fila_logs(),)) as pool:
+                preparadas = pool.starmap(preparar_regiao, [(regiao, campanhas, enviados_hoje) for regiao in regioes])
+        for preparada in preparadas:
+            metricas.coletor.mesclar(preparada.pop('metricas'), paralelo=True)
+        registrar_rejeitados_regioes(preparadas)
+
+        consolidados = deduplicar_regioes(preparadas, campanhas)
+        resultados = {}
+        for campanha in campanhas:
+            nome_campanha = campanha['nome']
+            parciais = [p['campanhas'][nome_campanha] for p in preparadas if nome_campanha in p['campanhas']]
+            resultados[nome_campanha] = {
+                'sucessos': 0, 'falhas': 0, 'total': sum(p['total'] for p in parciais),
+                'pulados': sum(p['pulados'] + p.get('duplicados', 0) for p in parciais),
+                'duplicados': sum(p.get('duplicados', 0) for p in parciais), 'enfileirados': 0}
+
+        vazao = 0.0
+        with abrir_outbox() as outbox:
+            nomes_remetentes = [r['nome'] for r in carregar_remetentes(configuracao)]
+            with metricas.fase('enfileiramento'):
+                for campanha in campanhas:
+                    itens, anexos = consolidados[campanha['nome']]
+                    atribuidos = atribuir_remetentes([item[0] for item in itens], nomes_remetentes) if nomes_remetentes else None
+                    resultados[campanha['nome']]['enfileirados'] = outbox.enfileirar(
+                        campanha['nome'], itens, campanha['tentativas'], atribuidos, anexos if any(anexos) else None)
+                    logging.info(f"Campanha '{campanha['nome']}': {len(itens)} mensagens de {len(regioes)} regiões, "
+                                 f"{resultados[campanha['nome']]['enfileirados']} novas no outbox.")
+            print(resumo_regioes(preparadas, campanhas))
+            if so_planejar:
+                print(f"📥 Mensagens planejadas no outbox: {outbox.contagem()}")
+                return resultados
+            enviados, vazao = enviar_pendentes(configuracao, campanhas, outbox)
+
+        for nome, (sucessos, falhas) in enviados.items():
+            resultados[nome]['sucessos'] += sucessos
+            resultados[nome]['falhas'] += falhas
+        relatar_campanhas(campanhas, resultados, vazao)
+        return resultados
+    finally:
+        try:
+            metricas.coletor.exportar()
+        except OSError as e:
+            logging.error(f"Não foi possível exportar as métricas: {e}")
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Executa as campanhas sobre as planilhas de várias regiões de uma vez.")
+    parser.add_argument('entrada', help="Pasta com as planilhas (.xlsx) ou manifesto JSON.")
+    parser.add_argument('campanhas', nargs='*', help="Nomes das campanhas (padrão: todas).")
+    parser.add_argument('--config', default=ConfigMotor.ARQUIVO_CAMPANHAS, help="Arquivo de campanhas.")
+    parser.add_argument('--so-planejar', action='store_true', help="Só grava as mensagens no outbox, sem enviar.")
+    parser.add_argument('--processos', type=int, default=ConfigLote.PROCESSOS,
+                        help="Processos que preparam as planilhas (padrão: um por núcleo).")
+    args = parser.parse_args(argv)
+
+    configurar_logging('lote_regional')
+    logging.info("=== INÍCIO DO LOTE REGIONAL ===")
+    executar_lote(args.entrada, args.campanhas, args.config, so_planejar=args.so_planejar, processos=args.processos)
+    logging.info("=== FIM DO LOTE REGIONAL ===")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.warning("Lote interrompido pelo usuário.")
+        print("\nProcesso cancelado.")
+    except Exception as e:
+        logging.critical(f"Erro fatal não tratado no lote: {e}", exc_info=True)
@@ -0,0 +1,464 @@
+# =============================================================================
+# METAS CALCULADAS A PARTIR DO REGISTRO DE VENDAS
+# =============================================================================
+# Em vez de depender das colunas calculadas no Excel (Faturado_mes, Alcance,
+# falta_meta_mes, Fat_Projetado, Pct_Projetado, Meta_diaria, META_BATIDA e
+# Falta_Meta_Dia), que obrigam a recalcular a pasta de trabalho antes de cada
+# execução, o motor lê o registro bruto de vendas (uma linha por venda, em
+# CSV ou Parquet) e calcula essas colunas com group-bys vetorizados. Da
+# planilha de contatos bastam Nome, Telefone e Meta.
+#
+# Ativado por "vendas" na seção "planilha" de campanhas.json:
+#
+#   "vendas": {"arquivo": "vendas.csv", "coluna_vendedor": "Vendedor",
+#              "coluna_data": "Data", "coluna_valor": "Valor", "chave": "Nome",
+#              "calendario": {"feriados": ["2026-11-02", "2026-11-20"]}}
+#
+# O registro só cresce ao longo do dia, então o cálculo é incremental: os
+# totais por vendedor e por dia ficam em .cache/vendas, junto com a posição já
+# lida de cada arquivo (bytes do CSV, linhas do Parquet). Uma atualização no
+# meio do dia lê só as vendas acrescentadas desde a execução anterior. Um
+# arquivo reescrito (encolheu ou mudou o que já tinha sido lido) é relido
+# inteiro; "arquivo" também pode ser uma pasta com vários arquivos.
+#
+# Projeção e meta diária seguem um calendário de dias úteis: por padrão,
+# segunda a sexta contam um dia inteiro, o sábado meio dia e o domingo e os
+# feriados nada.
+#
+#   python metas_vendas.py                          # metas de hoje com o "vendas" de campanhas.json
+#   python metas_vendas.py vendas.csv --data 2026-10-17
+#   python metas_vendas.py --sintetico 2000000      # benchmark: carga inicial e atualização
+# =============================================================================
+import argparse
+import csv
+import datetime
+import hashlib
+import io
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+import metricas
+
+# =============================================================================
+# CONFIGURAÇÕES DO REGISTRO DE VENDAS
+# =============================================================================
+class ConfigVendas:
+    PASTA = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'vendas'
+    COLUNA_VENDEDOR = 'Vendedor'
+    COLUNA_DATA = 'Data'
+    COLUNA_VALOR = 'Valor'
+    # Coluna da planilha de contatos que casa com a coluna do vendedor no registro.
+    CHAVE = 'Nome'
+    COLUNA_META = 'Meta'
+    EXTENSOES = ('.csv', '.txt', '.parquet')
+    DIAS_INTEIROS = 'Mon Tue Wed Thu Fri'
+    MEIO_PERIODO = 'Sat'
+    # Leitura do CSV em blocos deste tamanho: a carga inicial não precisa caber na memória.
+    BLOCO_BYTES = 32 * 1024 * 1024
+    # Trecho do arquivo comparado entre execuções para perceber que ele foi reescrito.
+    AMOSTRA_BYTES = 64 * 1024
+    # Incrementar quando a agregação mudar, para descartar os totais guardados.
+    VERSAO_ESTADO = 1
+    COLUNAS_CALCULADAS = ['Faturado_mes', 'Alcance', 'falta_meta_mes', 'Fat_Projetado', 'Pct_Projetado',
+                          'Meta_diaria', 'META_BATIDA', 'Falta_Meta_Dia']
+
+def normalizar_config(vendas) -> Dict:
+    """Aceita "vendas": "arquivo.csv" ou o dicionário completo e preenche os padrões."""
+    if isinstance(vendas, str): vendas = {'arquivo': vendas}
+    vendas = dict(vendas)
+    if not vendas.get('arquivo'):
+        raise ValueError("\"vendas\" em campanhas.json precisa de \"arquivo\".")
+    vendas.setdefault('coluna_vendedor', ConfigVendas.COLUNA_VENDEDOR)
+    vendas.setdefault('coluna_data', ConfigVendas.COLUNA_DATA)
+    vendas.setdefault('coluna_valor', ConfigVendas.COLUNA_VALOR)
+    vendas.setdefault('chave', ConfigVendas.CHAVE)
+    vendas.setdefault('calendario', {})
+    return vendas
+
+# =============================================================================
+# CALENDÁRIO DE DIAS ÚTEIS
+# =============================================================================
+class Calendario:
+    """Conta dias úteis com peso: dias inteiros valem 1, os de meio período 0,5, feriados 0."""
+
+    def __init__(self, dias_inteiros: str = ConfigVendas.DIAS_INTEIROS,
+                 meio_periodo: str = ConfigVendas.MEIO_PERIODO, feriados: Sequence[str] = ()):
+        self.feriados = np.array(sorted(feriados), dtype='datetime64[D]')
+        self.dias_inteiros = dias_inteiros
+        self.meio_periodo = meio_periodo
+
+    @classmethod
+    def da_config(cls, config: Dict) -> 'Calendario':
+        return cls(config.get('dias_inteiros', ConfigVendas.DIAS_INTEIROS),
+                   config.get('meio_periodo', ConfigVendas.MEIO_PERIODO), config.get('feriados', ()))
+
+    def dias(self, inicio: datetime.date, fim: datetime.date) -> float:
+        """Dias úteis no intervalo [inicio, fim)."""
+        total = 0.0
+        for mascara, peso in ((self.dias_inteiros, 1.0), (self.meio_periodo, 0.5)):
+            # O numpy não aceita uma semana sem nenhum dia marcado.
+            if mascara.strip():
+                total += peso * int(np.busday_count(inicio, fim, weekmask=mascara, holidays=self.feriados))
+        return total
+
+def dias_do_mes(calendario: Calendario, hoje: datetime.date) -> Tuple[float, float, float]:
+    """(dias úteis do mês, decorridos até hoje inclusive, restantes a partir de hoje inclusive)."""
+    inicio = hoje.replace(day=1)
+    proximo = (inicio + datetime.timedelta(days=32)).replace(day=1)
+    amanha = hoje + datetime.timedelta(days=1)
+    return calendario.dias(inicio, proximo), calendario.dias(inicio, amanha), calendario.dias(hoje, proximo)
+
+# =============================================================================
+# LEITURA INCREMENTAL DO REGISTRO
+# =============================================================================
+def _normalizar_nomes(valores: pd.Series) -> pd.Series:
+    """Chave de junção: sem acentos, maiúsculas e espaços simples ("João  da Silva" == "JOAO DA SILVA")."""
+    texto = valores.astype(str).str.normalize('NFKD').str.encode('ascii', 'ignore').str.decode('ascii')
+    return texto.str.upper().str.split().str.join(' ')
+
+def _valores(serie: pd.Series) -> np.ndarray:
+    """Valores das vendas como float; aceita "1.234,56" e "1234.56". Inválidos viram 0."""
+    if not pd.api.types.is_numeric_dtype(serie):
+        texto = serie.astype(str).str.strip()
+        brasileiro = texto.str.contains(',', regex=False)
+        texto = texto.where(~brasileiro, texto.str.replace('.', '', regex=False).str.replace(',', '.', regex=False))
+        serie = pd.to_numeric(texto, errors='coerce')
+    return np.nan_to_num(serie.to_numpy(dtype=float))
+
+def _datas(serie: pd.Series) -> pd.Series:
+    """Datas das vendas, sem o horário; aceita "17/10/2026" e "2026-10-17". Inválidas viram NaT."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.normalize().astype('datetime64[ns]')
+    texto = serie.astype(str).str.strip()
+    iso = texto.str.match(r'\d{4}-')
+    datas = pd.Series(pd.NaT, index=serie.index, dtype='datetime64[ns]')
+    if iso.any(): datas[iso] = pd.to_datetime(texto[iso], format='ISO8601', errors='coerce')
+    if (~iso).any(): datas[~iso] = pd.to_datetime(texto[~iso], dayfirst=True, errors='coerce')
+    return datas.dt.normalize()
+
+def _agregar(bruto: pd.DataFrame, vendas: Dict) -> pd.DataFrame:
+    """Totais por vendedor e dia de um bloco de vendas."""
+    # Soma primeiro pelos textos como vieram: nomes e datas só são normalizados uma vez por valor distinto.
+    bloco = pd.DataFrame({'vendedor': bruto[vendas['coluna_vendedor']], 'dia': bruto[vendas['coluna_data']],
+                          'valor': _valores(bruto[vendas['coluna_valor']])})
+    bloco = bloco.groupby(['vendedor', 'dia'], as_index=False, sort=False, dropna=True)['valor'].sum()
+    bloco['vendedor'] = _normalizar_nomes(bloco['vendedor'])
+    bloco['dia'] = _datas(bloco['dia'])
+    bloco = bloco[bloco['dia'].notna() & (bloco['vendedor'] != '')]
+    return bloco.groupby(['vendedor', 'dia'], as_index=False, sort=False)['valor'].sum()
+
+def _amostras(caminho: Path, posicao: int) -> str:
+    """Hash do começo do arquivo e do trecho logo antes de `posicao` (o fim do que já foi lido)."""
+    sha = hashlib.sha1()
+    with open(caminho, 'rb') as f:
+        sha.update(f.read(min(posicao, ConfigVendas.AMOSTRA_BYTES)))
+        f.seek(max(0, posicao - 4096))
+        sha.update(f.read(posicao - f.tell()))
+    return sha.hexdigest()
+
+def _amostras_parquet(caminho: Path, linhas: int) -> str:
+    """Hash dos metadados dos grupos de linhas já lidos e dos primeiros bytes de cada coluna do último deles.
+
+    Os metadados (linhas, tamanhos, posições e mínimo/máximo de cada coluna) mudam quando uma
+    venda antiga é corrigida; os bytes do último grupo pegam o que as estatísticas não mostram.
+    """
+    import pyarrow.parquet as pq
+    metadados = pq.ParquetFile(caminho).metadata
+    sha = hashlib.sha1()
+    inicio, ultimo = 0, None
+    for grupo in range(metadados.num_row_groups):
+        dados = metadados.row_group(grupo)
+        if inicio + dados.num_rows > linhas: break
+        sha.update(repr(dados.to_dict()).encode('utf-8'))
+        inicio, ultimo = inicio + dados.num_rows, dados
+    if ultimo is not None:
+        with open(caminho, 'rb') as f:
+            for indice in range(ultimo.num_columns):
+                coluna = ultimo.column(indice)
+                f.seek(coluna.dictionary_page_offset if coluna.has_dictionary_page else coluna.data_page_offset)
+                sha.update(f.read(min(coluna.total_compressed_size, ConfigVendas.AMOSTRA_BYTES)))
+    return sha.hexdigest()
+
+def _ler_csv(caminho: Path, vendas: Dict, estado: Optional[Dict]) -> Tuple[Iterator[Tuple[pd.DataFrame, bool]], Dict]:
+    """Blocos do CSV a partir da posição já lida, como (totais, definitivo).
+
+    O estado devolvido é atualizado conforme os blocos definitivos são lidos. Uma última linha
+    sem quebra de linha vem como bloco provisório: conta nesta leitura, mas a posição não avança
+    sobre ela, e a próxima leitura a relê inteira (completa, se o arquivo tiver crescido).
+    """
+    if estado is None:
+        with open(caminho, 'rb') as f:
+            primeira = f.readline()
+        texto = primeira.decode('utf-8-sig').strip()
+        try:
+            separador = csv.Sniffer().sniff(texto, delimiters=';,\t').delimiter
+        except csv.Error:
+            separador = ','
+        cabecalho = [c.strip().strip('"') for c in texto.split(separador)]
+        faltando = [vendas[c] for c in ('coluna_vendedor', 'coluna_data', 'coluna_valor') if vendas[c] not in cabecalho]
+        if faltando:
+            raise ValueError(f"Coluna obrigatória '{faltando[0]}' não encontrada em {caminho.name}")
+        estado = {'posicao': len(primeira), 'separador': separador, 'cabecalho': cabecalho}
+    estado = dict(estado)
+    colunas = [vendas['coluna_vendedor'], vendas['coluna_data'], vendas['coluna_valor']]
+
+    def ler(dados: bytes) -> pd.DataFrame:
+        bruto = pd.read_csv(io.BytesIO(dados), sep=estado['separador'], header=None,
+                            names=estado['cabecalho'], usecols=colunas, dtype=str, encoding='utf-8')
+        return _agregar(bruto, vendas)
+
+    def blocos() -> Iterator[Tuple[pd.DataFrame, bool]]:
+        with open(caminho, 'rb') as f:
+            tamanho = os.fstat(f.fileno()).st_size
+            f.seek(estado['posicao'])
+            resto = b''
+            while True:
+                lido = f.read(ConfigVendas.BLOCO_BYTES)
+                if not lido: break
+                dados = resto + lido
+                # Só linhas completas: uma venda sendo gravada agora fica para a próxima leitura.
+                corte = dados.rfind(b'\n') + 1
+                resto = dados[corte:]
+                if not corte: continue
+                estado['posicao'] += corte
+                yield ler(dados[:corte]), True
+            # Última linha sem '\n': só é lida se o arquivo não cresceu durante a leitura
+            # (senão pode ser uma venda ainda sendo gravada).
+            if resto.strip() and os.fstat(f.fileno()).st_size == tamanho:
+                yield ler(resto), False
+    return blocos(), estado
+
+def _ler_parquet(caminho: Path, vendas: Dict, estado: Optional[Dict]) -> Tuple[Iterator[Tuple[pd.DataFrame, bool]], Dict]:
+    """Blocos (grupos de linhas) do Parquet a partir da quantidade de linhas já lida."""
+    import pyarrow.parquet as pq
+    arquivo = pq.ParquetFile(caminho)
+    estado = dict(estado or {'linhas': 0})
+    colunas = [vendas['coluna_vendedor'], vendas['coluna_data'], vendas['coluna_valor']]
+
+    def blocos() -> Iterator[Tuple[pd.DataFrame, bool]]:
+        inicio = 0
+        for grupo in range(arquivo.num_row_groups):
+            linhas = arquivo.metadata.row_group(grupo).num_rows
+            if inicio + linhas > estado['linhas']:
+                tabela = arquivo.read_row_group(grupo, columns=colunas).to_pandas()
+                yield _agregar(tabela.iloc[max(0, estado['linhas'] - inicio):], vendas), True
+                estado['linhas'] = inicio + linhas
+            inicio += linhas
+    return blocos(), estado
+
+def _arquivos(fonte: Path) -> List[Path]:
+    if fonte.is_dir():
+        return sorted(p for p in fonte.iterdir() if p.suffix.lower() in ConfigVendas.EXTENSOES)
+    if not fonte.exists():
+        raise FileNotFoundError(f"Registro de vendas não encontrado: {fonte}")
+    return [fonte]
+
+def _reaproveitavel(caminho: Path, guardado: Optional[Dict]) -> bool:
+    """O que já foi lido deste arquivo continua valendo? (só cresceu desde a última leitura)"""
+    if guardado is None: return False
+    tamanho = caminho.stat().st_size
+    if caminho.suffix.lower() == '.parquet':
+        # O Parquet é regravado inteiro a cada acréscimo: além de não ter perdido linhas, os grupos
+        # já lidos têm de continuar os mesmos (uma venda antiga corrigida faz reler o arquivo).
+        import pyarrow.parquet as pq
+        linhas = guardado['leitura']['linhas']
+        return (pq.ParquetFile(caminho).metadata.num_rows >= linhas
+                and _amostras_parquet(caminho, linhas) == guardado['amostra'])
+    posicao = guardado['leitura']['posicao']
+    return tamanho >= posicao and _amostras(caminho, posicao) == guardado['amostra']
+
+def assinatura_vendas(vendas: Dict) -> Tuple:
+    """(mtime, tamanho) dos arquivos do registro: muda a cada venda gravada."""
+    assinatura = []
+    for caminho in _arquivos(Path(normalizar_config(vendas)['arquivo'])):
+        estado = caminho.stat()
+        assinatura.append((caminho.name, estado.st_mtime_ns, estado.st_size))
+    return tuple(assinatura)
+
+# =============================================================================
+# TOTAIS ACUMULADOS (ESTADO ENTRE EXECUÇÕES)
+# =============================================================================
+def _caminho_estado(vendas: Dict) -> Path:
+    texto = '|'.join([str(Path(vendas['arquivo']).resolve()), vendas['coluna_vendedor'], vendas['coluna_data'],
+                      vendas['coluna_valor']])
+    return ConfigVendas.PASTA / f"{hashlib.sha1(texto.encode('utf-8')).hexdigest()[:16]}.pkl"
+
+def _ler_estado(caminho: Path) -> Optional[Dict]:
+    try:
+        estado = pd.read_pickle(caminho)
+    except (FileNotFoundError, EOFError):
+        return None
+    except Exception as e:
+        logging.warning(f"Totais de vendas ilegíveis, o registro será relido: {e}")
+        return None
+    return estado if estado.get('versao') == ConfigVendas.VERSAO_ESTADO else None
+
+def _gravar_estado(caminho: Path, estado: Dict):
+    caminho.parent.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(f'.{os.getpid()}.tmp')
+    pd.to_pickle(estado, temporario)
+    os.replace(temporario, caminho)
+
+def agregar_vendas(vendas: Dict, refazer: bool = False) -> pd.DataFrame:
+    """Totais de vendas por vendedor e dia (colunas vendedor, dia, valor), lendo só o que é novo.
+
+    Os totais ficam separados por arquivo: um arquivo reescrito ou removido tem só a sua
+    parte descartada, e os demais não são relidos.
+    """
+    vendas = normalizar_config(vendas)
+    destino = _caminho_estado(vendas)
+    estado = None if refazer else _ler_estado(destino)
+    estado = estado or {'versao': ConfigVendas.VERSAO_ESTADO, 'arquivos': {},
+                        'totais': pd.DataFrame({'arquivo': pd.Series(dtype=str), 'vendedor': pd.Series(dtype=str),
+                                                'dia': pd.Series(dtype='datetime64[ns]'),
+                                                'valor': pd.Series(dtype=float)})}
+    arquivos = _arquivos(Path(vendas['arquivo']))
+    nomes = {str(caminho) for caminho in arquivos}
+    totais = estado['totais'][estado['totais']['arquivo'].isin(nomes)]
+    lidos: Dict[str, Dict] = {}
+    novos, provisorios, alterado = [], [], len(totais) != len(estado['totais'])
+
+    inicio = time.perf_counter()
+    for caminho in arquivos:
+        nome = str(caminho)
+        guardado = estado['arquivos'].get(nome)
+        if not _reaproveitavel(caminho, guardado):
+            if guardado is not None: logging.info(f"{caminho.name} foi reescrito: lido desde o início.")
+            totais, guardado = totais[totais['arquivo'] != nome], None
+            alterado = True
+        ler = _ler_parquet if caminho.suffix.lower() == '.parquet' else _ler_csv
+        blocos, leitura = ler(caminho, vendas, guardado['leitura'] if guardado else None)
+        for bloco, definitivo in blocos:
+            if not bloco.empty: (novos if definitivo else provisorios).append(bloco.assign(arquivo=nome))
+        if guardado is None or leitura != guardado['leitura']: alterado = True
+        lidos[nome] = {'leitura': leitura,
+                       'amostra': (_amostras(caminho, leitura['posicao']) if 'posicao' in leitura
+                                   else _amostras_parquet(caminho, leitura['linhas']))}
+
+    if novos:
+        # Reagrupa com os totais guardados: um dia que já tinha vendas só tem o valor somado.
+        totais = (pd.concat([totais, *novos], ignore_index=True)
+                  .groupby(['arquivo', 'vendedor', 'dia'], as_index=False, sort=False)['valor'].sum())
+    linhas_novas = sum(len(bloco) for bloco in novos)
+    logging.info(f"Registro de vendas: {len(arquivos)} arquivo(s), {linhas_novas} totais diários novos ou "
+                 f"atualizados em {time.perf_counter() - inicio:.2f}s.")
+    if alterado:
+        _gravar_estado(destino, {'versao': ConfigVendas.VERSAO_ESTADO, 'arquivos': lidos, 'totais': totais})
+    # Linhas finais sem '\n' entram no resultado, mas não no estado gravado.
+    if provisorios: totais = pd.concat([totais, *provisorios], ignore_index=True)
+    return totais.groupby(['vendedor', 'dia'], as_index=False, sort=False)['valor'].sum()
+
+# =============================================================================
+# CÁLCULO DAS COLUNAS DE METAS
+# =============================================================================
+def calcular_metas(df: pd.DataFrame, totais: pd.DataFrame, vendas: Dict,
+                   hoje: Optional[datetime.date] = None) -> pd.DataFrame:
+    """Preenche as colunas de ConfigVendas.COLUNAS_CALCULADAS a partir dos totais diários.
+
+    - Faturado_mes: vendas do mês até hoje (inclusive); Alcance = Faturado_mes / Meta.
+    - Fat_Projetado: Faturado_mes / dias úteis decorridos * dias úteis do mês.
+    - Meta_diaria: o que faltava da meta até ontem dividido pelos dias úteis restantes (hoje incluído).
+    - Falta_Meta_Dia: quanto da Meta_diaria as vendas de hoje já cobriram.
+    """
+    vendas = normalizar_config(vendas)
+    hoje = hoje or datetime.date.today()
+    total_dias, decorridos, restantes = dias_do_mes(Calendario.da_config(vendas['calendario']), hoje)
+    dia_hoje, inicio_mes = pd.Timestamp(hoje), pd.Timestamp(hoje.replace(day=1))
+
+    do_mes = totais[(totais['dia'] >= inicio_mes) & (totais['dia'] <= dia_hoje)]
+    por_vendedor = do_mes.groupby('vendedor')['valor'].sum()
+    de_hoje = do_mes[do_mes['dia'] == dia_hoje].groupby('vendedor')['valor'].sum()
+    chaves = _normalizar_nomes(df[vendas['chave']])
+    faturado = chaves.map(por_vendedor).fillna(0.0).to_numpy(dtype=float)
+    faturado_hoje = chaves.map(de_hoje).fillna(0.0).to_numpy(dtype=float)
+    meta = _valores(df[ConfigVendas.COLUNA_META])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        projetado = faturado / decorridos * total_dias if decorridos else faturado
+        falta_inicio_dia = np.maximum(meta - (faturado - faturado_hoje), 0.0)
+        meta_diaria = falta_inicio_dia / restantes if restantes else falta_inicio_dia
+        df = df.copy()
+        df['Faturado_mes'] = faturado.round(2)
+        df['Alcance'] = np.where(meta > 0, faturado / meta, 0.0)
+        df['falta_meta_mes'] = np.maximum(meta - faturado, 0.0).round(2)
+        df['Fat_Projetado'] = np.round(projetado, 2)
+        df['Pct_Projetado'] = np.where(meta > 0, projetado / meta, 0.0)
+        df['Meta_diaria'] = np.round(meta_diaria, 2)
+        df['META_BATIDA'] = np.where((meta > 0) & (faturado >= meta), 'SIM', 'NÃO')
+        # Sem nada a vender hoje, a meta do dia já está cumprida.
+        df['Falta_Meta_Dia'] = np.where(meta_diaria > 0, faturado_hoje / meta_diaria, 1.0)
+
+    sem_vendas = int((~chaves.isin(por_vendedor.index)).sum())
+    if sem_vendas:
+        logging.info(f"{sem_vendas} vendedores da planilha sem vendas no mês (coluna '{vendas['chave']}').")
+    return df
+
+def aplicar_vendas(df: pd.DataFrame, vendas, hoje: Optional[datetime.date] = None,
+                   totais: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """Atualiza o registro de vendas (só o que é novo) e recalcula as colunas de metas do DataFrame."""
+    with metricas.fase('vendas'):
+        if totais is None: totais = agregar_vendas(vendas)
+        return calcular_metas(df, totais, vendas, hoje)
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def _registro_sintetico(linhas: int, vendedores: int, hoje: datetime.date, semente: int) -> pd.DataFrame:
+    gerador = np.random.default_rng(semente)
+    dias = pd.Timestamp(hoje.replace(day=1)) + pd.to_timedelta(gerador.integers(0, hoje.day, linhas), unit='D')
+    return pd.DataFrame({'Vendedor': [f"VENDEDOR {i}" for i in gerador.integers(0, vendedores, linhas)],
+                         'Data': dias.strftime('%d/%m/%Y'),
+                         'Valor': gerador.uniform(10, 5_000, linhas).round(2)})
+
+def _benchmark(linhas: int):
+    import tempfile
+    hoje = datetime.date.today()
+    contatos = pd.DataFrame({'Nome': [f"Vendedor {i}" for i in range(500)], 'Meta': 150_000.0})
+    with tempfile.TemporaryDirectory() as pasta:
+        ConfigVendas.PASTA = Path(pasta) / 'estado'
+        registro = Path(pasta) / 'vendas.csv'
+        _registro_sintetico(linhas, len(contatos), hoje, 1).to_csv(registro, sep=';', index=False)
+        vendas = {'arquivo': str(registro)}
+        for rodada, acrescimo in (('carga inicial', 0), ('sem mudanças', 0), ('+1% de vendas', linhas // 100)):
+            if acrescimo:
+                _registro_sintetico(acrescimo, len(contatos), hoje, 2).to_csv(
+                    registro, sep=';', index=False, header=False, mode='a')
+            inicio = time.perf_counter()
+            resultado = aplicar_vendas(contatos, vendas, hoje)
+            print(f"{rodada:>14}: {time.perf_counter() - inicio:6.2f}s "
+                  f"(faturado total R$ {resultado['Faturado_mes'].sum():,.2f})")
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Calcula as colunas de metas a partir do registro de vendas.")
+    parser.add_argument('arquivo', nargs='?', help="Registro de vendas (padrão: \"vendas\" de campanhas.json).")
+    parser.add_argument('--config', default='campanhas.json', help="Arquivo de campanhas.")
+    parser.add_argument('--data', type=datetime.date.fromisoformat, default=None, help="Data de referência (AAAA-MM-DD).")
+    parser.add_argument('--refazer', action='store_true', help="Descarta os totais guardados e relê o registro inteiro.")
+    parser.add_argument('--sintetico', type=int, metavar='LINHAS', help="Mede carga inicial e atualização com um registro sintético.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.sintetico:
+        _benchmark(args.sintetico)
+        return
+    from motor_campanhas import carregar_configuracao, carregar_e_preparar_dados
+    planilha = carregar_configuracao(args.config)['planilha']
+    vendas = normalizar_config(args.arquivo or planilha.get('vendas') or {})
+    if args.refazer: agregar_vendas(vendas, refazer=True)
+    df = carregar_e_preparar_dados(planilha['arquivo'], planilha['aba'])
+    if df is None: return
+    df = aplicar_vendas(df, vendas, args.data)
+    with pd.option_context('display.max_rows', None, 'display.width', 200):
+        print(df[[vendas['chave'], ConfigVendas.COLUNA_META, *ConfigVendas.COLUNAS_CALCULADAS]].to_string(index=False))
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        print("\nCálculo interrompido pelo usuário.")
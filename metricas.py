@@ -0,0 +1,328 @@
+# =============================================================================
+# MÉTRICAS DE EXECUÇÃO
+# =============================================================================
+# Coleta, para cada execução das campanhas, o tempo de cada fase (carga da
+# planilha, preparo, deduplicação, renderização, envio, gravação do
+# histórico), um histograma de latência por tentativa de envio e contadores
+# de sucesso, falha e retentativa por campanha.
+#
+# Ao fim da execução tudo é exportado para a pasta de métricas:
+#   - autosender.prom: formato textfile do Prometheus (node_exporter
+#     --collector.textfile.directory), sobrescrito a cada execução;
+#   - execucao_AAAAMMDD_HHMMSS.json: resumo da execução.
+#
+# No backend http as esperas (limitador, retentativa) de tarefas concorrentes
+# se somam, então podem passar do tempo total da fase de envio.
+#
+# O coletor é global, como o logging: qualquer módulo registra com as funções
+# deste arquivo e a campanha em andamento vem de `campanha_atual()`. Quem roda
+# várias execuções ao mesmo tempo no mesmo processo (o serviço de controle)
+# isola cada uma com `coletor_proprio()`.
+#
+# Perfil opcional (AUTOSENDER_PERFIL ou --perfil): 'cprofile' grava as funções
+# mais custosas e 'tracemalloc' as linhas que mais alocam memória.
+# =============================================================================
+import bisect
+import contextlib
+import contextvars
+import datetime
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+# =============================================================================
+# CONFIGURAÇÕES DAS MÉTRICAS
+# =============================================================================
+class ConfigMetricas:
+    PASTA = Path(os.environ.get('AUTOSENDER_PASTA_METRICAS', 'metricas'))
+    ARQUIVO_PROMETHEUS = 'autosender.prom'
+    PERFIL = os.environ.get('AUTOSENDER_PERFIL', '')  # '', 'cprofile' ou 'tracemalloc'
+    LINHAS_PERFIL = 30
+    # Limites (segundos) dos baldes do histograma de latência de envio.
+    LIMITES_LATENCIA = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+_campanha = contextvars.ContextVar('campanha', default='')
+_coletor = contextvars.ContextVar('coletor', default=None)
+
+# =============================================================================
+# HISTOGRAMA
+# =============================================================================
+class Histograma:
+    """Histograma de baldes fixos, no mesmo formato cumulativo do Prometheus."""
+
+    def __init__(self, limites: Tuple[float, ...] = ConfigMetricas.LIMITES_LATENCIA):
+        self.limites = tuple(sorted(limites))
+        self.baldes = [0] * (len(self.limites) + 1)  # o último é o +Inf
+        self.soma = 0.0
+        self.total = 0
+
+    def observar(self, valor: float):
+        self.baldes[bisect.bisect_left(self.limites, valor)] += 1
+        self.soma += valor
+        self.total += 1
+
+    def cumulativo(self) -> List[Tuple[str, int]]:
+        acumulado, saida = 0, []
+        for limite, quantidade in zip([*map(str, self.limites), '+Inf'], self.baldes):
+            acumulado += quantidade
+            saida.append((limite, acumulado))
+        return saida
+
+    def percentil(self, p: float) -> Optional[float]:
+        """Estimativa pelo limite superior do balde em que cai o percentil `p` (0-100)."""
+        if not self.total: return None
+        alvo = self.total * p / 100
+        for limite, acumulado in self.cumulativo():
+            if acumulado >= alvo: return float(limite)
+        return float('inf')
+
+    def resumo(self) -> Dict:
+        return {'total': self.total, 'soma_segundos': round(self.soma, 4),
+                'media_segundos': round(self.soma / self.total, 4) if self.total else None,
+                'p50': self.percentil(50), 'p90': self.percentil(90), 'p99': self.percentil(99),
+                'baldes': dict(self.cumulativo())}
+
+# =============================================================================
+# COLETOR
+# =============================================================================
+class ColetorMetricas:
+    """Acumula as métricas de uma execução. Seguro para uso entre threads."""
+
+    def __init__(self):
+        self._trava = threading.Lock()
+        self.iniciar_execucao()
+
+    def iniciar_execucao(self):
+        with self._trava:
+            self.inicio = time.time()
+            self.fases: Dict[Tuple[str, str], List[float]] = {}       # (fase, campanha) -> [segundos, vezes]
+            self.latencias: Dict[str, Histograma] = {}
+            self.contadores: Dict[Tuple[str, str], int] = {}          # (métrica, campanha) -> valor
+            self.resultados: Dict[str, Dict[str, int]] = {}
+
+    def registrar_fase(self, fase: str, segundos: float, campanha: str = ''):
+        with self._trava:
+            acumulado = self.fases.setdefault((fase, campanha), [0.0, 0])
+            acumulado[0] += segundos
+            acumulado[1] += 1
+
+    def incrementar(self, metrica: str, campanha: str = '', quantidade: int = 1):
+        with self._trava:
+            self.contadores[(metrica, campanha)] = self.contadores.get((metrica, campanha), 0) + quantidade
+
+    def registrar_tentativa(self, latencia: float, sucesso: bool, tentativa: int = 1, campanha: Optional[str] = None):
+        campanha = _campanha.get() if campanha is None else campanha
+        with self._trava:
+            self.latencias.setdefault(campanha, Histograma()).observar(latencia)
+        self.incrementar('tentativas_sucesso' if sucesso else 'tentativas_falha', campanha)
+        if tentativa > 1: self.incrementar('retentativas', campanha)
+
+    def registrar_resultado(self, campanha: str, resultado: Dict[str, int]):
+        with self._trava:
+            self.resultados[campanha] = dict(resultado)
+
+    def vazao(self, campanha: str) -> float:
+        """Mensagens enviadas com sucesso por minuto durante a fase de envio da campanha."""
+        segundos = self.fases.get(('envio', campanha), [0.0, 0])[0]
+        sucessos = self.resultados.get(campanha, {}).get('sucessos', 0)
+        return sucessos / segundos * 60 if segundos else 0.0
+
+    def estado(self) -> Dict:
+        """Cópia simples (serializável) do que foi coletado, para juntar métricas de outros processos."""
+        with self._trava:
+            return {'fases': {chave: list(valor) for chave, valor in self.fases.items()},
+                    'latencias': {c: (h.limites, list(h.baldes), h.soma, h.total) for c, h in self.latencias.items()},
+                    'contadores': dict(self.contadores)}
+
+    def mesclar(self, estado: Dict, paralelo: bool = False):
+        """Soma ao coletor o `estado()` vindo de outro processo.
+
+        Com `paralelo`, o processo rodou junto com os demais: o tempo de cada fase passa a ser o
+        maior entre eles (tempo de relógio), e não a soma.
+        """
+        with self._trava:
+            for chave, (segundos, vezes) in estado['fases'].items():
+                acumulado = self.fases.setdefault(chave, [0.0, 0])
+                acumulado[0] = max(acumulado[0], segundos) if paralelo else acumulado[0] + segundos
+                acumulado[1] += vezes
+            for campanha, (limites, baldes, soma, total) in estado['latencias'].items():
+                histograma = self.latencias.setdefault(campanha, Histograma(limites))
+                histograma.baldes = [a + b for a, b in zip(histograma.baldes, baldes)]
+                histograma.soma += soma
+                histograma.total += total
+            for chave, valor in estado['contadores'].items():
+                self.contadores[chave] = self.contadores.get(chave, 0) + valor
+
+    # -------------------------------------------------------------------------
+    # Exportação
+    # -------------------------------------------------------------------------
+    def resumo(self) -> Dict:
+        campanhas = sorted({c for _, c in self.fases} | set(self.latencias) | set(self.resultados))
+        return {
+            'inicio': datetime.datetime.fromtimestamp(self.inicio).isoformat(timespec='seconds'),
+            'duracao_segundos': round(time.time() - self.inicio, 3),
+            'fases': [{'fase': fase, 'campanha': campanha or None, 'segundos': round(segundos, 4), 'vezes': vezes}
+                      for (fase, campanha), (segundos, vezes) in self.fases.items()],
+            'campanhas': {
+                campanha: {
+                    **self.resultados.get(campanha, {}),
+                    **{metrica: valor for (metrica, c), valor in self.contadores.items() if c == campanha},
+                    'vazao_msg_por_minuto': round(self.vazao(campanha), 2),
+                    'latencia_envio': self.latencias[campanha].resumo() if campanha in self.latencias else None,
+                } for campanha in campanhas if campanha
+            },
+        }
+
+    def texto_prometheus(self) -> str:
+        def rotulos(**valores) -> str:
+            pares = [f'{k}="{v}"' for k, v in valores.items() if v != '']
+            return '{' + ','.join(pares) + '}' if pares else ''
+
+        linhas = ['# HELP autosender_fase_segundos Tempo gasto em cada fase na última execução.',
+                  '# TYPE autosender_fase_segundos gauge']
+        linhas += [f'autosender_fase_segundos{rotulos(fase=fase, campanha=campanha)} {segundos:.6f}'
+                   for (fase, campanha), (segundos, _) in self.fases.items()]
+
+        linhas += ['# HELP autosender_envios Envios por campanha e resultado na última execução.',
+                   '# TYPE autosender_envios gauge']
+        for campanha, resultado in self.resultados.items():
+            for chave in ('sucessos', 'falhas', 'pulados', 'total'):
+                linhas.append(f'autosender_envios{rotulos(campanha=campanha, resultado=chave)} {resultado.get(chave, 0)}')
+
+        linhas += ['# HELP autosender_tentativas Tentativas de envio, retentativas incluídas.',
+                   '# TYPE autosender_tentativas gauge']
+        for (metrica, campanha), valor in self.contadores.items():
+            linhas.append(f'autosender_tentativas{rotulos(campanha=campanha, tipo=metrica)} {valor}')
+
+        linhas += ['# HELP autosender_vazao_msg_por_minuto Mensagens enviadas por minuto na fase de envio.',
+                   '# TYPE autosender_vazao_msg_por_minuto gauge']
+        linhas += [f'autosender_vazao_msg_por_minuto{rotulos(campanha=c)} {self.vazao(c):.3f}' for c in self.resultados]
+
+        linhas += ['# HELP autosender_latencia_envio_segundos Latência de cada tentativa de envio.',
+                   '# TYPE autosender_latencia_envio_segundos histogram']
+        for campanha, histograma in self.latencias.items():
+            for limite, acumulado in histograma.cumulativo():
+                linhas.append(f'autosender_latencia_envio_segundos_bucket{rotulos(campanha=campanha, le=limite)} {acumulado}')
+            linhas.append(f'autosender_latencia_envio_segundos_sum{rotulos(campanha=campanha)} {histograma.soma:.6f}')
+            linhas.append(f'autosender_latencia_envio_segundos_count{rotulos(campanha=campanha)} {histograma.total}')
+
+        linhas += ['# HELP autosender_ultima_execucao_timestamp_segundos Início da última execução (epoch).',
+                   '# TYPE autosender_ultima_execucao_timestamp_segundos gauge',
+                   f'autosender_ultima_execucao_timestamp_segundos {self.inicio:.0f}']
+        return '\n'.join(linhas) + '\n'
+
+    def exportar(self, pasta: Path = ConfigMetricas.PASTA, sufixo: str = '') -> Tuple[Path, Path]:
+        """Grava o textfile do Prometheus (troca atômica) e o resumo JSON da execução.
+
+        `sufixo` entra no nome do resumo: execuções que começam no mesmo segundo não se sobrescrevem.
+        """
+        pasta.mkdir(parents=True, exist_ok=True)
+        prometheus = pasta / ConfigMetricas.ARQUIVO_PROMETHEUS
+        # Temporário por thread: duas execuções do mesmo processo podem exportar ao mesmo tempo.
+        temporario = prometheus.with_suffix(f'.prom.{os.getpid()}.{threading.get_ident()}.tmp')
+        with open(temporario, 'w', encoding='utf-8') as f: f.write(self.texto_prometheus())
+        os.replace(temporario, prometheus)
+
+        resumo = pasta / f"execucao_{datetime.datetime.fromtimestamp(self.inicio):%Y%m%d_%H%M%S}{sufixo}.json"
+        with open(resumo, 'w', encoding='utf-8') as f:
+            json.dump(self.resumo(), f, ensure_ascii=False, indent=2)
+        logging.info(f"Métricas exportadas em {prometheus} e {resumo}")
+        return prometheus, resumo
+
+class _ColetorCorrente:
+    """Encaminha para o coletor de `coletor_proprio()` em vigor ou, fora de um, para o global."""
+
+    def __getattr__(self, nome: str):
+        return getattr(_coletor.get() or _coletor_global, nome)
+
+_coletor_global = ColetorMetricas()
+# Coletor da execução corrente.
+coletor = _ColetorCorrente()
+
+@contextlib.contextmanager
+def coletor_proprio() -> Iterator[ColetorMetricas]:
+    """Dá ao bloco (e às tarefas asyncio que ele criar) um coletor só seu, zerado.
+
+    Fora do bloco, e em outras threads, as métricas continuam indo para o coletor global.
+    """
+    proprio = ColetorMetricas()
+    token = _coletor.set(proprio)
+    try:
+        yield proprio
+    finally:
+        _coletor.reset(token)
+
+# =============================================================================
+# ATALHOS
+# =============================================================================
+@contextlib.contextmanager
+def fase(nome: str, campanha: Optional[str] = None) -> Iterator[None]:
+    """Mede o bloco como uma fase; repetições da mesma fase são somadas."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        coletor.registrar_fase(nome, time.perf_counter() - inicio, _campanha.get() if campanha is None else campanha)
+
+@contextlib.contextmanager
+def campanha_atual(nome: str) -> Iterator[None]:
+    """Associa às métricas registradas dentro do bloco o nome da campanha."""
+    token = _campanha.set(nome)
+    try:
+        yield
+    finally:
+        _campanha.reset(token)
+
+def campanha_em_andamento() -> str:
+    """Nome da campanha do bloco `campanha_atual()` em execução ('' fora de um)."""
+    return _campanha.get()
+
+def registrar_tentativa(latencia: float, sucesso: bool, tentativa: int = 1):
+    coletor.registrar_tentativa(latencia, sucesso, tentativa)
+
+# =============================================================================
+# PERFIL (CPROFILE / TRACEMALLOC)
+# =============================================================================
+@contextlib.contextmanager
+def perfilar(modo: Optional[str] = None, pasta: Path = ConfigMetricas.PASTA) -> Iterator[None]:
+    """Executa o bloco sob cProfile ou tracemalloc e grava os pontos quentes na pasta de métricas."""
+    modo = (modo if modo is not None else ConfigMetricas.PERFIL).lower()
+    if not modo:
+        yield
+        return
+    if modo not in ('cprofile', 'tracemalloc'):
+        raise ValueError(f"Perfil desconhecido '{modo}'. Opções: cprofile, tracemalloc")
+
+    pasta.mkdir(parents=True, exist_ok=True)
+    base = pasta / f"perfil_{modo}_{datetime.datetime.now():%Y%m%d_%H%M%S}"
+    if modo == 'cprofile':
+        import cProfile
+        import pstats
+        perfil = cProfile.Profile()
+        perfil.enable()
+        try:
+            yield
+        finally:
+            perfil.disable()
+            perfil.dump_stats(base.with_suffix('.prof'))
+            with open(base.with_suffix('.txt'), 'w', encoding='utf-8') as f:
+                pstats.Stats(perfil, stream=f).sort_stats('cumulative').print_stats(ConfigMetricas.LINHAS_PERFIL)
+            logging.info(f"Perfil cProfile gravado em {base.with_suffix('.prof')}")
+    else:
+        import tracemalloc
+        tracemalloc.start(10)
+        try:
+            yield
+        finally:
+            instantaneo = tracemalloc.take_snapshot()
+            atual, pico = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            with open(base.with_suffix('.txt'), 'w', encoding='utf-8') as f:
+                f.write(f"Memória atual: {atual / 2**20:.1f} MB; pico: {pico / 2**20:.1f} MB\n\n")
+                for estatistica in instantaneo.statistics('lineno')[:ConfigMetricas.LINHAS_PERFIL]:
+                    f.write(f"{estatistica}\n")
+            logging.info(f"Perfil tracemalloc gravado em {base.with_suffix('.txt')}")
@@ -0,0 +1,284 @@
+# =============================================================================
+# MONITOR DA PLANILHA (MODO SERVIÇO)
+# =============================================================================
+# Fica rodando e observa contatosvendedores.xlsx. A cada vez que a planilha é
+# salva, compara a nova versão com o último retrato processado e envia só o
+# que mudou: quem acabou de entrar no filtro de uma campanha (por exemplo,
+# META_BATIDA que virou 'SIM') recebe a mensagem em segundos, sem que o resto
+# da planilha seja replanejado.
+#
+#   python monitor_planilha.py                 # campanhas com "monitorar": true
+#   python monitor_planilha.py parabens        # só as informadas
+#
+# No Linux usa inotify (pacote opcional inotify_simple); sem ele, ou em outro
+# sistema, verifica o mtime do arquivo a cada ConfigMonitor.INTERVALO_POLLING.
+# O retrato fica em .cache/monitor, então reiniciar o serviço não reenvia
+# nada. Na primeira execução o retrato só é gravado (linha de base).
+#
+# Com "vendas" na planilha (metas_vendas.py), o registro de vendas também é
+# observado: a venda que faz a META_BATIDA virar 'SIM' dispara os parabéns.
+# =============================================================================
+import argparse
+import hashlib
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import pandas as pd
+
+import metricas
+from limitador import criar_limitador
+from motor_campanhas import (ConfigMotor, Despachante, carregar_configuracao, carregar_e_preparar_dados,
+                             configurar_logging, enfileirar_campanha, enviar_pendentes, filtrar_campanha,
+                             processar_outbox, relatar_campanhas, selecionar_campanhas)
+from outbox import abrir_outbox
+from remetentes import carregar_remetentes
+from transporte import criar_transporte
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# =============================================================================
+# CONFIGURAÇÕES DO MONITOR
+# =============================================================================
+class ConfigMonitor:
+    PASTA_RETRATOS = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'monitor'
+    INTERVALO_POLLING = float(os.environ.get('AUTOSENDER_INTERVALO_POLLING', '2'))
+    # O Excel grava em um temporário e renomeia; espera o arquivo parar de mudar antes de ler.
+    ESPERA_ESTABILIZAR = 1.0
+    COLUNA_CHAVE = 'Telefone_Formatado'
+
+# =============================================================================
+# OBSERVAÇÃO DO ARQUIVO
+# =============================================================================
+def _assinatura(caminho: Path):
+    try:
+        if caminho.is_dir():
+            # Pasta (registro de vendas em vários arquivos): muda quando qualquer arquivo dela muda.
+            return tuple(sorted((item.name, item.stat().st_mtime_ns, item.stat().st_size) for item in caminho.iterdir()))
+        estado = caminho.stat()
+        return estado.st_mtime_ns, estado.st_size
+    except FileNotFoundError:
+        return None
+
+def _assinaturas(caminhos: List[Path]):
+    assinaturas = [_assinatura(caminho) for caminho in caminhos]
+    return None if None in assinaturas else tuple(assinaturas)
+
+def _aguardar_estabilizar(caminhos: List[Path]):
+    """Espera mtime e tamanho ficarem parados por ESPERA_ESTABILIZAR segundos."""
+    anterior = _assinaturas(caminhos)
+    while True:
+        time.sleep(ConfigMonitor.ESPERA_ESTABILIZAR)
+        atual = _assinaturas(caminhos)
+        if atual == anterior and atual is not None: return
+        anterior = atual
+
+def _eventos_inotify(caminhos: List[Path]) -> Iterator[None]:
+    flags = inotify_simple.flags
+    with inotify_simple.INotify() as inotify:
+        # Observa a pasta, não o arquivo: salvar pelo Excel troca o arquivo (renomeia por cima).
+        # Uma pasta observada por inteiro (registro de vendas) fica com None: qualquer arquivo conta.
+        nomes: Dict[int, Optional[set]] = {}
+        for caminho in caminhos:
+            pasta = caminho if caminho.is_dir() else caminho.parent
+            descritor = inotify.add_watch(str(pasta), flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE)
+            if caminho.is_dir() or nomes.get(descritor, set()) is None:
+                nomes[descritor] = None
+            else:
+                nomes.setdefault(descritor, set()).add(caminho.name)
+        while True:
+            eventos = inotify.read()
+            if any(nomes.get(evento.wd) is None or evento.name in nomes[evento.wd] for evento in eventos):
+                yield
+
+def _eventos_polling(caminhos: List[Path]) -> Iterator[None]:
+    anterior = _assinaturas(caminhos)
+    while True:
+        time.sleep(ConfigMonitor.INTERVALO_POLLING)
+        atual = _assinaturas(caminhos)
+        if atual != anterior and atual is not None:
+            anterior = atual
+            yield
+
+def observar(caminhos: List[str], polling: bool = False) -> Iterator[None]:
+    """Gera um evento a cada gravação completa de qualquer um dos arquivos."""
+    caminhos = [Path(caminho).resolve() for caminho in caminhos]
+    descricao = ', '.join(str(caminho) for caminho in caminhos)
+    if inotify_simple is not None and not polling:
+        logging.info(f"Observando {descricao} via inotify.")
+        eventos = _eventos_inotify(caminhos)
+    else:
+        logging.info(f"Observando {descricao} por polling a cada {ConfigMonitor.INTERVALO_POLLING}s.")
+        eventos = _eventos_polling(caminhos)
+    for _ in eventos:
+        _aguardar_estabilizar(caminhos)
+        yield
+
+# =============================================================================
+# RETRATO E DIFERENÇAS
+# =============================================================================
+def _caminho_retrato(caminho_excel: str, nome_aba: str) -> Path:
+    prefixo = hashlib.sha1(f"{Path(caminho_excel).resolve()}|{nome_aba}".encode('utf-8')).hexdigest()[:16]
+    return ConfigMonitor.PASTA_RETRATOS / f"{prefixo}.pkl"
+
+def ler_retrato(caminho_excel: str, nome_aba: str) -> Optional[pd.DataFrame]:
+    try:
+        return pd.read_pickle(_caminho_retrato(caminho_excel, nome_aba))
+    except (FileNotFoundError, EOFError):
+        return None
+    except Exception as e:
+        logging.warning(f"Retrato da planilha ilegível, será refeito: {e}")
+        return None
+
+def gravar_retrato(caminho_excel: str, nome_aba: str, df: pd.DataFrame):
+    destino = _caminho_retrato(caminho_excel, nome_aba)
+    destino.parent.mkdir(parents=True, exist_ok=True)
+    temporario = destino.with_suffix('.tmp')
+    df.to_pickle(temporario)
+    os.replace(temporario, destino)
+
+def entraram_na_campanha(anterior: pd.DataFrame, atual: pd.DataFrame, campanha: Dict) -> pd.DataFrame:
+    """Linhas de `atual` que passam no filtro da campanha e não passavam em `anterior`.
+
+    Cobre contatos novos e contatos cuja coluna do filtro mudou (META_BATIDA 'NÃO' -> 'SIM').
+    """
+    chave = ConfigMonitor.COLUNA_CHAVE
+    antes = filtrar_campanha(anterior, campanha)[chave]
+    agora = filtrar_campanha(atual, campanha)
+    return agora[~agora[chave].isin(antes)]
+
+def resumir_diferencas(anterior: pd.DataFrame, atual: pd.DataFrame) -> Dict[str, int]:
+    """Contagem de contatos incluídos, removidos e alterados entre duas versões da planilha."""
+    chave = ConfigMonitor.COLUNA_CHAVE
+    antes = anterior.drop_duplicates(chave).set_index(chave)
+    agora = atual.drop_duplicates(chave).set_index(chave)
+    comuns = antes.index.intersection(agora.index)
+    colunas = antes.columns.intersection(agora.columns)
+    a, b = antes.loc[comuns, colunas], agora.loc[comuns, colunas]
+    # Duas células vazias contam como iguais.
+    alterados = ((a != b) & ~(a.isna() & b.isna())).any(axis=1).sum()
+    return {'incluidos': len(agora.index.difference(antes.index)),
+            'removidos': len(antes.index.difference(agora.index)),
+            'alterados': int(alterados)}
+
+# =============================================================================
+# SERVIÇO
+# =============================================================================
+class Monitor:
+    """Mantém o transporte aberto e processa cada nova versão da planilha."""
+
+    def __init__(self, configuracao: Dict, campanhas: List[Dict]):
+        self.configuracao = configuracao
+        self.campanhas = campanhas
+        self.planilha = configuracao['planilha']
+        self.remetentes = carregar_remetentes(configuracao)
+        self.despachante: Optional[Despachante] = None
+
+    def __enter__(self):
+        # Sem remetentes, o transporte (ex.: o navegador da sessão web) fica aberto entre uma gravação e outra.
+        if not self.remetentes:
+            transporte = criar_transporte(**self.configuracao['transporte']).__enter__()
+            self.despachante = Despachante(transporte, criar_limitador(transporte.nome))
+        return self
+
+    def __exit__(self, *exc):
+        if self.despachante is not None:
+            self.despachante.transporte.__exit__(*exc)
+
+    def processar(self) -> Dict[str, Dict[str, int]]:
+        """Lê a versão atual, envia as diferenças para o último retrato e grava o novo retrato."""
+        arquivo, aba = self.planilha['arquivo'], self.planilha['aba']
+        atual = carregar_e_preparar_dados(arquivo, aba, self.planilha.get('vendas'))
+        if atual is None: return {}
+        anterior = ler_retrato(arquivo, aba)
+        if anterior is None:
+            gravar_retrato(arquivo, aba, atual)
+            logging.info(f"Linha de base gravada: {len(atual)} contatos. Próximas gravações enviam só as diferenças.")
+            return {}
+
+        diferencas = resumir_diferencas(anterior, atual)
+        logging.info(f"Planilha alterada: {diferencas['incluidos']} incluídos, {diferencas['removidos']} removidos, "
+                     f"{diferencas['alterados']} alterados.")
+        metricas.coletor.iniciar_execucao()
+        resultados = {}
+        with abrir_outbox() as outbox:
+            nomes_remetentes = [r['nome'] for r in self.remetentes]
+            for campanha in self.campanhas:
+                delta = entraram_na_campanha(anterior, atual, campanha)
+                if delta.empty: continue
+                logging.info(f"Campanha '{campanha['nome']}': {len(delta)} contatos entraram no filtro.")
+                with metricas.campanha_atual(campanha['nome']):
+                    resultados[campanha['nome']] = enfileirar_campanha(delta, campanha, outbox, nomes_remetentes)
+            if resultados:
+                ativas = [c for c in self.campanhas if c['nome'] in resultados]
+                if self.despachante is None:
+                    enviados, vazao = enviar_pendentes(self.configuracao, ativas, outbox)
+                else:
+                    enviados = processar_outbox(outbox, self.despachante, ativas, agrupar=self.configuracao['agrupar'])
+                    vazao = self.despachante.limitador.vazao()
+                for nome, (sucessos, falhas) in enviados.items():
+                    resultados[nome]['sucessos'] += sucessos
+                    resultados[nome]['falhas'] += falhas
+                relatar_campanhas(ativas, resultados, vazao)
+
+        # Só avança o retrato depois de enfileirar: se o processo cair antes, a diferença é recalculada.
+        gravar_retrato(arquivo, aba, atual)
+        try:
+            metricas.coletor.exportar()
+        except OSError as e:
+            logging.error(f"Não foi possível exportar as métricas: {e}")
+        return resultados
+
+def arquivos_observados(planilha: Dict) -> List[str]:
+    """A planilha e, quando as metas vêm do registro de vendas, também o registro (arquivo ou pasta)."""
+    arquivos = [planilha['arquivo']]
+    if planilha.get('vendas'):
+        from metas_vendas import normalizar_config
+        arquivos.append(normalizar_config(planilha['vendas'])['arquivo'])
+    return arquivos
+
+def monitorar(nomes: Optional[List[str]] = None, caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS,
+              polling: bool = False):
+    configuracao = carregar_configuracao(caminho_config)
+    campanhas = selecionar_campanhas(configuracao, nomes)
+    if not nomes: campanhas = [c for c in campanhas if c.get('monitorar')]
+    if not campanhas:
+        raise ValueError("Nenhuma campanha para monitorar: informe os nomes ou marque \"monitorar\": true.")
+    print(f"👀 Monitorando {configuracao['planilha']['arquivo']} para: {', '.join(c['nome'] for c in campanhas)}")
+
+    with Monitor(configuracao, campanhas) as monitor:
+        # Processa já na partida: alterações feitas com o serviço parado também contam.
+        monitor.processar()
+        for _ in observar(arquivos_observados(configuracao['planilha']), polling):
+            try:
+                monitor.processar()
+            except Exception as e:
+                logging.error(f"Erro ao processar a nova versão da planilha: {e}", exc_info=True)
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Observa a planilha e envia só o que mudou a cada gravação.")
+    parser.add_argument('campanhas', nargs='*', help="Campanhas a monitorar (padrão: as marcadas com \"monitorar\").")
+    parser.add_argument('--config', default=ConfigMotor.ARQUIVO_CAMPANHAS, help="Arquivo de campanhas.")
+    parser.add_argument('--polling', action='store_true', help="Verifica o mtime periodicamente em vez de usar inotify.")
+    args = parser.parse_args(argv)
+
+    configurar_logging('monitor')
+    logging.info("=== INÍCIO DO MONITOR DA PLANILHA ===")
+    monitorar(args.campanhas, args.config, args.polling)
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.warning("Monitor interrompido pelo usuário.")
+        print("\nMonitor encerrado.")
+    except Exception as e:
+        logging.critical(f"Erro fatal não tratado no monitor: {e}", exc_info=True)
@@ -0,0 +1,825 @@
+# =============================================================================
+# MOTOR DE CAMPANHAS
+# =============================================================================
+# Lê e prepara a planilha uma única vez e executa, no mesmo processo, todas as
+# campanhas declaradas em campanhas.json (relatório completo, parabéns para
+# META_BATIDA == 'SIM', lembretes para 'NÃO'...). Todas compartilham o mesmo
+# despachante, ou seja, o mesmo transporte e o mesmo limitador de taxa.
+#
+#   python motor_campanhas.py                      # todas as campanhas
+#   python motor_campanhas.py parabens lembretes   # só as informadas
+#   python motor_campanhas.py --so-planejar        # só grava no outbox
+#   python motor_campanhas.py --trabalhador        # só envia o que está no outbox
+#   python motor_campanhas.py --listar             # ensaio: campanhas e outbox, sem enviar
+#
+# O planejamento grava todas as mensagens no outbox (outbox.py) antes do
+# primeiro envio; após uma interrupção, o trabalhador retoma de onde parou.
+#
+# Os scripts EnviarMensagemVendedores.py, EnviarParabens.py e
+# EnviarLembreteMeta.py continuam existindo e executam uma campanha cada.
+#
+# pandas, tqdm e os módulos que dependem deles só são importados quando uma
+# campanha é de fato carregada: o --help e o --listar respondem na hora.
+# =============================================================================
+from __future__ import annotations
+
+import argparse
+import datetime
+import json
+import logging
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Set, Tuple
+
+import metricas
+from agendador import Agendador
+from historico_db import ConfigHistorico, HistoricoEnvios, abrir_historico
+from limitador import LimitadorAdaptativo, criar_limitador
+from log_estruturado import configurar_logging, encaminhar_logs, evento, fila_logs
+from outbox import ConfigOutbox, ItemOutbox, Outbox, abrir_outbox, identificar_trabalhador
+from remetentes import atribuir_remetente, atribuir_remetentes, carregar_remetentes
+from transporte import Transporte, criar_transporte, erro_transitorio, pausa_retentativa
+
+if TYPE_CHECKING:
+    import pandas as pd
+    from tqdm import tqdm
+
+# =============================================================================
+# CONFIGURAÇÕES DO MOTOR
+# =============================================================================
+class ConfigMotor:
+    ARQUIVO_CAMPANHAS = 'campanhas.json'
+    ARQUIVO_EXCEL = 'contatosvendedores.xlsx'
+    NOME_DA_ABA = 'basededados'
+    COLUNAS_BASE = ['Nome', 'Telefone']
+    # Colunas exigidas por cada tipo de campanha, além das colunas base.
+    COLUNAS_POR_TIPO = {
+        'relatorio': ['Faturado_mes', 'Meta', 'Alcance', 'falta_meta_mes', 'Fat_Projetado', 'Pct_Projetado',
+                      'Meta_diaria'],
+        'parabens': ['META_BATIDA'],
+        'lembrete': ['META_BATIDA', 'Falta_Meta_Dia'],
+    }
+    # Tentativas de envio de cada mensagem quando a campanha não define "tentativas".
+    TENTATIVAS = 3
+    # Agrupamento ("agrupar" em campanhas.json): mensagens de campanhas diferentes ao mesmo telefone,
+    # planejadas com até esta distância entre si, saem em um único envio.
+    JANELA_AGRUPAMENTO_MINUTOS = 60
+    SEPARADOR_SECOES = '\n\n━━━━━━━━━━━━━━━\n\n'
+    # Colunas desenhadas no cartão de desempenho ("cartao": true na campanha).
+    COLUNAS_CARTAO = ['Faturado_mes', 'Meta', 'Fat_Projetado']
+
+# Um item pendente de envio: (telefone, mensagem, nome)
+ItemEnvio = Tuple[str, str, str]
+
+# =============================================================================
+# CONFIGURAÇÃO DAS CAMPANHAS
+# =============================================================================
+def carregar_configuracao(caminho: str = ConfigMotor.ARQUIVO_CAMPANHAS) -> Dict:
+    """Lê campanhas.json, preenchendo a planilha padrão quando omitida."""
+    with open(caminho, 'r', encoding='utf-8') as f:
+        configuracao = json.load(f)
+    planilha = configuracao.setdefault('planilha', {})
+    planilha.setdefault('arquivo', ConfigMotor.ARQUIVO_EXCEL)
+    planilha.setdefault('aba', ConfigMotor.NOME_DA_ABA)
+    configuracao.setdefault('transporte', {})
+    configuracao.setdefault('agrupar', {})
+    for campanha in configuracao.get('campanhas', []):
+        if campanha.get('tipo') not in ConfigMotor.COLUNAS_POR_TIPO:
+            raise ValueError(f"Campanha '{campanha.get('nome')}' tem tipo desconhecido: {campanha.get('tipo')}")
+        campanha.setdefault('tentativas', ConfigMotor.TENTATIVAS)
+        campanha.setdefault('filtro', {})
+        campanha.setdefault('cartao', False)
+    return configuracao
+
+def selecionar_campanhas(configuracao: Dict, nomes: Optional[List[str]] = None) -> List[Dict]:
+    campanhas = configuracao.get('campanhas', [])
+    if not nomes: return campanhas
+    desconhecidas = set(nomes) - {c['nome'] for c in campanhas}
+    if desconhecidas:
+        raise ValueError(f"Campanhas não declaradas em {ConfigMotor.ARQUIVO_CAMPANHAS}: {', '.join(sorted(desconhecidas))}")
+    return [c for c in campanhas if c['nome'] in nomes]
+
+# =============================================================================
+# CARGA E PREPARAÇÃO DA PLANILHA
+# =============================================================================
+def validar_arquivo_existe(caminho: str) -> bool:
+    """Verifica se um arquivo existe antes de tentar abri-lo."""
+    if not Path(caminho).exists():
+        logging.error(f"Arquivo não encontrado: {caminho}")
+        return False
+    return True
+
+def validar_colunas(df: pd.DataFrame, colunas: List[str]) -> bool:
+    """Valida se todas as colunas necessárias existem na planilha."""
+    for coluna in colunas:
+        if coluna not in df.columns:
+            raise ValueError(f"Coluna obrigatória '{coluna}' não encontrada na planilha")
+    return True
+
+def preparar_contatos(df: pd.DataFrame) -> pd.DataFrame:
+    """Descarta linhas sem nome/telefone e deriva Telefone_Formatado e primeiro_nome.
+
+    Telefones inválidos ficam com Telefone_Formatado vazio e o motivo em motivo_telefone;
+    `separar_rejeitados` os tira antes do planejamento.
+    """
+    from telefones import normalizar_telefones
+    df = df.dropna(subset=ConfigMotor.COLUNAS_BASE).copy()
+    normalizados = normalizar_telefones(df['Telefone'])
+    df['Telefone_Formatado'] = normalizados['telefone']
+    df['motivo_telefone'] = normalizados['motivo']
+    df['primeiro_nome'] = df['Nome'].str.split().str[0].str.title()
+    return df
+
+def separar_rejeitados(df: pd.DataFrame) -> pd.DataFrame:
+    """Grava as linhas com telefone inválido no relatório de rejeitados e devolve só as válidas."""
+    invalidos = df['Telefone_Formatado'].isna()
+    if not invalidos.any(): return df
+    from telefones import contar_motivos, registrar_rejeitados
+    rejeitados = df[invalidos]
+    try:
+        arquivo = registrar_rejeitados(rejeitados)
+        logging.warning(f"{len(rejeitados)} telefones inválidos fora do envio ({contar_motivos(rejeitados['motivo_telefone'])}). "
+                        f"Relatório: {arquivo}")
+    except OSError as e:
+        logging.error(f"{len(rejeitados)} telefones inválidos; não foi possível gravar o relatório: {e}")
+    return df[~invalidos]
+
+def ler_e_preparar_planilha(caminho_excel: str, nome_aba: str) -> pd.DataFrame:
+    """Lê a planilha com o pandas e aplica a preparação comum a todas as campanhas."""
+    import pandas as pd
+    with metricas.fase('leitura_planilha'):
+        df = pd.read_excel(caminho_excel, sheet_name=nome_aba)
+    logging.info(f"Planilha carregada: {len(df)} registros da aba '{nome_aba}'")
+    validar_colunas(df, ConfigMotor.COLUNAS_BASE)
+    with metricas.fase('preparo'):
+        return preparar_contatos(df)
+
+def carregar_e_preparar_dados(caminho_excel: str, nome_aba: str, vendas: Optional[Dict] = None) -> Optional[pd.DataFrame]:
+    """Carrega, valida e prepara os dados da planilha (uma vez para todas as campanhas).
+
+    Com `vendas` ("vendas" da planilha em campanhas.json), as colunas de metas são calculadas
+    a partir do registro de vendas em vez de lidas da planilha.
+    """
+    try:
+        if not validar_arquivo_existe(caminho_excel): return None
+        from cache_planilha import carregar_com_cache
+
+        with metricas.fase('carga'):
+            df = carregar_com_cache(caminho_excel, nome_aba, lambda: ler_e_preparar_planilha(caminho_excel, nome_aba))
+        df = separar_rejeitados(df)
+        if vendas:
+            from metas_vendas import aplicar_vendas
+            df = aplicar_vendas(df, vendas)
+
+        logging.info(f"Dados preparados: {len(df)} registros válidos para processamento")
+        return df
+    except Exception as e:
+        logging.error(f"Erro ao carregar e preparar dados: {e}")
+        return None
+
+def filtrar_campanha(df: pd.DataFrame, campanha: Dict) -> pd.DataFrame:
+    """Aplica o filtro da campanha (coluna -> valor, sem diferenciar maiúsculas)."""
+    import pandas as pd
+    mascara = pd.Series(True, index=df.index)
+    for coluna, valor in campanha['filtro'].items():
+        mascara &= df[coluna].astype(str).str.upper() == str(valor).upper()
+    return df[mascara]
+
+# =============================================================================
+# MONTAGEM DAS MENSAGENS
+# =============================================================================
+# A renderização é feita em lote, coluna a coluna, por renderizacao.py.
+def carregar_template(campanha: Dict) -> Optional[str]:
+    """Lê o template da campanha; campanhas sem template usam o texto padrão do tipo."""
+    arquivo = campanha.get('template')
+    if not arquivo: return None
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        return f.read()
+
+def compor_mensagem(secoes: List[Tuple[str, str]], separador: str = ConfigMotor.SEPARADOR_SECOES) -> str:
+    """Junta as mensagens de várias campanhas em uma só, cada uma sob o título da sua campanha."""
+    return separador.join(f"*{titulo}*\n\n{mensagem}" for titulo, mensagem in secoes)
+
+def agrupar_por_telefone(itens: List[ItemOutbox], janela: float) -> List[List[ItemOutbox]]:
+    """Agrupa itens (ordenados por telefone) do mesmo telefone planejados a até `janela` segundos do primeiro."""
+    grupos: List[List[ItemOutbox]] = []
+    for item in sorted(itens, key=lambda i: (i.telefone, i.criado_em or 0.0, i.id)):
+        grupo = grupos[-1] if grupos else None
+        if (grupo and grupo[0].telefone == item.telefone
+                and (item.criado_em or 0.0) - (grupo[0].criado_em or 0.0) <= janela):
+            grupo.append(item)
+        else:
+            grupos.append([item])
+    return grupos
+
+# =============================================================================
+# DESPACHANTE
+# =============================================================================
+class Despachante:
+    """Envia os lotes de todas as campanhas pelo mesmo transporte e limitador."""
+
+    def __init__(self, transporte: Transporte, limitador: LimitadorAdaptativo):
+        self.transporte = transporte
+        self.limitador = limitador
+
+    def despachar(self, campanha: Dict, pendentes: List[ItemEnvio], historico: Optional[HistoricoEnvios],
+                  ao_concluir_item: Optional[Callable[[int, bool, Optional[Exception]], None]] = None,
+                  barra: Optional[tqdm] = None, anexos: Optional[List[Optional[str]]] = None) -> Tuple[int, int]:
+        """Envia os itens pendentes, registrando cada sucesso no histórico. Retorna (sucessos, falhas).
+
+        `ao_concluir_item` é chamado depois do histórico, item a item; `barra` permite
+        compartilhar uma barra de progresso entre vários lotes. Sem `historico`, quem registra
+        o envio é o `ao_concluir_item` (envios agrupados, um histórico por campanha).
+        `anexos` traz a imagem de cada item (ou None), na mesma ordem.
+        """
+        sucessos, falhas = 0, 0
+        barra_propria = barra is None
+        if barra_propria:
+            from tqdm import tqdm
+            barra = tqdm(total=len(pendentes), desc=f"Enviando {campanha['nome']}", unit="msg")
+
+        def ao_concluir(indice: int, sucesso: bool, erro: Optional[Exception]):
+            nonlocal sucessos, falhas
+            telefone, _, nome = pendentes[indice]
+            if sucesso:
+                if historico is not None:
+                    with metricas.fase('historico'): historico.registrar(telefone, nome)
+                logging.info(f"SUCESSO [{campanha['nome']}]: {nome} ({telefone})")
+                sucessos += 1
+            else:
+                logging.error(f"FALHA [{campanha['nome']}]: {nome} ({telefone}): {erro}")
+                falhas += 1
+            if ao_concluir_item: ao_concluir_item(indice, sucesso, erro)
+            barra.update(1)
+
+        self.transporte.enviar_lote([(telefone, mensagem) for telefone, mensagem, _ in pendentes],
+                                    ao_concluir=ao_concluir, tentativas=campanha['tentativas'],
+                                    limitador=self.limitador, anexos=anexos)
+        if barra_propria: barra.close()
+        return sucessos, falhas
+
+def registrar_falha_outbox(outbox: Outbox, item: ItemOutbox, dono: str, erro: Optional[Exception],
+                          pausa: Optional[float] = None) -> bool:
+    """Reagenda o item se a falha for transitória e ainda restarem tentativas; senão marca a falha.
+
+    Retorna True se o item voltou para a fila (a falha ainda não é definitiva).
+    """
+    tentativa = item.tentativa_atual + 1
+    if not (erro_transitorio(erro) and tentativa < item.tentativas):
+        outbox.marcar_falha(item.id, dono, str(erro))
+        evento('falha', logging.ERROR, telefone=item.telefone, campanha=item.campanha, tentativa=tentativa,
+               erro=str(erro))
+        return False
+    pausa = pausa_retentativa(tentativa) if pausa is None else pausa
+    outbox.reagendar(item.id, dono, pausa, str(erro))
+    metricas.coletor.incrementar('retentativas_agendadas', item.campanha)
+    evento('reagendado', logging.WARNING, telefone=item.telefone, campanha=item.campanha, tentativa=tentativa,
+           pausa_s=round(pausa, 1))
+    logging.warning(f"REAGENDADO [{item.campanha}]: {item.nome} ({item.telefone}) em {pausa:.0f}s, "
+                    f"tentativa {tentativa + 1} de {item.tentativas}.")
+    return True
+
+def _aguardar_retentativa(outbox: Outbox, campanhas: List[str], remetente: Optional[str]) -> bool:
+    """Dorme até a próxima retentativa agendada. Retorna False se não houver nenhuma."""
+    proxima = outbox.proxima_retentativa(campanhas, remetente)
+    if proxima is None: return False
+    with metricas.fase('espera_retentativa'): time.sleep(max(0.0, proxima - time.time()))
+    return True
+
+def processar_outbox(outbox: Outbox, despachante: Despachante, campanhas: List[Dict],
+                     dono: Optional[str] = None, remetente: Optional[str] = None,
+                     agrupar: Optional[Dict] = None, agendador: Optional[Agendador] = None) -> Dict[str, Tuple[int, int]]:
+    """Envia o que estiver pendente no outbox para as campanhas informadas, lote a lote.
+
+    Cada item é marcado como enviado ou com falha assim que termina; se o processo cair,
+    os itens em posse dele voltam à fila quando o lease vencer. Uma falha transitória é
+    reagendada com espera exponencial e retentada depois do resto da fila, sem segurar os
+    demais envios. Com `remetente`, só os itens atribuídos a essa conta são enviados. Com
+    `agrupar` ativo, as mensagens de campanhas diferentes ao mesmo telefone saem juntas.
+    As campanhas são enviadas na ordem dada; com `agendador`, a previsão de término é
+    refeita durante o envio. Retorna {campanha: (sucessos, falhas)}.
+    """
+    from tqdm import tqdm
+    dono = dono or identificar_trabalhador()
+    if agrupar and agrupar.get('ativo') and len(campanhas) > 1:
+        return processar_outbox_agrupado(outbox, despachante, campanhas, agrupar, dono, remetente, agendador)
+    barras: Dict[str, tqdm] = {}
+    for campanha in campanhas:
+        pendentes_fila = outbox.contagem(campanha['nome'], remetente)
+        total = pendentes_fila.get('PENDENTE', 0) + pendentes_fila.get('EM_ENVIO', 0)
+        if total:
+            barras[campanha['nome']] = tqdm(total=total, unit="msg", desc=f"Enviando {campanha['nome']}" +
+                                            (f" [{remetente}]" if remetente else ''))
+    ativas = [campanha for campanha in campanhas if campanha['nome'] in barras]
+    contagens = {campanha['nome']: [0, 0] for campanha in ativas}
+    historicos = {campanha['nome']: abrir_historico(campanha['nome'], dias_manter=None) for campanha in ativas}
+    try:
+        # Cada volta envia o que está disponível em todas as campanhas; as retentativas ficam para o fim.
+        while ativas:
+            for campanha in ativas:
+                nome_campanha = campanha['nome']
+                with metricas.campanha_atual(nome_campanha), metricas.fase('envio'):
+                    while True:
+                        lote = outbox.reivindicar(dono, campanha=nome_campanha, remetente=remetente)
+                        if not lote: break
+                        ultima_renovacao = time.monotonic()
+
+                        def ao_concluir_item(indice: int, sucesso: bool, erro: Optional[Exception], lote=lote,
+                                             contagem=contagens[nome_campanha], barra=barras[nome_campanha]):
+                            nonlocal ultima_renovacao
+                            if sucesso:
+                                outbox.marcar_enviado(lote[indice].id, dono)
+                                contagem[0] += 1
+                            elif registrar_falha_outbox(outbox, lote[indice], dono, erro):
+                                barra.total += 1   # a retentativa vai avançar a barra outra vez
+                            else:
+                                contagem[1] += 1
+                            # Envios lentos (pywhatkit) podem levar mais que um lease para esvaziar o lote.
+                            if time.monotonic() - ultima_renovacao > ConfigOutbox.DURACAO_LEASE / 3:
+                                outbox.renovar_lease(dono)
+                                ultima_renovacao = time.monotonic()
+
+                        # Uma tentativa por reivindicação: quem falha volta para a fila com espera.
+                        despachante.despachar(dict(campanha, tentativas=1),
+                                              [(item.telefone, item.mensagem, item.nome) for item in lote],
+                                              historicos[nome_campanha], ao_concluir_item=ao_concluir_item,
+                                              barra=barras[nome_campanha], anexos=[item.anexo for item in lote])
+                        if agendador: agendador.acompanhar(outbox, despachante.limitador, despachante.transporte)
+            if not _aguardar_retentativa(outbox, list(contagens), remetente): break
+    finally:
+        # Encerramento limpo no meio de um lote (Ctrl+C): o que não foi enviado volta para a fila.
+        outbox.liberar(dono)
+        for barra in barras.values(): barra.close()
+        for historico in historicos.values(): historico.fechar()
+    return {nome: tuple(valores) for nome, valores in contagens.items()}
+
+def processar_outbox_agrupado(outbox: Outbox, despachante: Despachante, campanhas: List[Dict], agrupar: Dict,
+                              dono: str, remetente: Optional[str] = None,
+                              agendador: Optional[Agendador] = None) -> Dict[str, Tuple[int, int]]:
+    """Como processar_outbox, mas um envio por telefone com as mensagens de todas as campanhas dele.
+
+    O histórico e o outbox continuam por campanha: cada item do grupo é registrado no histórico
+    da sua campanha e marcado no outbox quando o envio composto termina. Os itens de um grupo
+    que falhou são reagendados para o mesmo instante, para voltarem juntos.
+    """
+    from tqdm import tqdm
+    por_nome = {campanha['nome']: campanha for campanha in campanhas}
+    janela = agrupar.get('janela_minutos', ConfigMotor.JANELA_AGRUPAMENTO_MINUTOS) * 60
+    separador = agrupar.get('separador', ConfigMotor.SEPARADOR_SECOES)
+    total = 0
+    for nome in por_nome:
+        contagem = outbox.contagem(nome, remetente)
+        total += contagem.get('PENDENTE', 0) + contagem.get('EM_ENVIO', 0)
+    if not total: return {}
+
+    contagens = {nome: [0, 0] for nome in por_nome}
+    historicos = {nome: abrir_historico(nome, dias_manter=None) for nome in por_nome}
+    barra = tqdm(total=total, unit="msg", desc="Enviando agrupado" + (f" [{remetente}]" if remetente else ''))
+    try:
+        while True:
+            with metricas.campanha_atual('agrupado'), metricas.fase('envio'):
+                lote = outbox.reivindicar_por_telefone(dono, list(por_nome), remetente=remetente)
+            if not lote:
+                if _aguardar_retentativa(outbox, list(por_nome), remetente): continue
+                break
+            grupos = agrupar_por_telefone(lote, janela)
+            pendentes = []
+            # Um envio leva no máximo uma imagem: a do primeiro item do grupo que tiver cartão.
+            anexos = [next((item.anexo for item in grupo if item.anexo), None) for grupo in grupos]
+            for grupo in grupos:
+                if len(grupo) == 1:
+                    mensagem = grupo[0].mensagem
+                else:
+                    mensagem = compor_mensagem([(por_nome[item.campanha].get('titulo', item.campanha), item.mensagem)
+                                                for item in grupo], separador)
+                    metricas.coletor.incrementar('envios_economizados', 'agrupado', len(grupo) - 1)
+                pendentes.append((grupo[0].telefone, mensagem, grupo[0].nome))
+            ultima_renovacao = time.monotonic()
+
+            def ao_concluir_item(indice: int, sucesso: bool, erro: Optional[Exception], grupos=grupos):
+                nonlocal ultima_renovacao
+                grupo = grupos[indice]
+                pausa = pausa_retentativa(max(item.tentativa_atual for item in grupo) + 1)
+                reagendados = 0
+                for item in grupo:
+                    if sucesso:
+                        with metricas.fase('historico'): historicos[item.campanha].registrar(item.telefone, item.nome)
+                        outbox.marcar_enviado(item.id, dono)
+                    elif registrar_falha_outbox(outbox, item, dono, erro, pausa):
+                        reagendados += 1
+                        continue
+                    contagens[item.campanha][0 if sucesso else 1] += 1
+                # A barra conta mensagens planejadas; o despachante já avançou uma por envio.
+                barra.total += reagendados
+                barra.update(len(grupo) - 1)
+                if time.monotonic() - ultima_renovacao > ConfigOutbox.DURACAO_LEASE / 3:
+                    outbox.renovar_lease(dono)
+                    ultima_renovacao = time.monotonic()
+
+            with metricas.campanha_atual('agrupado'), metricas.fase('envio'):
+                despachante.despachar({'nome': 'agrupado', 'tentativas': 1}, pendentes, None,
+                                      ao_concluir_item=ao_concluir_item, barra=barra, anexos=anexos)
+            if agendador: agendador.acompanhar(outbox, despachante.limitador, despachante.transporte)
+    finally:
+        outbox.liberar(dono)
+        barra.close()
+        for historico in historicos.values(): historico.fechar()
+    return {nome: tuple(valores) for nome, valores in contagens.items() if any(valores)}
+
+# =============================================================================
+# EXECUÇÃO DAS CAMPANHAS
+# =============================================================================
+def gerar_relatorio_final(titulo: str, sucessos: int, falhas: int, pulados: int, total: int,
+                          vazao: float = 0.0) -> str:
+    """Gera relatório final detalhado de uma campanha."""
+    taxa_sucesso = (sucessos / (sucessos + falhas) * 100) if (sucessos + falhas) > 0 else 0
+    relatorio = f"""
+    ========== RELATÓRIO FINAL: {titulo.upper()} ==========
+    📊 Total de Contatos Selecionados: {total}
+    ✅ Envios Bem-sucedidos: {sucessos}
+    ❌ Falhas no Envio: {falhas}
+    ⏭️  Envios Pulados (Já Realizados Hoje): {pulados}
+    📈 Taxa de Sucesso (dos envios tentados): {taxa_sucesso:.1f}%
+    🚀 Vazão Alcançada: {vazao:.1f} msg/min
+    📅 Data/Hora: {datetime.datetime.now().strftime('%d/%m/%Y %H:%M:%S')}
+    ============================================
+    """
+    return relatorio
+
+def selecionar_pendentes(df_campanha: pd.DataFrame, campanha: Dict, historico: HistoricoEnvios,
+                         enviados_hoje: Optional[Set[str]] = None) -> Tuple[pd.DataFrame, int]:
+    """Remove quem já recebeu hoje e telefones repetidos na seleção. Retorna (pendentes, pulados).
+
+    Telefones repetidos recebem uma única mensagem (a da primeira linha). Quem processa a planilha
+    em blocos passa `enviados_hoje` já consultado, para não repetir a consulta a cada bloco.
+    """
+    if enviados_hoje is None: enviados_hoje = historico.telefones_enviados_hoje()
+    repetidos = df_campanha['Telefone_Formatado'].duplicated()
+    enviados = df_campanha['Telefone_Formatado'].isin(enviados_hoje)
+    for nome, telefone in df_campanha.loc[enviados, ['primeiro_nome', 'Telefone_Formatado']].itertuples(index=False):
+        logging.info(f"PULADO [{campanha['nome']}]: {nome} ({telefone}) já recebeu hoje.")
+    if repetidos.any():
+        logging.info(f"PULADO [{campanha['nome']}]: {int((repetidos & ~enviados).sum())} linhas com telefone repetido.")
+
+    df_pendente = df_campanha[~(enviados | repetidos)]
+    return df_pendente, len(df_campanha) - len(df_pendente)
+
+def montar_itens(df_pendente: pd.DataFrame, campanha: Dict, template: Optional[str]) -> List[ItemEnvio]:
+    """Renderiza as mensagens em lote. Erros de template sobem como KeyError/ValueError."""
+    from renderizacao import renderizar_campanha
+    mensagens = renderizar_campanha(campanha['tipo'], template, df_pendente)
+    return list(zip(df_pendente['Telefone_Formatado'].tolist(), mensagens,
+                    df_pendente['primeiro_nome'].fillna('N/A').tolist()))
+
+def anexar_cartoes(df: pd.DataFrame, campanha: Dict, itens: List[ItemEnvio],
+                   processos: Optional[int] = None) -> Optional[List[Optional[str]]]:
+    """Cartões de desempenho dos itens (na mesma ordem), quando a campanha tem "cartao": true.
+
+    Se os cartões não puderem ser gerados, as mensagens seguem sem imagem.
+    """
+    if not campanha.get('cartao') or not itens: return None
+    from cartoes import cartoes_por_telefone
+    try:
+        validar_colunas(df, ConfigMotor.COLUNAS_CARTAO)
+        return cartoes_por_telefone(df, [item[0] for item in itens], processos)
+    except Exception as e:
+        logging.error(f"Cartões da campanha '{campanha['nome']}' não gerados; as mensagens seguem sem imagem: {e}")
+        return None
+
+def planejar_campanha(df_campanha: pd.DataFrame, campanha: Dict, template: Optional[str],
+                      historico: HistoricoEnvios) -> Tuple[List[ItemEnvio], int]:
+    """Monta, em lote, as mensagens de quem ainda não recebeu hoje. Retorna (pendentes, pulados)."""
+    with metricas.fase('deduplicacao'):
+        df_pendente, pulados = selecionar_pendentes(df_campanha, campanha, historico)
+    with metricas.fase('renderizacao'):
+        return montar_itens(df_pendente, campanha, template), pulados
+
+def enfileirar_campanha(df: pd.DataFrame, campanha: Dict, outbox: Outbox,
+                        remetentes: Optional[List[str]] = None) -> Dict[str, int]:
+    """Filtra e monta a campanha sobre a planilha já carregada e grava as mensagens no outbox.
+
+    Com `remetentes`, cada mensagem já sai atribuída à conta responsável pelo telefone.
+    """
+    nome_campanha = campanha['nome']
+    logging.info(f"--- INÍCIO DA CAMPANHA '{nome_campanha}' ---")
+    resultado = {'sucessos': 0, 'falhas': 0, 'pulados': 0, 'total': 0, 'enfileirados': 0}
+    try:
+        validar_colunas(df, ConfigMotor.COLUNAS_POR_TIPO.get(campanha['tipo'], []))
+        template = carregar_template(campanha)
+    except (ValueError, FileNotFoundError) as e:
+        logging.critical(f"Campanha '{nome_campanha}' abortada: {e}")
+        return resultado
+
+    df_campanha = filtrar_campanha(df, campanha)
+    resultado['total'] = len(df_campanha)
+    if df_campanha.empty:
+        print(f"ℹ️ Campanha '{nome_campanha}': nenhum contato selecionado. Nada para enviar.")
+        logging.info(f"Campanha '{nome_campanha}' sem contatos para o filtro {campanha['filtro']}.")
+        return resultado
+
+    with abrir_historico(nome_campanha) as historico:
+        try:
+            pendentes, resultado['pulados'] = planejar_campanha(df_campanha, campanha, template, historico)
+        except (KeyError, ValueError, IndexError) as e:
+            logging.critical(f"FALHA AO MONTAR MENSAGENS [{nome_campanha}]: campanha abortada: {e}")
+            resultado['falhas'] = resultado['total']
+            return resultado
+
+    anexos = anexar_cartoes(df_campanha, campanha, pendentes)
+    with metricas.fase('enfileiramento'):
+        atribuidos = atribuir_remetentes([item[0] for item in pendentes], remetentes) if remetentes else None
+        resultado['enfileirados'] = outbox.enfileirar(nome_campanha, pendentes, campanha['tentativas'], atribuidos,
+                                                      anexos)
+    logging.info(f"Campanha '{nome_campanha}': {len(pendentes)} mensagens planejadas, "
+                 f"{resultado['enfileirados']} novas no outbox.")
+    return resultado
+
+def colunas_das_campanhas(campanhas: List[Dict]) -> List[str]:
+    """Colunas que as campanhas realmente usam: base, as do tipo e as do filtro."""
+    colunas = list(ConfigMotor.COLUNAS_BASE)
+    for campanha in campanhas:
+        cartao = ConfigMotor.COLUNAS_CARTAO if campanha.get('cartao') else []
+        for coluna in [*ConfigMotor.COLUNAS_POR_TIPO.get(campanha['tipo'], []), *campanha['filtro'], *cartao]:
+            if coluna not in colunas: colunas.append(coluna)
+    return colunas
+
+def planejar_em_fluxo(planilha: Dict, campanhas: List[Dict], outbox: Outbox,
+                      remetentes: Optional[List[str]] = None) -> Dict[str, Dict[str, int]]:
+    """Lê a planilha em blocos e, bloco a bloco, prepara, filtra, renderiza e enfileira cada campanha.
+
+    A memória fica limitada ao tamanho do bloco; telefones repetidos em blocos diferentes
+    são descartados pela chave única do outbox.
+    """
+    from tqdm import tqdm
+    from leitura_streaming import ConfigStreaming, ler_cabecalho, ler_em_blocos
+    from metas_vendas import ConfigVendas, agregar_vendas, aplicar_vendas, normalizar_config
+    resultados = {c['nome']: {'sucessos': 0, 'falhas': 0, 'pulados': 0, 'total': 0, 'enfileirados': 0}
+                  for c in campanhas}
+    cabecalho = ler_cabecalho(planilha['arquivo'], planilha.get('aba'))
+    vendas = planilha.get('vendas')
+    # Com o registro de vendas, as colunas de metas não vêm da planilha: são calculadas em cada bloco.
+    calculadas = set(ConfigVendas.COLUNAS_CALCULADAS) if vendas else set()
+    ativas: Dict[str, Tuple[Dict, Optional[str]]] = {}
+    for campanha in campanhas:
+        try:
+            faltando = [c for c in colunas_das_campanhas([campanha]) if c not in cabecalho and c not in calculadas]
+            if faltando: raise ValueError(f"Coluna obrigatória '{faltando[0]}' não encontrada na planilha")
+            ativas[campanha['nome']] = (campanha, carregar_template(campanha))
+        except (ValueError, FileNotFoundError) as e:
+            logging.critical(f"Campanha '{campanha['nome']}' abortada: {e}")
+    if not ativas: return resultados
+
+    historicos = {nome: abrir_historico(nome) for nome in ativas}
+    enviados_hoje = {nome: historico.telefones_enviados_hoje() for nome, historico in historicos.items()}
+    colunas = [c for c in colunas_das_campanhas([campanha for campanha, _ in ativas.values()]) if c not in calculadas]
+    totais_vendas = None
+    if vendas:
+        vendas = normalizar_config(vendas)
+        colunas += [c for c in (ConfigVendas.COLUNA_META, vendas['chave']) if c not in colunas]
+        with metricas.fase('vendas'):
+            totais_vendas = agregar_vendas(vendas)
+    tamanho_bloco = planilha.get('tamanho_bloco', ConfigStreaming.TAMANHO_BLOCO)
+    try:
+        blocos = ler_em_blocos(planilha['arquivo'], planilha.get('aba'), colunas, tamanho_bloco)
+        for bloco in tqdm(blocos, desc="Lendo planilha em blocos", unit="bloco"):
+            with metricas.fase('preparo'):
+                bloco = separar_rejeitados(preparar_contatos(bloco))
+            if vendas: bloco = aplicar_vendas(bloco, vendas, totais=totais_vendas)
+            for nome, (campanha, template) in list(ativas.items()):
+                resultado = resultados[nome]
+                with metricas.campanha_atual(nome):
+                    df_campanha = filtrar_campanha(bloco, campanha)
+                    resultado['total'] += len(df_campanha)
+                    with metricas.fase('deduplicacao'):
+                        df_pendente, pulados = selecionar_pendentes(df_campanha, campanha, historicos[nome],
+                                                                    enviados_hoje[nome])
+                    resultado['pulados'] += pulados
+                    try:
+                        with metricas.fase('renderizacao'):
+                            itens = montar_itens(df_pendente, campanha, template)
+                    except (KeyError, ValueError, IndexError) as e:
+                        logging.critical(f"FALHA AO MONTAR MENSAGENS [{nome}]: campanha abortada: {e}")
+                        resultado['falhas'] += len(df_pendente)
+                        del ativas[nome]
+                        continue
+                    anexos = anexar_cartoes(df_pendente, campanha, itens)
+                    atribuidos = atribuir_remetentes([item[0] for item in itens], remetentes) if remetentes else None
+                    with metricas.fase('enfileiramento'):
+                        resultado['enfileirados'] += outbox.enfileirar(nome, itens, campanha['tentativas'], atribuidos,
+                                                                       anexos)
+    finally:
+        for historico in historicos.values(): historico.fechar()
+
+    for nome, resultado in resultados.items():
+        logging.info(f"Campanha '{nome}': {resultado['total']} contatos lidos em fluxo, "
+                     f"{resultado['enfileirados']} novas mensagens no outbox.")
+    return resultados
+
+def enviar_pendentes(configuracao: Dict, campanhas: List[Dict], outbox: Outbox) -> Tuple[Dict[str, Tuple[int, int]], float]:
+    """Abre o transporte e esvazia o outbox das campanhas. Retorna ({campanha: (sucessos, falhas)}, vazão).
+
+    Com remetentes declarados, cada um envia a sua parte em um processo próprio. As campanhas
+    saem na ordem dos prazos, e o agendador escala o envio (ou avisa) se algum prazo estiver em risco.
+    """
+    agendador = Agendador(configuracao, campanhas)
+    agendador.planejar(outbox)
+    if agendador.remetentes:
+        return enviar_por_remetentes(agendador.remetentes, agendador.campanhas, outbox, configuracao['agrupar'],
+                                     agendador)
+
+    with criar_transporte(**agendador.transporte) as transporte:
+        despachante = Despachante(transporte, criar_limitador(transporte.nome, **agendador.limitador))
+        enviados = processar_outbox(outbox, despachante, agendador.campanhas, agrupar=configuracao['agrupar'],
+                                    agendador=agendador)
+    logging.info(despachante.limitador.resumo())
+    agendador.registrar_vazao(despachante.limitador.vazao(), despachante.limitador.sucessos)
+    return enviados, despachante.limitador.vazao()
+
+def _enviar_remetente(remetente: Dict, campanhas: List[Dict], caminho_outbox: str, caminho_historico: str,
+                      agrupar: Optional[Dict] = None) -> Dict:
+    """Processo de um remetente: transporte e limitador próprios, só os itens atribuídos a ele."""
+    if not logging.getLogger().handlers: configurar_logging(f"remetente_{remetente['nome']}")
+    ConfigHistorico.ARQUIVO_BANCO = caminho_historico
+    metricas.coletor.iniciar_execucao()
+    with Outbox(caminho_outbox) as outbox, criar_transporte(**remetente['transporte']) as transporte:
+        limitador = criar_limitador(transporte.nome, **remetente['limitador'])
+        enviados = processar_outbox(outbox, Despachante(transporte, limitador), campanhas, remetente=remetente['nome'],
+                                    agrupar=agrupar)
+    logging.info(f"[{remetente['nome']}] {limitador.resumo()}")
+    return {'enviados': enviados, 'vazao': limitador.vazao(), 'metricas': metricas.coletor.estado()}
+
+def enviar_por_remetentes(remetentes: List[Dict], campanhas: List[Dict], outbox: Outbox,
+                          agrupar: Optional[Dict] = None,
+                          agendador: Optional[Agendador] = None) -> Tuple[Dict[str, Tuple[int, int]], float]:
+    """Um processo por remetente; junta no fim os envios, a vazão (soma das contas) e as métricas."""
+    nomes = [r['nome'] for r in remetentes]
+    redistribuidos = outbox.redistribuir(nomes, atribuir_remetente)
+    if redistribuidos: logging.info(f"{redistribuidos} itens do outbox atribuídos aos remetentes {', '.join(nomes)}.")
+
+    import multiprocessing
+    # Os processos dos remetentes logam pela fila deste processo, que continua sendo o único a gravar.
+    with multiprocessing.Pool(len(remetentes), initializer=encaminhar_logs, initargs=(fila_logs(),)) as pool:
+        parciais = pool.starmap(_enviar_remetente, [(r, campanhas, outbox.caminho, ConfigHistorico.ARQUIVO_BANCO, agrupar)
+                                                    for r in remetentes])
+
+    enviados: Dict[str, Tuple[int, int]] = {}
+    for remetente, parcial in zip(remetentes, parciais):
+        for nome, (sucessos, falhas) in parcial['enviados'].items():
+            anterior = enviados.get(nome, (0, 0))
+            enviados[nome] = (anterior[0] + sucessos, anterior[1] + falhas)
+        metricas.coletor.mesclar(parcial['metricas'], paralelo=True)
+        if agendador:
+            agendador.registrar_vazao(parcial['vazao'], sum(s for s, _ in parcial['enviados'].values()), remetente)
+    return enviados, sum(parcial['vazao'] for parcial in parciais)
+
+def relatar_campanhas(campanhas: List[Dict], resultados: Dict[str, Dict[str, int]], vazao: float):
+    for campanha in campanhas:
+        resultado = resultados.get(campanha['nome'])
+        if resultado is None: continue
+        metricas.coletor.registrar_resultado(campanha['nome'], resultado)
+        relatorio = gerar_relatorio_final(campanha.get('titulo', campanha['nome']), resultado['sucessos'],
+                                          resultado['falhas'], resultado['pulados'], resultado['total'], vazao)
+        print(relatorio)
+        logging.info(relatorio.replace('\n', ' '))
+
+def executar_campanhas(nomes: Optional[List[str]] = None, caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS,
+                       so_planejar: bool = False, streaming: bool = False) -> Dict[str, Dict[str, int]]:
+    """Carrega a planilha uma vez, planeja as campanhas selecionadas no outbox e as envia.
+
+    Com `so_planejar`, as mensagens ficam no outbox para um trabalhador (`--trabalhador`) enviar.
+    Com `streaming` (ou "streaming": true na planilha, ou um arquivo .csv), a planilha é lida em
+    blocos, com memória constante, em vez de carregada inteira.
+    """
+    configuracao = carregar_configuracao(caminho_config)
+    campanhas = selecionar_campanhas(configuracao, nomes)
+    metricas.coletor.iniciar_execucao()
+
+    try:
+        from leitura_streaming import eh_csv
+        planilha = configuracao['planilha']
+        em_fluxo = streaming or planilha.get('streaming', False) or eh_csv(planilha['arquivo'])
+        df = None
+        if not em_fluxo:
+            df = carregar_e_preparar_dados(planilha['arquivo'], planilha['aba'], planilha.get('vendas'))
+            if df is None or df.empty:
+                logging.warning("Nenhum dado válido para processar. Finalizando.")
+                return {}
+        elif not validar_arquivo_existe(planilha['arquivo']):
+            return {}
+
+        resultados, vazao = {}, 0.0
+        with abrir_outbox() as outbox:
+            nomes_remetentes = [r['nome'] for r in carregar_remetentes(configuracao)]
+            if em_fluxo:
+                with metricas.fase('carga'):
+                    resultados = planejar_em_fluxo(planilha, campanhas, outbox, nomes_remetentes)
+            for campanha in campanhas if df is not None else []:
+                with metricas.campanha_atual(campanha['nome']):
+                    resultados[campanha['nome']] = enfileirar_campanha(df, campanha, outbox, nomes_remetentes)
+            if so_planejar:
+                print(f"📥 Mensagens planejadas no outbox: {outbox.contagem()}")
+                return resultados
+            enviados, vazao = enviar_pendentes(configuracao, campanhas, outbox)
+
+        for nome, (sucessos, falhas) in enviados.items():
+            resultados[nome]['sucessos'] += sucessos
+            resultados[nome]['falhas'] += falhas
+        relatar_campanhas(campanhas, resultados, vazao)
+        return resultados
+    finally:
+        # Mesmo uma execução interrompida deixa registrado até onde chegou.
+        try:
+            metricas.coletor.exportar()
+        except OSError as e:
+            logging.error(f"Não foi possível exportar as métricas: {e}")
+
+def trabalhar(nomes: Optional[List[str]] = None,
+              caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS) -> Dict[str, Tuple[int, int]]:
+    """Envia o que está pendente no outbox sem reler a planilha (retomada após uma interrupção)."""
+    configuracao = carregar_configuracao(caminho_config)
+    campanhas = selecionar_campanhas(configuracao, nomes)
+    metricas.coletor.iniciar_execucao()
+    try:
+        with abrir_outbox() as outbox:
+            enviados, vazao = enviar_pendentes(configuracao, campanhas, outbox)
+        resultados = {nome: {'sucessos': s, 'falhas': f, 'pulados': 0, 'total': s + f}
+                      for nome, (s, f) in enviados.items()}
+        relatar_campanhas(campanhas, resultados, vazao)
+        return enviados
+    finally:
+        try:
+            metricas.coletor.exportar()
+        except OSError as e:
+            logging.error(f"Não foi possível exportar as métricas: {e}")
+
+def listar(nomes: Optional[List[str]] = None, caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS):
+    """Execução de ensaio: mostra as campanhas na ordem de envio, o outbox de hoje e a previsão de término."""
+    configuracao = carregar_configuracao(caminho_config)
+    print(f"📄 Planilha: {configuracao['planilha']['arquivo']} (aba '{configuracao['planilha']['aba']}')")
+    agendador = Agendador(configuracao, selecionar_campanhas(configuracao, nomes))
+    with Outbox() as outbox:
+        previsoes = {previsao.campanha: previsao for previsao in agendador.prever(outbox)}
+        for campanha in agendador.campanhas:
+            filtro = ', '.join(f"{coluna}={valor}" for coluna, valor in campanha['filtro'].items()) or 'todos'
+            previsao = previsoes[campanha['nome']]
+            prazo = f", prazo {previsao.prazo:%H:%M}" if previsao.prazo else ''
+            termino = (f", término previsto {previsao.termino:%H:%M}" + (" ⚠️ em risco" if previsao.em_risco else '')
+                       if previsao.pendentes else '')
+            print(f"  • {campanha['nome']} ({campanha['tipo']}, filtro: {filtro}{prazo}): "
+                  f"outbox hoje {outbox.contagem(campanha['nome']) or 'vazio'}{termino}")
+    print(f"🚀 Vazão prevista: {agendador.capacidade():.1f} msg/min")
+
+def _processo_trabalhador(nomes: Optional[List[str]], caminho_config: str, fila):
+    encaminhar_logs(fila)
+    trabalhar(nomes, caminho_config)
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Executa as campanhas de campanhas.json lendo a planilha uma vez.")
+    parser.add_argument('campanhas', nargs='*', help="Nomes das campanhas (padrão: todas).")
+    parser.add_argument('--config', default=ConfigMotor.ARQUIVO_CAMPANHAS, help="Arquivo de campanhas.")
+    parser.add_argument('--so-planejar', action='store_true', help="Só grava as mensagens no outbox, sem enviar.")
+    parser.add_argument('--trabalhador', action='store_true',
+                        help="Só envia o que está pendente no outbox (retomada), sem ler a planilha.")
+    parser.add_argument('--processos', type=int, default=1,
+                        help="Com --trabalhador: quantos processos enviam em paralelo (backend http).")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Lê a planilha em blocos, com memória constante (planilhas muito grandes).")
+    parser.add_argument('--listar', action='store_true',
+                        help="Só mostra as campanhas e o outbox de hoje, sem ler a planilha nem enviar.")
+    parser.add_argument('--perfil', choices=['cprofile', 'tracemalloc'], default=None,
+                        help="Grava os pontos quentes (tempo ou memória) na pasta de métricas.")
+    args = parser.parse_args(argv)
+
+    if args.listar:
+        listar(args.campanhas, args.config)
+        return
+
+    if args.trabalhador and args.processos > 1:
+        import multiprocessing
+        configurar_logging('trabalhador')
+        processos = [multiprocessing.Process(target=_processo_trabalhador, args=(args.campanhas, args.config, fila_logs()))
+                     for _ in range(args.processos)]
+        for processo in processos: processo.start()
+        for processo in processos: processo.join()
+        return
+
+    configurar_logging()
+    logging.info("=== INÍCIO DA EXECUÇÃO DAS CAMPANHAS ===")
+    with metricas.perfilar(args.perfil):
+        if args.trabalhador:
+            trabalhar(args.campanhas, args.config)
+        else:
+            executar_campanhas(args.campanhas, args.config, so_planejar=args.so_planejar, streaming=args.streaming)
+    logging.info("=== FIM DA EXECUÇÃO DAS CAMPANHAS ===")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.warning("Processo interrompido pelo usuário.")
+        print("\nProcesso cancelado.")
+    except Exception as e:
+        logging.critical(f"Erro fatal não tratado na execução: {e}", exc_info=True)
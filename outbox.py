@@ -0,0 +1,300 @@
+# =============================================================================
+# OUTBOX DURÁVEL (FILA EM SQLITE)
+# =============================================================================
+# Separa a etapa rápida (ler a planilha, filtrar, renderizar) da etapa lenta
+# (enviar). O planejamento grava todas as mensagens pendentes aqui antes de
+# qualquer envio; os trabalhadores reivindicam lotes com um lease (prazo de
+# posse), marcam cada item como enviado ou com falha, e um item cujo lease
+# venceu (o trabalhador caiu) volta a ficar disponível.
+#
+# Depois de uma interrupção basta rodar um trabalhador de novo: ele continua
+# de onde parou sem reler a planilha. A chave única (campanha, data, telefone)
+# garante que replanejar o mesmo dia não duplica mensagens.
+#
+# Uma falha transitória não encerra o item: ele volta a PENDENTE com uma
+# `proxima_tentativa` no futuro (espera exponencial) e só é reivindicado de
+# novo depois dela, sem segurar o resto do lote.
+#
+# Só as mensagens planejadas para hoje são reivindicadas: o que sobrou de um
+# dia anterior (relatório de ontem, parabéns de ontem) vira EXPIRADO ao abrir
+# o outbox, em vez de sair hoje e entrar no histórico de hoje.
+#
+# Estados: PENDENTE -> EM_ENVIO -> ENVIADO | FALHA
+#                          └──> PENDENTE (reagendado, até esgotar as tentativas)
+#          PENDENTE | EM_ENVIO de outro dia -> EXPIRADO
+# =============================================================================
+import datetime
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from itertools import repeat
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+# =============================================================================
+# CONFIGURAÇÕES DO OUTBOX
+# =============================================================================
+class ConfigOutbox:
+    ARQUIVO_BANCO = os.environ.get('AUTOSENDER_OUTBOX_DB', 'outbox.db')
+    DURACAO_LEASE = 300   # segundos; renovado enquanto o lote é enviado
+    TAMANHO_LOTE = 50     # itens reivindicados por vez
+    DIAS_MANTER = 30
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id              INTEGER PRIMARY KEY,
+    campanha        TEXT NOT NULL,
+    data_envio      TEXT NOT NULL,
+    telefone        TEXT NOT NULL,
+    nome            TEXT,
+    mensagem        TEXT NOT NULL,
+    tentativas      INTEGER NOT NULL DEFAULT 1,
+    remetente       TEXT,
+    status          TEXT NOT NULL DEFAULT 'PENDENTE',
+    dono            TEXT,
+    lease_ate       REAL,
+    erro            TEXT,
+    atualizado_em   TEXT,
+    UNIQUE (campanha, data_envio, telefone)
+);
+CREATE INDEX IF NOT EXISTS idx_outbox_status ON outbox (status, campanha, lease_ate);
+CREATE INDEX IF NOT EXISTS idx_outbox_telefone ON outbox (status, telefone);
+"""
+
+# Colunas acrescentadas depois da primeira versão: (nome, definição)
+COLUNAS_NOVAS = [('remetente', 'TEXT'), ('criado_em', 'REAL'), ('tentativa_atual', 'INTEGER NOT NULL DEFAULT 0'),
+                 ('proxima_tentativa', 'REAL'), ('anexo', 'TEXT')]
+
+class ItemOutbox(NamedTuple):
+    id: int
+    campanha: str
+    telefone: str
+    nome: str
+    mensagem: str
+    tentativas: int
+    remetente: Optional[str]
+    criado_em: Optional[float]
+    tentativa_atual: int   # tentativas já feitas (com falha) antes desta
+    anexo: Optional[str]   # imagem enviada com a mensagem (cartão do vendedor)
+
+_COLUNAS_ITEM = 'id, campanha, telefone, nome, mensagem, tentativas, remetente, criado_em, tentativa_atual, anexo'
+# Pendente e já vencida a espera da retentativa (se houver).
+_DISPONIVEL = "status = 'PENDENTE' AND (proxima_tentativa IS NULL OR proxima_tentativa <= ?)"
+
+def identificar_trabalhador() -> str:
+    """Identificador único do trabalhador: máquina, processo e um sufixo aleatório."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+def _agora() -> str:
+    return datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+
+def _hoje() -> str:
+    return datetime.date.today().strftime('%Y-%m-%d')
+
+# =============================================================================
+# OUTBOX
+# =============================================================================
+class Outbox:
+    """Fila durável de mensagens a enviar, compartilhável entre processos."""
+
+    def __init__(self, caminho: Optional[str] = None):
+        self.caminho = caminho or ConfigOutbox.ARQUIVO_BANCO
+        self.conexao = sqlite3.connect(self.caminho, timeout=30, isolation_level=None, check_same_thread=False)
+        self.conexao.execute('PRAGMA journal_mode=WAL')
+        self.conexao.execute('PRAGMA synchronous=NORMAL')
+        self.conexao.executescript(ESQUEMA)
+        self._migrar()
+
+    def _migrar(self):
+        existentes = {linha[1] for linha in self.conexao.execute('PRAGMA table_info(outbox)')}
+        for coluna, definicao in COLUNAS_NOVAS:
+            if coluna not in existentes:
+                self.conexao.execute(f'ALTER TABLE outbox ADD COLUMN {coluna} {definicao}')
+
+    def enfileirar(self, campanha: str, itens: Iterable[Tuple[str, str, str]], tentativas: int = 1,
+                   remetentes: Optional[Sequence[Optional[str]]] = None,
+                   anexos: Optional[Sequence[Optional[str]]] = None) -> int:
+        """Grava os itens (telefone, mensagem, nome) de hoje; os que já estão na fila são ignorados.
+
+        `remetentes`, quando informado, traz a conta responsável por cada item, na mesma ordem;
+        `anexos`, a imagem que acompanha cada mensagem.
+        """
+        hoje = _hoje()
+        agora, criado_em = _agora(), time.time()
+        remetentes = remetentes if remetentes is not None else repeat(None)
+        anexos = anexos if anexos is not None else repeat(None)
+        linhas = [(campanha, hoje, telefone, nome, mensagem, tentativas, remetente, anexo, criado_em, agora)
+                  for (telefone, mensagem, nome), remetente, anexo in zip(itens, remetentes, anexos)]
+        antes = self.conexao.total_changes
+        with self.conexao:
+            self.conexao.execute('BEGIN')
+            self.conexao.executemany(
+                'INSERT OR IGNORE INTO outbox (campanha, data_envio, telefone, nome, mensagem, tentativas, remetente, '
+                'anexo, criado_em, atualizado_em) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', linhas)
+        return self.conexao.total_changes - antes
+
+    @staticmethod
+    def _filtros(campanha: Optional[str], remetente: Optional[str]) -> Tuple[str, list]:
+        filtros, parametros = '', []
+        if campanha: filtros, parametros = filtros + ' AND campanha = ?', parametros + [campanha]
+        if remetente: filtros, parametros = filtros + ' AND remetente = ?', parametros + [remetente]
+        return filtros, parametros
+
+    def reivindicar(self, dono: str, limite: int = ConfigOutbox.TAMANHO_LOTE, campanha: Optional[str] = None,
+                    remetente: Optional[str] = None,
+                    duracao_lease: float = ConfigOutbox.DURACAO_LEASE) -> List[ItemOutbox]:
+        """Toma posse de até `limite` itens de hoje pendentes (ou com lease vencido), na ordem em que foram planejados.
+
+        Itens reagendados só entram depois de vencida a `proxima_tentativa`.
+        """
+        agora = time.time()
+        filtros, parametros = self._filtros(campanha, remetente)
+        with self.conexao:
+            # BEGIN IMMEDIATE trava a escrita já na leitura: dois trabalhadores nunca pegam o mesmo item.
+            self.conexao.execute('BEGIN IMMEDIATE')
+            linhas = self.conexao.execute(
+                f"SELECT {_COLUNAS_ITEM} FROM outbox "
+                f"WHERE (({_DISPONIVEL}) OR (status = 'EM_ENVIO' AND lease_ate < ?)) AND data_envio = ? {filtros} "
+                f"ORDER BY id LIMIT ?", [agora, agora, _hoje(), *parametros, limite]).fetchall()
+            if linhas:
+                self.conexao.executemany(
+                    "UPDATE outbox SET status = 'EM_ENVIO', dono = ?, lease_ate = ?, atualizado_em = ? WHERE id = ?",
+                    [(dono, agora + duracao_lease, _agora(), linha[0]) for linha in linhas])
+        return [ItemOutbox(*linha) for linha in linhas]
+
+    def reivindicar_por_telefone(self, dono: str, campanhas: Sequence[str], limite: int = ConfigOutbox.TAMANHO_LOTE,
+                                 remetente: Optional[str] = None,
+                                 duracao_lease: float = ConfigOutbox.DURACAO_LEASE) -> List[ItemOutbox]:
+        """Toma posse de todos os itens de hoje pendentes das `campanhas` para até `limite` telefones.
+
+        Os itens vêm ordenados por telefone, para as mensagens de várias campanhas ao mesmo
+        contato poderem ser agrupadas em um único envio. Os telefones com itens das primeiras
+        `campanhas` (as de prazo mais próximo) são escolhidos antes.
+        """
+        agora = time.time()
+        marcadores = ', '.join('?' * len(campanhas))
+        filtros, parametros = f' AND data_envio = ? AND campanha IN ({marcadores})', [_hoje(), *campanhas]
+        if remetente: filtros, parametros = filtros + ' AND remetente = ?', parametros + [remetente]
+        with self.conexao:
+            self.conexao.execute('BEGIN IMMEDIATE')
+            # Leases vencidos voltam para a fila antes da escolha, para os itens deles entrarem no grupo do telefone.
+            self.conexao.execute("UPDATE outbox SET status = 'PENDENTE', dono = NULL, lease_ate = NULL "
+                                 "WHERE status = 'EM_ENVIO' AND lease_ate < ?", (agora,))
+            urgencia = 'CASE campanha ' + ' '.join(f'WHEN ? THEN {ordem}' for ordem in range(len(campanhas))) + ' END'
+            telefones = [linha[0] for linha in self.conexao.execute(
+                f"SELECT telefone FROM outbox WHERE {_DISPONIVEL} {filtros} "
+                f"GROUP BY telefone ORDER BY MIN({urgencia}), telefone LIMIT ?",
+                [agora, *parametros, *campanhas, limite])]
+            if not telefones: return []
+            linhas = self.conexao.execute(
+                f"SELECT {_COLUNAS_ITEM} FROM outbox WHERE {_DISPONIVEL} {filtros} "
+                f"AND telefone IN ({', '.join('?' * len(telefones))}) ORDER BY telefone, id",
+                [agora, *parametros, *telefones]).fetchall()
+            self.conexao.executemany(
+                "UPDATE outbox SET status = 'EM_ENVIO', dono = ?, lease_ate = ?, atualizado_em = ? WHERE id = ?",
+                [(dono, agora + duracao_lease, _agora(), linha[0]) for linha in linhas])
+        return [ItemOutbox(*linha) for linha in linhas]
+
+    def renovar_lease(self, dono: str, duracao_lease: float = ConfigOutbox.DURACAO_LEASE):
+        """Estende o lease de todos os itens em posse do trabalhador."""
+        self.conexao.execute("UPDATE outbox SET lease_ate = ? WHERE dono = ? AND status = 'EM_ENVIO'",
+                             (time.time() + duracao_lease, dono))
+
+    def _finalizar(self, id_item: int, dono: str, status: str, erro: Optional[str] = None) -> bool:
+        cursor = self.conexao.execute(
+            "UPDATE outbox SET status = ?, erro = ?, lease_ate = NULL, atualizado_em = ? "
+            "WHERE id = ? AND dono = ? AND status = 'EM_ENVIO'", (status, erro, _agora(), id_item, dono))
+        if not cursor.rowcount:
+            logging.warning(f"Item {id_item} do outbox não pertence mais a {dono} (lease vencido?).")
+        return bool(cursor.rowcount)
+
+    def marcar_enviado(self, id_item: int, dono: str) -> bool:
+        return self._finalizar(id_item, dono, 'ENVIADO')
+
+    def marcar_falha(self, id_item: int, dono: str, erro: Optional[str] = None) -> bool:
+        return self._finalizar(id_item, dono, 'FALHA', erro)
+
+    def reagendar(self, id_item: int, dono: str, pausa: float, erro: Optional[str] = None) -> bool:
+        """Devolve o item à fila para uma nova tentativa daqui a `pausa` segundos."""
+        cursor = self.conexao.execute(
+            "UPDATE outbox SET status = 'PENDENTE', dono = NULL, lease_ate = NULL, erro = ?, "
+            "tentativa_atual = tentativa_atual + 1, proxima_tentativa = ?, atualizado_em = ? "
+            "WHERE id = ? AND dono = ? AND status = 'EM_ENVIO'", (erro, time.time() + pausa, _agora(), id_item, dono))
+        if not cursor.rowcount:
+            logging.warning(f"Item {id_item} do outbox não pertence mais a {dono} (lease vencido?).")
+        return bool(cursor.rowcount)
+
+    def proxima_retentativa(self, campanhas: Sequence[str], remetente: Optional[str] = None) -> Optional[float]:
+        """Instante (epoch) da próxima retentativa agendada para as campanhas, ou None se não houver."""
+        filtros, parametros = f" AND data_envio = ? AND campanha IN ({', '.join('?' * len(campanhas))})", [_hoje(), *campanhas]
+        if remetente: filtros, parametros = filtros + ' AND remetente = ?', parametros + [remetente]
+        linha = self.conexao.execute(
+            f"SELECT MIN(proxima_tentativa) FROM outbox WHERE status = 'PENDENTE' AND proxima_tentativa > ? {filtros}",
+            [time.time(), *parametros]).fetchone()
+        return linha[0]
+
+    def redistribuir(self, nomes: List[str], atribuir: Callable[[str, List[str]], str], todos: bool = False) -> int:
+        """Atribui um dos `nomes` aos itens pendentes sem remetente ou com um remetente que saiu da lista.
+
+        Com `todos`, reavalia todos os pendentes (contas novas na lista). Retorna quantos mudaram.
+        """
+        marcadores = ', '.join('?' * len(nomes))
+        filtro = '' if todos else f" AND (remetente IS NULL OR remetente NOT IN ({marcadores}))"
+        linhas = self.conexao.execute(f"SELECT id, telefone, remetente FROM outbox WHERE status = 'PENDENTE'{filtro}",
+                                      [] if todos else nomes).fetchall()
+        mudancas = [(novo, id_item) for id_item, telefone, atual in linhas
+                    if (novo := atribuir(telefone, nomes)) != atual]
+        if mudancas:
+            with self.conexao:
+                self.conexao.execute('BEGIN')
+                self.conexao.executemany('UPDATE outbox SET remetente = ? WHERE id = ?', mudancas)
+        return len(mudancas)
+
+    def liberar(self, dono: str) -> int:
+        """Devolve à fila os itens ainda em posse do trabalhador (encerramento limpo no meio de um lote)."""
+        cursor = self.conexao.execute(
+            "UPDATE outbox SET status = 'PENDENTE', dono = NULL, lease_ate = NULL WHERE dono = ? AND status = 'EM_ENVIO'",
+            (dono,))
+        return cursor.rowcount
+
+    def contagem(self, campanha: Optional[str] = None, remetente: Optional[str] = None) -> Dict[str, int]:
+        """Quantidade de itens de hoje por status."""
+        hoje = _hoje()
+        filtro, parametros = self._filtros(campanha, remetente)
+        cursor = self.conexao.execute(
+            f'SELECT status, COUNT(*) FROM outbox WHERE data_envio = ? {filtro} GROUP BY status', [hoje, *parametros])
+        return dict(cursor.fetchall())
+
+    def expirar_antigos(self) -> int:
+        """Marca como EXPIRADO o que ficou pendente (ou preso em envio) de dias anteriores."""
+        return self.conexao.execute(
+            "UPDATE outbox SET status = 'EXPIRADO', dono = NULL, lease_ate = NULL, atualizado_em = ?, "
+            "erro = COALESCE(erro, 'não enviado no dia planejado') "
+            "WHERE status IN ('PENDENTE', 'EM_ENVIO') AND data_envio < ?", (_agora(), _hoje())).rowcount
+
+    def limpar_antigos(self, dias_manter: int = ConfigOutbox.DIAS_MANTER) -> int:
+        limite = (datetime.date.today() - datetime.timedelta(days=dias_manter)).strftime('%Y-%m-%d')
+        return self.conexao.execute('DELETE FROM outbox WHERE data_envio < ?', (limite,)).rowcount
+
+    def fechar(self):
+        try:
+            self.conexao.close()
+        except sqlite3.Error as e:
+            logging.warning(f"Erro ao fechar o outbox: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+def abrir_outbox(caminho: Optional[str] = None) -> Outbox:
+    """Abre o outbox, expira o que sobrou de dias anteriores e descarta itens antigos."""
+    outbox = Outbox(caminho)
+    expirados = outbox.expirar_antigos()
+    if expirados: logging.warning(f"Outbox: {expirados} mensagens de dias anteriores não enviadas foram expiradas.")
+    removidos = outbox.limpar_antigos()
+    if removidos: logging.info(f"Limpeza do outbox: {removidos} itens antigos removidos.")
+    return outbox
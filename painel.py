@@ -1,89 +1,182 @@
 # =============================================================================
-# IMPORTAÇÕES NECESSÁRIAS
+# PAINEL DE AUTOMAÇÃO
 # =============================================================================
+# Cada botão entrega uma campanha a um processo trabalhador que fica aberto
+# durante todo o uso do painel, com o motor de campanhas (pandas, transporte)
+# já importado: a partir do segundo clique o envio começa sem a espera da
+# inicialização. Os trabalhos entram em fila e rodam um por vez.
+#
+# O progresso e a vazão vêm do outbox (outbox.py), consultado a cada meio
+# segundo: o painel em si nunca importa o pandas.
+# =============================================================================
+import logging
+import multiprocessing
+import queue
+import time
 import tkinter as tk
-from tkinter import ttk 
-import subprocess
-import sys
-from pathlib import Path
-
-
-def executar_script(nome_do_script):
-    """
-    Executa um script Python em um novo processo de terminal,
-    garantindo que o ambiente virtual correto seja usado.
-    """
-    try:
-        python_executable = Path(sys.executable)
-        
-       
-        script_path = Path(__file__).resolve().parent / 'src' / nome_do_script
-        
-        if not script_path.exists():
-            print(f"ERRO: O script '{nome_do_script}' não foi encontrado na pasta 'src/'.")
-         
-            tk.messagebox.showerror("Erro de Script", f"O arquivo de script '{nome_do_script}' não foi encontrado!")
-            return
-
-        print(f"▶️  Iniciando a execução de: {nome_do_script}")
-     
-        subprocess.Popen([str(python_executable), str(script_path)])
+from tkinter import messagebox, ttk
+from typing import Dict, List, Optional
 
-    except Exception as e:
-        print(f"ERRO ao tentar executar o script '{nome_do_script}': {e}")
-        tk.messagebox.showerror("Erro de Execução", f"Falha ao iniciar o script:\n{e}")
+from outbox import Outbox
 
 # =============================================================================
-# CRIAÇÃO DA INTERFACE GRÁFICA (GUI)
+# CONFIGURAÇÕES DO PAINEL
 # =============================================================================
+class ConfigPainel:
+    # (texto do botão, campanhas de campanhas.json)
+    BOTOES = [
+        ("📊 Enviar Relatórios Diários", ['relatorios']),
+        ("🎉 Enviar Parabéns por Meta", ['parabens']),
+        ("🔔 Enviar Lembretes de Meta", ['lembretes']),
+    ]
+    INTERVALO_ATUALIZACAO_MS = 500
+    JANELA_VAZAO = 30   # segundos considerados no cálculo da vazão
 
-root = tk.Tk()
-root.title("Central de Automação de Vendas")
-root.geometry("400x350") 
-root.resizable(False, False) 
-
-
-style = ttk.Style()
-style.configure('TButton', font=('Helvetica', 12), padding=10)
-
-
-main_frame = ttk.Frame(root, padding="20 20 20 20")
-main_frame.pack(expand=True, fill='both')
-
-title_label = ttk.Label(
-    main_frame, 
-    text="Central de Automação ", 
-    font=("Helvetica", 18, "bold")
-)
-title_label.pack(pady=(0, 20))
-
-button_relatorios = ttk.Button(
-    main_frame, 
-    text="📊 Enviar Relatórios Diários", 
-    command=lambda: executar_script('EnviarMensagemVendedores.py')
-)
-button_relatorios.pack(fill='x', pady=5) # fill='x' faz o botão ocupar toda a largura
-
-button_parabens = ttk.Button(
-    main_frame, 
-    text="🎉 Enviar Parabéns por Meta", 
-    command=lambda: executar_script('EnviarParabens.py')
-)
-button_parabens.pack(fill='x', pady=5)
-
-button_lembretes = ttk.Button(
-    main_frame, 
-    text="🔔 Enviar Lembretes de Meta", 
-    command=lambda: executar_script('EnviarLembreteMeta.py')
-)
-button_lembretes.pack(fill='x', pady=5)
+# =============================================================================
+# PROCESSO TRABALHADOR
+# =============================================================================
+def trabalhador_painel(tarefas: multiprocessing.Queue, eventos: multiprocessing.Queue):
+    """Importa o motor uma vez e executa as campanhas recebidas até receber None."""
+    import motor_campanhas
+    # Pré-aquece também o que o motor só importa na hora de carregar a planilha.
+    import cache_planilha, leitura_streaming, renderizacao, tqdm  # noqa: F401
+
+    motor_campanhas.configurar_logging('painel')
+    eventos.put({'tipo': 'pronto'})
+    for tarefa in iter(tarefas.get, None):
+        eventos.put({'tipo': 'inicio', 'id': tarefa['id'], 'campanhas': tarefa['campanhas']})
+        try:
+            resultados = motor_campanhas.executar_campanhas(tarefa['campanhas'])
+            eventos.put({'tipo': 'fim', 'id': tarefa['id'], 'resultados': resultados})
+        except Exception as e:
+            logging.critical(f"Erro fatal na tarefa do painel {tarefa['campanhas']}: {e}", exc_info=True)
+            eventos.put({'tipo': 'erro', 'id': tarefa['id'], 'erro': str(e)})
 
-button_sair = ttk.Button(
-    main_frame, 
-    text="Sair", 
-    command=root.destroy
-)
-button_sair.pack(side='bottom', pady=(20, 0))
+# =============================================================================
+# INTERFACE GRÁFICA
+# =============================================================================
+class Painel:
+    def __init__(self, root: tk.Tk):
+        self.root = root
+        self.tarefas: multiprocessing.Queue = multiprocessing.Queue()
+        self.eventos: multiprocessing.Queue = multiprocessing.Queue()
+        # Não é daemon: com vários remetentes o motor abre os próprios processos filhos.
+        self.processo = multiprocessing.Process(target=trabalhador_painel, args=(self.tarefas, self.eventos))
+        self.processo.start()
+
+        self.outbox: Optional[Outbox] = None
+        self.proximo_id = 1
+        self.na_fila = 0
+        self.atual: Optional[Dict] = None
+        self.amostras: List[tuple] = []   # (instante, itens concluídos) para a vazão
+
+        self.status = tk.StringVar(value="⏳ Preparando o motor de campanhas...")
+        self.detalhe = tk.StringVar(value="")
+        self._montar()
+        self.root.protocol("WM_DELETE_WINDOW", self.fechar)
+        self.root.after(ConfigPainel.INTERVALO_ATUALIZACAO_MS, self.atualizar)
+
+    def _montar(self):
+        self.root.title("Central de Automação de Vendas")
+        self.root.geometry("420x430")
+        self.root.resizable(False, False)
+
+        style = ttk.Style()
+        style.configure('TButton', font=('Helvetica', 12), padding=10)
+
+        main_frame = ttk.Frame(self.root, padding="20 20 20 20")
+        main_frame.pack(expand=True, fill='both')
+        ttk.Label(main_frame, text="Central de Automação ", font=("Helvetica", 18, "bold")).pack(pady=(0, 20))
+
+        for texto, campanhas in ConfigPainel.BOTOES:
+            ttk.Button(main_frame, text=texto,
+                       command=lambda campanhas=campanhas: self.enviar_tarefa(campanhas)).pack(fill='x', pady=5)
+
+        ttk.Label(main_frame, textvariable=self.status).pack(fill='x', pady=(15, 0))
+        self.barra = ttk.Progressbar(main_frame, mode='determinate', maximum=1)
+        self.barra.pack(fill='x', pady=5)
+        ttk.Label(main_frame, textvariable=self.detalhe).pack(fill='x')
+
+        ttk.Button(main_frame, text="Sair", command=self.fechar).pack(side='bottom', pady=(20, 0))
+
+    def enviar_tarefa(self, campanhas: List[str]):
+        if not self.processo.is_alive():
+            messagebox.showerror("Erro de Execução", "O processo de envio foi encerrado. Reabra o painel.")
+            return
+        self.tarefas.put({'id': self.proximo_id, 'campanhas': campanhas})
+        self.proximo_id += 1
+        self.na_fila += 1
+        print(f"▶️  Campanha na fila: {', '.join(campanhas)}")
+        if self.atual is None: self.status.set(f"🕒 Na fila: {', '.join(campanhas)}")
+
+    def _tratar_evento(self, evento: Dict):
+        tipo = evento['tipo']
+        if tipo == 'pronto':
+            if self.atual is None and not self.na_fila: self.status.set("✅ Pronto para enviar.")
+        elif tipo == 'inicio':
+            self.na_fila -= 1
+            self.atual = evento
+            self.amostras = []
+            self.status.set(f"🚀 Enviando: {', '.join(evento['campanhas'])}")
+        elif tipo == 'fim':
+            resultados = evento['resultados'] or {}
+            sucessos = sum(r.get('sucessos', 0) for r in resultados.values())
+            falhas = sum(r.get('falhas', 0) for r in resultados.values())
+            self.status.set(f"✅ Concluído: {', '.join(self.atual['campanhas'])}")
+            self.detalhe.set(f"{sucessos} enviados, {falhas} falhas")
+            self.atual = None
+        elif tipo == 'erro':
+            self.status.set(f"❌ Erro: {', '.join(self.atual['campanhas'])}")
+            messagebox.showerror("Erro de Execução", f"Falha ao executar a campanha:\n{evento['erro']}")
+            self.atual = None
+
+    def _progresso(self):
+        """Atualiza a barra e a vazão com a contagem de hoje no outbox."""
+        if self.outbox is None:
+            self.outbox = Outbox()
+        concluidos, total = 0, 0
+        for campanha in self.atual['campanhas']:
+            contagem = self.outbox.contagem(campanha)
+            concluidos += contagem.get('ENVIADO', 0) + contagem.get('FALHA', 0)
+            total += sum(contagem.values())
+        agora = time.monotonic()
+        self.amostras = [a for a in self.amostras if agora - a[0] <= ConfigPainel.JANELA_VAZAO] + [(agora, concluidos)]
+        inicio, feitos_inicio = self.amostras[0]
+        vazao = (concluidos - feitos_inicio) / (agora - inicio) * 60 if agora > inicio else 0.0
+        self.barra.configure(maximum=max(total, 1), value=concluidos)
+        self.detalhe.set(f"{concluidos}/{total} mensagens  •  {vazao:.1f} msg/min")
+
+    def atualizar(self):
+        try:
+            while True:
+                self._tratar_evento(self.eventos.get_nowait())
+        except queue.Empty:
+            pass
+        if self.atual is not None:
+            self._progresso()
+        elif not self.processo.is_alive():
+            self.status.set("❌ Processo de envio encerrado.")
+        self.root.after(ConfigPainel.INTERVALO_ATUALIZACAO_MS, self.atualizar)
+
+    def fechar(self):
+        if self.atual is not None and not messagebox.askyesno(
+                "Sair", "Há uma campanha em andamento. O que não foi enviado fica no outbox. Sair mesmo assim?"):
+            return
+        if self.atual is not None or self.na_fila:
+            self.processo.terminate()
+        else:
+            self.tarefas.put(None)
+        self.processo.join(timeout=5)
+        if self.outbox is not None: self.outbox.fechar()
+        self.root.destroy()
 
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main():
+    root = tk.Tk()
+    Painel(root)
+    root.mainloop()
 
-root.mainloop()
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# =============================================================================
+# REMETENTES (VÁRIAS CONTAS DE ENVIO EM PARALELO)
+# =============================================================================
+# Com uma única conta, a vazão total fica presa ao ritmo seguro dela. Aqui
+# cada remetente declarado em campanhas.json ("remetentes") tem seu próprio
+# transporte (perfil de navegador ou credenciais da API) e seu próprio
+# limitador, e roda em um processo separado.
+#
+# A divisão dos contatos usa rendezvous hashing (maior hash entre telefone e
+# nome da conta): o mesmo telefone cai sempre no mesmo remetente, e incluir
+# ou retirar uma conta só move os contatos dela.
+#
+#   "remetentes": [
+#     {"nome": "loja_centro", "transporte": {"backend": "sessao", "perfil": "perfil_centro"},
+#      "limitador": {"limite_por_minuto": 6, "limite_por_hora": 200}},
+#     {"nome": "api", "transporte": {"backend": "http", "phone_id": "123", "token": "$TOKEN_API"}}
+#   ]
+#
+# Um remetente com "reserva": true só envia quando o agendador (agendador.py)
+# prevê que sem ele algum prazo não será cumprido.
+#
+# Textos começando com '$' são lidos da variável de ambiente correspondente,
+# para as credenciais não ficarem no arquivo.
+# =============================================================================
+import hashlib
+import os
+from typing import Any, Dict, Iterable, List
+
+def _expandir(valor: Any) -> Any:
+    if isinstance(valor, str) and valor.startswith('$'):
+        return os.environ.get(valor[1:], '')
+    return valor
+
+def carregar_remetentes(configuracao: Dict, incluir_reserva: bool = False) -> List[Dict]:
+    """Normaliza a lista de remetentes de campanhas.json (vazia = envio por uma conta só).
+
+    Os remetentes de reserva só entram com `incluir_reserva`.
+    """
+    remetentes = []
+    for indice, remetente in enumerate(configuracao.get('remetentes') or []):
+        nome = remetente.get('nome') or f'remetente{indice + 1}'
+        transporte = {**configuracao.get('transporte', {}), **remetente.get('transporte', {})}
+        remetentes.append({
+            'nome': nome,
+            'transporte': {chave: _expandir(valor) for chave, valor in transporte.items()},
+            'limitador': dict(remetente.get('limitador', {})),
+            'reserva': bool(remetente.get('reserva', False)),
+        })
+    nomes = [r['nome'] for r in remetentes]
+    if len(set(nomes)) != len(nomes):
+        raise ValueError(f"Nomes de remetentes repetidos em campanhas.json: {', '.join(nomes)}")
+    return remetentes if incluir_reserva else [r for r in remetentes if not r['reserva']]
+
+def _peso(telefone: str, remetente: str) -> bytes:
+    return hashlib.blake2b(f"{remetente}|{telefone}".encode('utf-8'), digest_size=8).digest()
+
+def atribuir_remetente(telefone: str, nomes: List[str]) -> str:
+    """Remetente responsável pelo telefone (sempre o mesmo para a mesma lista de contas)."""
+    return max(nomes, key=lambda nome: _peso(telefone, nome))
+
+def atribuir_remetentes(telefones: Iterable[str], nomes: List[str]) -> List[str]:
+    """Atribui um remetente a cada telefone; telefones repetidos reaproveitam o cálculo."""
+    cache: Dict[str, str] = {}
+    atribuidos = []
+    for telefone in telefones:
+        remetente = cache.get(telefone)
+        if remetente is None:
+            remetente = cache[telefone] = atribuir_remetente(telefone, nomes)
+        atribuidos.append(remetente)
+    return atribuidos
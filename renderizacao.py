@@ -0,0 +1,176 @@
+# =============================================================================
+# RENDERIZAÇÃO DE MENSAGENS EM LOTE
+# =============================================================================
+# Em vez de iterrows() + template.format() linha a linha (com cinco chamadas de
+# formatar_moeda_brasileira por loja), cada coluna é formatada uma única vez
+# para todas as linhas e o template é compilado uma vez só. O resultado é um
+# array com todas as mensagens da campanha, na mesma ordem do DataFrame.
+#
+#   python renderizacao.py --linhas 100000    # benchmark do relatório
+# =============================================================================
+import argparse
+import datetime
+import string
+import time
+from functools import lru_cache
+from itertools import repeat
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Troca os separadores do padrão americano (1,234.56) para o brasileiro (1.234,56).
+_TROCA_SEPARADORES = str.maketrans(',.', '.,')
+
+TEMPLATE_PARABENS_PADRAO = "Ei {Nome}, Parabéns por bater a sua meta diária! 🎉"
+
+# =============================================================================
+# FORMATAÇÃO
+# =============================================================================
+def formatar_moeda_brasileira(valor: Any) -> str:
+    """Formata um único valor monetário no padrão brasileiro de forma segura."""
+    return formatar_moeda_vetorizado([valor])[0]
+
+def _para_numerico(valores) -> np.ndarray:
+    """Converte para float aceitando textos com vírgula decimal; inválidos e vazios viram 0."""
+    serie = pd.Series(valores)
+    if not pd.api.types.is_numeric_dtype(serie):
+        serie = serie.astype(str).str.replace(',', '.', regex=False)
+    numeros = pd.to_numeric(serie, errors='coerce').to_numpy(dtype=float)
+    return np.where(np.isnan(numeros), 0.0, numeros)
+
+def _formatar_todos(formato: str, numeros: np.ndarray, traducao=None) -> np.ndarray:
+    # Uma única chamada de format() sobre o formato repetido, seguida de um translate e um split:
+    # nenhuma chamada Python por linha.
+    if not len(numeros): return np.array([], dtype=object)
+    texto = ((formato + '\n') * len(numeros)).format(*numeros.tolist())
+    if traducao: texto = texto.translate(traducao)
+    return np.array(texto.split('\n')[:-1], dtype=object)
+
+def formatar_moeda_vetorizado(valores) -> np.ndarray:
+    """Formata uma coluna inteira como moeda brasileira ('R$ 1.234,56')."""
+    return _formatar_todos('R$ {:,.2f}', _para_numerico(valores), _TROCA_SEPARADORES)
+
+def formatar_percentual_vetorizado(valores) -> np.ndarray:
+    """Formata frações (0.1234) como percentual com duas casas ('12.34')."""
+    # printf-style é um pouco mais rápido que format() quando não há separador de milhar.
+    numeros = _para_numerico(valores) * 100
+    if not len(numeros): return np.array([], dtype=object)
+    return np.array((('%.2f\n' * len(numeros)) % tuple(numeros.tolist())).split('\n')[:-1], dtype=object)
+
+# =============================================================================
+# TEMPLATE
+# =============================================================================
+@lru_cache(maxsize=32)
+def compilar_template(template: str) -> Tuple[Tuple[str, ...], Tuple[Tuple[str, str], ...]]:
+    """Quebra o template em trechos literais e campos: '{Nome}, meta {Meta}' -> ('', ', meta ', ''), (('Nome', '{}'), ...).
+
+    Cada campo vem com o formato a aplicar ('{}' quando não há especificação nem conversão).
+    Há sempre um literal a mais que campos.
+    """
+    literais: List[str] = []
+    campos: List[Tuple[str, str]] = []
+    atual = ''
+    for literal, campo, especificacao, conversao in string.Formatter().parse(template):
+        atual += literal
+        if campo is None: continue
+        literais.append(atual)
+        atual = ''
+        campos.append((campo, '{%s%s}' % (f'!{conversao}' if conversao else '',
+                                          f':{especificacao}' if especificacao else '')))
+    literais.append(atual)
+    return tuple(literais), tuple(campos)
+
+def _coluna(valor: Any, formato: str, total: int):
+    # Colunas já formatadas passam direto; escalares se repetem sem criar uma lista por linha.
+    if isinstance(valor, (np.ndarray, pd.Series, list)):
+        if formato == '{}': return list(map(str, valor))
+        return _formatar_todos(formato, np.asarray(valor, dtype=object)).tolist()
+    return repeat(formato.format(valor), total)
+
+def renderizar_lote(template: str, campos: Dict[str, Any], total: int) -> List[str]:
+    """Aplica o template a todas as linhas de uma vez. Valores escalares valem para todas."""
+    literais, nomes = compilar_template(template)
+    faltando = [nome for nome, _ in nomes if nome not in campos]
+    if faltando:
+        raise KeyError(f"Template usa campos sem valor: {', '.join(faltando)}")
+
+    # Intercala literais e colunas e junta linha a linha com ''.join: bem mais rápido que um
+    # str.format por linha, porque o template não é reinterpretado a cada mensagem.
+    pecas: List[Any] = [repeat(literais[0], total)]
+    for (nome, formato), literal in zip(nomes, literais[1:]):
+        pecas.append(_coluna(campos[nome], formato, total))
+        if literal: pecas.append(repeat(literal, total))
+    return list(map(''.join, zip(*pecas)))
+
+# =============================================================================
+# CAMPOS POR TIPO DE CAMPANHA
+# =============================================================================
+def _nomes(df: pd.DataFrame, padrao: str) -> np.ndarray:
+    return df['primeiro_nome'].fillna(padrao).astype(str).to_numpy(dtype=object)
+
+def campos_relatorio(df: pd.DataFrame) -> Dict[str, Any]:
+    return {
+        'Nome': _nomes(df, 'Cliente'),
+        'data_atual': datetime.date.today().strftime('%d/%m/%Y'),
+        'Faturado_mes': formatar_moeda_vetorizado(df['Faturado_mes']),
+        'Meta': formatar_moeda_vetorizado(df['Meta']),
+        'Alcance': formatar_percentual_vetorizado(df['Alcance']),
+        'falta_meta_mes': formatar_moeda_vetorizado(df['falta_meta_mes']),
+        'Fat_Projetado': formatar_moeda_vetorizado(df['Fat_Projetado']),
+        'Pct_Projetado': formatar_percentual_vetorizado(df['Pct_Projetado']),
+        'Meta_diaria': formatar_moeda_vetorizado(df['Meta_diaria']),
+    }
+
+def campos_parabens(df: pd.DataFrame) -> Dict[str, Any]:
+    return {'Nome': _nomes(df, 'N/A')}
+
+def campos_lembrete(df: pd.DataFrame) -> Dict[str, Any]:
+    return {'Nome': _nomes(df, 'N/A'), 'Falta_Meta_Dia': formatar_percentual_vetorizado(df['Falta_Meta_Dia'])}
+
+# Tipo de campanha -> (função que monta os campos, template padrão quando a campanha não define um)
+RENDERIZADORES: Dict[str, Tuple[Callable[[pd.DataFrame], Dict[str, Any]], Optional[str]]] = {
+    'relatorio': (campos_relatorio, None),
+    'parabens': (campos_parabens, TEMPLATE_PARABENS_PADRAO),
+    'lembrete': (campos_lembrete, None),
+}
+
+def renderizar_campanha(tipo: str, template: Optional[str], df: pd.DataFrame) -> List[str]:
+    """Gera todas as mensagens de uma campanha em uma passada."""
+    montar_campos, template_padrao = RENDERIZADORES[tipo]
+    template = template or template_padrao
+    if not template:
+        raise ValueError(f"Campanha do tipo '{tipo}' precisa de um template")
+    return renderizar_lote(template, montar_campos(df), len(df))
+
+# =============================================================================
+# BENCHMARK
+# =============================================================================
+def _planilha_sintetica(linhas: int) -> pd.DataFrame:
+    aleatorio = np.random.default_rng(42)
+    return pd.DataFrame({
+        'primeiro_nome': [f'Vendedor{i}' for i in range(linhas)],
+        'Faturado_mes': aleatorio.uniform(0, 500_000, linhas),
+        'Meta': aleatorio.uniform(50_000, 600_000, linhas),
+        'Alcance': aleatorio.uniform(0, 1.5, linhas),
+        'falta_meta_mes': aleatorio.uniform(0, 300_000, linhas),
+        'Fat_Projetado': aleatorio.uniform(0, 700_000, linhas),
+        'Pct_Projetado': aleatorio.uniform(0, 1.5, linhas),
+        'Meta_diaria': aleatorio.uniform(100, 20_000, linhas),
+    })
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark da renderização em lote do relatório diário.")
+    parser.add_argument('--linhas', type=int, default=100_000)
+    parser.add_argument('--template', default='message.txt')
+    args = parser.parse_args()
+
+    with open(args.template, 'r', encoding='utf-8') as f:
+        template = f.read()
+    df = _planilha_sintetica(args.linhas)
+
+    inicio = time.perf_counter()
+    mensagens = renderizar_campanha('relatorio', template, df)
+    duracao = time.perf_counter() - inicio
+    print(f"⏱️  {len(mensagens)} mensagens renderizadas em {duracao:.3f}s "
+          f"({len(mensagens) / duracao:,.0f} msg/s)")
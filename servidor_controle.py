@@ -0,0 +1,392 @@
+# =============================================================================
+# SERVIÇO DE CONTROLE HTTP
+# =============================================================================
+# Um serviço local que recebe pedidos de execução das campanhas e mostra o
+# andamento de cada um, sem abrir um processo novo por pedido: a planilha
+# preparada fica em memória (recarregada só quando o arquivo muda) e os
+# transportes ficam abertos entre um trabalho e outro (o navegador da sessão
+# web continua logado, o http reaproveita a configuração).
+#
+#   python servidor_controle.py                       # http://127.0.0.1:8780
+#
+#   POST /trabalhos {"campanhas": ["relatorios"]}      -> 202 + id do trabalho
+#   GET  /trabalhos, /trabalhos/<id>                   -> estado, progresso, vazão
+#   GET  /trabalhos/<id>/eventos                       -> progresso ao vivo (SSE)
+#   GET  /campanhas, /saude
+#
+# No máximo MAX_TRABALHOS rodam ao mesmo tempo; os demais esperam na fila (até
+# MAX_FILA). Com um transporte de conta única (sessao, pywhatkit) os envios
+# dos trabalhos se revezam no mesmo transporte; com remetentes declarados cada
+# trabalho usa os processos dos remetentes, como no motor.
+# =============================================================================
+import argparse
+import itertools
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from flask import Flask, Response, abort, jsonify, request, stream_with_context
+
+import metricas
+from agendador import Agendador
+from limitador import criar_limitador
+from motor_campanhas import (ConfigMotor, Despachante, carregar_configuracao, carregar_e_preparar_dados,
+                             configurar_logging, enfileirar_campanha, enviar_pendentes, processar_outbox,
+                             relatar_campanhas, selecionar_campanhas)
+from outbox import Outbox, abrir_outbox
+from remetentes import carregar_remetentes
+from transporte import criar_transporte
+
+# =============================================================================
+# CONFIGURAÇÕES DO SERVIÇO
+# =============================================================================
+class ConfigServidor:
+    HOST = os.environ.get('AUTOSENDER_HOST_CONTROLE', '127.0.0.1')
+    PORTA = int(os.environ.get('AUTOSENDER_PORTA_CONTROLE', '8780'))
+    MAX_TRABALHOS = int(os.environ.get('AUTOSENDER_MAX_TRABALHOS', '2'))   # executando ao mesmo tempo
+    MAX_FILA = 20                 # trabalhos esperando; acima disso o pedido é recusado (429)
+    INTERVALO_PROGRESSO = 1.0     # segundos entre eventos SSE
+    JANELA_VAZAO = 30             # segundos considerados no cálculo da vazão
+    TRABALHOS_GUARDADOS = 100     # concluídos mantidos para consulta
+
+# Backends que aceitam envios simultâneos de trabalhos diferentes (um transporte por trabalho).
+BACKENDS_CONCORRENTES = {'http', 'nulo'}
+
+# =============================================================================
+# TRABALHOS
+# =============================================================================
+class Trabalho:
+    """Um pedido de execução e o seu andamento."""
+
+    def __init__(self, id_trabalho: int, campanhas: List[str]):
+        self.id = id_trabalho
+        self.campanhas = campanhas
+        self.estado = 'na_fila'       # na_fila -> planejando -> enviando -> concluido | erro
+        self.criado_em = time.time()
+        self.inicio: Optional[float] = None
+        self.fim: Optional[float] = None
+        self.erro: Optional[str] = None
+        self.resultados: Dict[str, Dict[str, int]] = {}
+        self.base: Dict[str, int] = {}        # concluídos no outbox (por campanha) quando o envio começou
+        self.total = 0                        # mensagens a enviar neste trabalho
+        self.concluidos = 0
+        self.amostras: List[Tuple[float, int]] = []
+
+    @property
+    def terminado(self) -> bool:
+        return self.estado in ('concluido', 'erro')
+
+    def atualizar_progresso(self, concluidos: int):
+        agora = time.monotonic()
+        self.concluidos = min(concluidos, self.total) if self.total else concluidos
+        self.amostras = [a for a in self.amostras if agora - a[0] <= ConfigServidor.JANELA_VAZAO]
+        self.amostras.append((agora, self.concluidos))
+
+    def vazao(self) -> float:
+        """Mensagens concluídas por minuto na janela recente."""
+        if len(self.amostras) < 2: return 0.0
+        (inicio, feitos_inicio), (fim, feitos_fim) = self.amostras[0], self.amostras[-1]
+        return (feitos_fim - feitos_inicio) / (fim - inicio) * 60 if fim > inicio else 0.0
+
+    def como_dict(self) -> Dict:
+        return {
+            'id': self.id, 'campanhas': self.campanhas, 'estado': self.estado,
+            'criado_em': self.criado_em, 'inicio': self.inicio, 'fim': self.fim,
+            'duracao_s': round((self.fim or time.time()) - self.inicio, 1) if self.inicio else None,
+            'progresso': {'concluidos': self.concluidos, 'total': self.total},
+            'vazao_msg_min': round(self.vazao(), 1), 'resultados': self.resultados, 'erro': self.erro,
+        }
+
+# =============================================================================
+# SERVIÇO
+# =============================================================================
+class Servico:
+    """Fila de trabalhos, planilha em memória e transportes abertos entre os pedidos."""
+
+    def __init__(self, caminho_config: str = ConfigMotor.ARQUIVO_CAMPANHAS,
+                 max_trabalhos: int = ConfigServidor.MAX_TRABALHOS):
+        self.caminho_config = caminho_config
+        self.configuracao = carregar_configuracao(caminho_config)
+        self.remetentes = carregar_remetentes(self.configuracao)
+        self.executor = ThreadPoolExecutor(max_workers=max_trabalhos, thread_name_prefix='trabalho')
+        self.trabalhos: Dict[int, Trabalho] = {}
+        self._ids = itertools.count(1)
+        self._trava = threading.Lock()
+
+        self._trava_planilha = threading.Lock()
+        self._planilha: Optional[Tuple[Tuple[int, int], object]] = None   # (assinatura do arquivo, DataFrame)
+
+        # Transportes abertos uma vez e emprestados aos trabalhos. É tudo a mesma conta, então
+        # os despachantes dividem um só limitador: os tetos por minuto e por hora valem para a soma.
+        self._despachantes: 'queue.Queue[Despachante]' = queue.Queue()
+        self._abertos: List[Despachante] = []
+        if not self.remetentes:
+            limitador = None
+            while not self._abertos or (len(self._abertos) < max_trabalhos
+                                        and self._abertos[0].transporte.nome in BACKENDS_CONCORRENTES):
+                transporte = criar_transporte(**self.configuracao['transporte']).__enter__()
+                limitador = limitador or criar_limitador(transporte.nome)
+                despachante = Despachante(transporte, limitador)
+                self._abertos.append(despachante)
+                self._despachantes.put(despachante)
+
+        self._outbox_leitura = Outbox()
+        self._trava_outbox = threading.Lock()
+
+    # ---- planilha ------------------------------------------------------------
+    def planilha(self):
+        """A planilha preparada, relida só quando o arquivo (ou o registro de vendas) muda."""
+        arquivo, aba = self.configuracao['planilha']['arquivo'], self.configuracao['planilha']['aba']
+        vendas = self.configuracao['planilha'].get('vendas')
+        with self._trava_planilha:
+            try:
+                estado = Path(arquivo).stat()
+                assinatura = (estado.st_mtime_ns, estado.st_size)
+                # Com o registro de vendas, cada venda gravada também recalcula as metas (só o que é novo é lido).
+                if vendas:
+                    from metas_vendas import assinatura_vendas
+                    assinatura = (assinatura, assinatura_vendas(vendas))
+            except FileNotFoundError:
+                assinatura = None
+            if self._planilha is None or self._planilha[0] != assinatura:
+                df = carregar_e_preparar_dados(arquivo, aba, vendas)
+                self._planilha = (assinatura, df)
+            return self._planilha[1]
+
+    def aquecer(self):
+        """Carrega a planilha em segundo plano, para o primeiro pedido já encontrá-la pronta."""
+        threading.Thread(target=self._aquecer, name='aquecimento', daemon=True).start()
+
+    def _aquecer(self):
+        try:
+            self.planilha()
+            logging.info("Planilha carregada em memória.")
+        except Exception as e:
+            logging.warning(f"Não foi possível pré-carregar a planilha: {e}")
+
+    # ---- outbox (leituras do progresso) --------------------------------------
+    def contagens(self, campanhas: List[str]) -> Dict[str, Dict[str, int]]:
+        with self._trava_outbox:
+            return {nome: self._outbox_leitura.contagem(nome) for nome in campanhas}
+
+    @staticmethod
+    def _concluidos(contagens: Dict[str, Dict[str, int]]) -> Dict[str, int]:
+        return {nome: contagem.get('ENVIADO', 0) + contagem.get('FALHA', 0) for nome, contagem in contagens.items()}
+
+    def progresso(self, trabalho: Trabalho):
+        if trabalho.estado != 'enviando': return
+        atuais = self._concluidos(self.contagens(trabalho.campanhas))
+        trabalho.atualizar_progresso(sum(atuais[nome] - trabalho.base.get(nome, 0) for nome in atuais))
+
+    # ---- trabalhos -----------------------------------------------------------
+    def enfileirar(self, nomes: Optional[List[str]]) -> Trabalho:
+        campanhas = [c['nome'] for c in selecionar_campanhas(self.configuracao, nomes)]
+        with self._trava:
+            na_fila = sum(1 for t in self.trabalhos.values() if t.estado == 'na_fila')
+            if na_fila >= ConfigServidor.MAX_FILA:
+                raise OverflowError(f"Fila cheia ({na_fila} trabalhos esperando).")
+            trabalho = Trabalho(next(self._ids), campanhas)
+            self.trabalhos[trabalho.id] = trabalho
+            self._descartar_antigos()
+        logging.info(f"Trabalho {trabalho.id} na fila: {', '.join(campanhas)}")
+        self.executor.submit(self._executar, trabalho)
+        return trabalho
+
+    def _descartar_antigos(self):
+        terminados = [t for t in self.trabalhos.values() if t.terminado]
+        for trabalho in terminados[:-ConfigServidor.TRABALHOS_GUARDADOS]:
+            del self.trabalhos[trabalho.id]
+
+    def _executar(self, trabalho: Trabalho):
+        # Cada trabalho tem o seu coletor: trabalhos simultâneos não misturam fases e contadores,
+        # e cada um exporta só o que fez, medido desde o próprio início.
+        with metricas.coletor_proprio() as coletor:
+            self._executar_trabalho(trabalho, coletor)
+        logging.info(f"Trabalho {trabalho.id} terminado: {trabalho.estado}.")
+
+    def _executar_trabalho(self, trabalho: Trabalho, coletor: metricas.ColetorMetricas):
+        trabalho.inicio = time.time()
+        trabalho.estado = 'planejando'
+        campanhas = selecionar_campanhas(self.configuracao, trabalho.campanhas)
+        try:
+            df = self.planilha()
+            if df is None or df.empty:
+                raise ValueError("Nenhum dado válido na planilha.")
+            resultados = {}
+            with abrir_outbox() as outbox:
+                nomes_remetentes = [r['nome'] for r in self.remetentes]
+                for campanha in campanhas:
+                    with metricas.campanha_atual(campanha['nome']):
+                        resultados[campanha['nome']] = enfileirar_campanha(df, campanha, outbox, nomes_remetentes)
+
+                contagens = self.contagens(trabalho.campanhas)
+                trabalho.base = self._concluidos(contagens)
+                trabalho.total = sum(c.get('PENDENTE', 0) + c.get('EM_ENVIO', 0) for c in contagens.values())
+                trabalho.estado = 'enviando'
+                enviados, vazao = self._enviar(campanhas, outbox)
+
+            for nome, (sucessos, falhas) in enviados.items():
+                resultados[nome]['sucessos'] += sucessos
+                resultados[nome]['falhas'] += falhas
+            relatar_campanhas(campanhas, resultados, vazao)
+            self.progresso(trabalho)
+            trabalho.resultados = resultados
+            trabalho.estado = 'concluido'
+        except Exception as e:
+            logging.error(f"Trabalho {trabalho.id} ({', '.join(trabalho.campanhas)}) falhou: {e}", exc_info=True)
+            trabalho.erro = str(e)
+            trabalho.estado = 'erro'
+        finally:
+            trabalho.fim = time.time()
+            try:
+                coletor.exportar(sufixo=f"_trabalho{trabalho.id}")
+            except OSError as e:
+                logging.error(f"Não foi possível exportar as métricas: {e}")
+
+    def _enviar(self, campanhas: List[Dict], outbox: Outbox) -> Tuple[Dict[str, Tuple[int, int]], float]:
+        if self.remetentes:
+            return enviar_pendentes(self.configuracao, campanhas, outbox)
+        agendador = Agendador(self.configuracao, campanhas)
+        agendador.planejar(outbox)
+        # Espera um transporte livre: com um só (sessão web), os trabalhos se revezam nele.
+        despachante = self._despachantes.get()
+        # O transporte já está aberto: a escala decidida pelo agendador é aplicada a ele aqui,
+        # como o enviar_pendentes faz ao abrir o seu, e desfeita na devolução.
+        em_voo = getattr(despachante.transporte, 'max_em_voo', None)
+        if em_voo is not None:
+            despachante.transporte.max_em_voo = max(em_voo, agendador.transporte.get('max_em_voo', em_voo))
+        limitador = despachante.limitador
+        if 'taxa_inicial' in agendador.limitador:
+            # Limitador compartilhado: só sobe a taxa atual, sem mexer nos tetos da conta.
+            limitador.taxa = max(limitador.taxa, min(limitador.taxa_maxima, agendador.limitador['taxa_inicial']))
+        try:
+            sucessos_antes = despachante.limitador.sucessos
+            enviados = processar_outbox(outbox, despachante, agendador.campanhas, agrupar=self.configuracao['agrupar'],
+                                        agendador=agendador)
+            agendador.registrar_vazao(despachante.limitador.vazao(), despachante.limitador.sucessos - sucessos_antes)
+            return enviados, despachante.limitador.vazao()
+        finally:
+            if em_voo is not None: despachante.transporte.max_em_voo = em_voo
+            self._despachantes.put(despachante)
+
+    def fechar(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        for despachante in self._abertos:
+            despachante.transporte.__exit__(None, None, None)
+        self._outbox_leitura.fechar()
+
+# =============================================================================
+# APLICAÇÃO FLASK
+# =============================================================================
+def criar_app(servico: Servico) -> Flask:
+    app = Flask(__name__)
+    app.json.ensure_ascii = False
+
+    def buscar(id_trabalho: int) -> Trabalho:
+        trabalho = servico.trabalhos.get(id_trabalho)
+        if trabalho is None: abort(404, description=f"Trabalho {id_trabalho} não encontrado.")
+        return trabalho
+
+    @app.errorhandler(404)
+    @app.errorhandler(400)
+    def erro_http(erro):
+        return jsonify({'erro': erro.description}), erro.code
+
+    @app.get('/saude')
+    def saude():
+        ativos = [t.id for t in servico.trabalhos.values() if not t.terminado]
+        return jsonify({'ok': True, 'trabalhos_ativos': ativos, 'remetentes': [r['nome'] for r in servico.remetentes],
+                        'transportes': [d.transporte.nome for d in servico._abertos],
+                        'planilha_em_memoria': servico._planilha is not None})
+
+    @app.get('/campanhas')
+    def campanhas():
+        nomes = [c['nome'] for c in servico.configuracao.get('campanhas', [])]
+        contagens = servico.contagens(nomes)
+        return jsonify([{'nome': c['nome'], 'titulo': c.get('titulo', c['nome']), 'tipo': c['tipo'],
+                         'prazo': c.get('prazo'), 'outbox_hoje': contagens[c['nome']]}
+                        for c in servico.configuracao.get('campanhas', [])])
+
+    @app.post('/trabalhos')
+    def criar_trabalho():
+        corpo = request.get_json(silent=True) or {}
+        nomes = corpo.get('campanhas')
+        if isinstance(nomes, str): nomes = [nomes]
+        if nomes is not None and not (isinstance(nomes, list) and all(isinstance(nome, str) for nome in nomes)):
+            abort(400, description="'campanhas' deve ser um nome ou uma lista de nomes de campanhas.")
+        try:
+            trabalho = servico.enfileirar(nomes)
+        except ValueError as e:
+            abort(400, description=str(e))
+        except OverflowError as e:
+            return jsonify({'erro': str(e)}), 429
+        resposta = jsonify(trabalho.como_dict())
+        resposta.status_code = 202
+        resposta.headers['Location'] = f'/trabalhos/{trabalho.id}'
+        return resposta
+
+    @app.get('/trabalhos')
+    def listar_trabalhos():
+        for trabalho in list(servico.trabalhos.values()): servico.progresso(trabalho)
+        return jsonify([t.como_dict() for t in list(servico.trabalhos.values())])
+
+    @app.get('/trabalhos/<int:id_trabalho>')
+    def consultar_trabalho(id_trabalho: int):
+        trabalho = buscar(id_trabalho)
+        servico.progresso(trabalho)
+        return jsonify(trabalho.como_dict())
+
+    @app.get('/trabalhos/<int:id_trabalho>/eventos')
+    def eventos_trabalho(id_trabalho: int):
+        trabalho = buscar(id_trabalho)
+
+        def gerar():
+            # Server-Sent Events: um evento 'progresso' por intervalo e um 'fim' com o resultado.
+            while not trabalho.terminado:
+                servico.progresso(trabalho)
+                yield f"event: progresso\ndata: {json.dumps(trabalho.como_dict(), ensure_ascii=False)}\n\n"
+                time.sleep(ConfigServidor.INTERVALO_PROGRESSO)
+            yield f"event: fim\ndata: {json.dumps(trabalho.como_dict(), ensure_ascii=False)}\n\n"
+
+        return Response(stream_with_context(gerar()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+    return app
+
+# =============================================================================
+# EXECUÇÃO PRINCIPAL
+# =============================================================================
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP local para disparar e acompanhar as campanhas.")
+    parser.add_argument('--config', default=ConfigMotor.ARQUIVO_CAMPANHAS, help="Arquivo de campanhas.")
+    parser.add_argument('--host', default=ConfigServidor.HOST)
+    parser.add_argument('--porta', type=int, default=ConfigServidor.PORTA)
+    parser.add_argument('--max-trabalhos', type=int, default=ConfigServidor.MAX_TRABALHOS,
+                        help="Trabalhos executando ao mesmo tempo.")
+    args = parser.parse_args(argv)
+
+    configurar_logging('servidor')
+    logging.info("=== INÍCIO DO SERVIÇO DE CONTROLE ===")
+    servico = Servico(args.config, max(1, args.max_trabalhos))
+    servico.aquecer()
+    print(f"🌐 Serviço de controle em http://{args.host}:{args.porta}")
+    try:
+        criar_app(servico).run(host=args.host, port=args.porta, threaded=True)
+    finally:
+        servico.fechar()
+        logging.info("=== FIM DO SERVIÇO DE CONTROLE ===")
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        logging.warning("Serviço interrompido pelo usuário.")
+        print("\nServiço encerrado.")
+    except Exception as e:
+        logging.critical(f"Erro fatal não tratado no serviço: {e}", exc_info=True)
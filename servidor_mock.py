@@ -0,0 +1,213 @@
+# =============================================================================
+# SERVIDOR MOCK LOCAL PARA TESTES DE ENVIO
+# =============================================================================
+# Simula o endpoint de mensagens da Cloud API para validar o transporte HTTP
+# sem gastar envios reais, e serve uma réplica da interface do WhatsApp Web
+# (GET / e /send?phone=..., com troca de chat dentro da página pelos links
+# /send?phone=) para o transporte de sessão. Aceita
+# também o upload de imagens (POST /media) usado pelos cartões dos vendedores:
+#
+#   python servidor_mock.py --porta 8765 --latencia 0.2 --taxa-falha 0.05
+#   set AUTOSENDER_TRANSPORTE=http
+#   set AUTOSENDER_API_URL=http://127.0.0.1:8765
+#   python EnviarMensagemVendedores.py
+#
+#   set AUTOSENDER_TRANSPORTE=sessao
+#   set AUTOSENDER_URL_WHATSAPP=http://127.0.0.1:8765
+# =============================================================================
+import argparse
+import html
+import json
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# Réplica mínima da interface de chat: mesmos seletores usados por sessao_web.py.
+PAGINA_CHAT = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>WhatsApp (mock)</title></head>
+<body>
+<div id="pane-side"><div class="chat-list"></div></div>
+<div id="main">__CONTEUDO__</div>
+<script>
+  var sequencia = 0, historico = {};
+  function telefoneAtual() {
+    var cabecalho = document.querySelector('#main header span');
+    return cabecalho ? cabecalho.title : '';
+  }
+  function criarBolha(texto, imagem, icone) {
+    // Como no app: a linha da mensagem tem um data-id novo; a bolha de saída fica dentro dela.
+    var linha = document.createElement('div');
+    linha.setAttribute('data-id', 'true_' + Date.now() + '_' + (++sequencia));
+    var bolha = document.createElement('div');
+    linha.appendChild(bolha);
+    bolha.className = 'message-out';
+    bolha.innerHTML = (imagem ? '<img alt="">' : '') + '<span class="texto"></span><span></span>';
+    if (imagem) bolha.querySelector('img').alt = imagem;
+    bolha.querySelector('.texto').innerText = texto;
+    bolha.lastChild.setAttribute('data-icon', icone);
+    return linha;
+  }
+  function enviarBolha(texto, imagem) {
+    var linha = criarBolha(texto, imagem, 'msg-time');
+    document.getElementById('conversa').appendChild(linha);
+    (historico[telefoneAtual()] = historico[telefoneAtual()] || []).push(texto);
+    // Relógio -> tique depois do atraso configurado (negativo: a mensagem nunca é confirmada).
+    if (__ATRASO_CONFIRMACAO__ >= 0)
+      setTimeout(function () { linha.querySelector('[data-icon]').setAttribute('data-icon', 'msg-check'); },
+                 __ATRASO_CONFIRMACAO__);
+  }
+  function ligarChat() {
+    var caixa = document.querySelector('footer div[contenteditable="true"]');
+    if (caixa) caixa.addEventListener('keydown', function (ev) {
+      if (ev.key !== 'Enter' || ev.shiftKey || !caixa.innerText.trim()) return;
+      ev.preventDefault();
+      enviarBolha(caixa.innerText);
+      caixa.innerText = '';
+    });
+    // Anexo: a imagem escolhida abre a prévia com a caixa de legenda; Enter envia as duas juntas.
+    var entrada = document.querySelector('footer input[type="file"]');
+    if (entrada) entrada.addEventListener('change', function () {
+      var previa = document.createElement('div');
+      previa.className = 'media-preview';
+      previa.innerHTML = '<div contenteditable="true" role="textbox"></div>';
+      document.getElementById('main').appendChild(previa);
+      var legenda = previa.firstChild;
+      legenda.addEventListener('keydown', function (ev) {
+        if (ev.key !== 'Enter' || ev.shiftKey) return;
+        ev.preventDefault();
+        enviarBolha(legenda.innerText, entrada.files[0].name);
+        previa.remove();
+        entrada.value = '';
+      });
+    });
+  }
+  // Navegação dentro do app: um link para /send?phone= troca só o chat, sem recarregar a página.
+  // Como no app, o histórico de um chat já aberto chega depois do chat, acima das mensagens novas.
+  function abrirChat(telefone) {
+    var main = document.getElementById('main');
+    if (telefone.length < 12) { main.innerHTML = __CONTEUDO_INVALIDO__; return; }
+    main.innerHTML = __CONTEUDO_CHAT__.split('__TELEFONE__').join('');
+    main.querySelector('header span').title = main.querySelector('header span').innerText = telefone;
+    ligarChat();
+    var anteriores = (historico[telefone] || []).slice();
+    if (anteriores.length) setTimeout(function () {
+      var conversa = document.getElementById('conversa');
+      anteriores.reverse().forEach(function (texto) {
+        conversa.insertBefore(criarBolha(texto, null, 'msg-dblcheck'), conversa.firstChild);
+      });
+    }, 200);
+  }
+  document.addEventListener('click', function (ev) {
+    var link = ev.target.closest && ev.target.closest('a[href*="/send?phone="]');
+    if (!link) return;
+    ev.preventDefault();
+    var telefone = new URL(link.href).searchParams.get('phone') || '';
+    history.pushState(null, '', link.href);
+    setTimeout(function () { abrirChat(telefone); }, __LATENCIA_MS__);
+  });
+  ligarChat();
+</script>
+</body></html>"""
+
+CONTEUDO_CHAT = """<header><span title="__TELEFONE__">__TELEFONE__</span></header>
+<div id="conversa"></div>
+<footer><input type="file" accept="image/*" style="opacity:0;width:1px">
+<div contenteditable="true" data-tab="10" role="textbox"></div></footer>"""
+
+CONTEUDO_INVALIDO = """<div data-animate-modal-popup="true">
+O número de telefone compartilhado através de url é inválido.</div>"""
+
+class MockHandler(BaseHTTPRequestHandler):
+    latencia = 0.0
+    taxa_falha = 0.0
+    atraso_confirmacao = 0.3   # segundos até o tique de enviada no chat
+    recebidas = 0
+    trava = threading.Lock()
+
+    def _responder(self, status: int, corpo: dict):
+        dados = json.dumps(corpo).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _responder_html(self, pagina: str):
+        dados = pagina.encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(dados)))
+        self.end_headers()
+        self.wfile.write(dados)
+
+    def _pagina(self, conteudo: str) -> str:
+        atraso_ms = int(self.atraso_confirmacao * 1000) if self.atraso_confirmacao >= 0 else -1
+        return (PAGINA_CHAT.replace('__CONTEUDO_CHAT__', json.dumps(CONTEUDO_CHAT))
+                .replace('__CONTEUDO_INVALIDO__', json.dumps(CONTEUDO_INVALIDO))
+                .replace('__CONTEUDO__', conteudo).replace('__ATRASO_CONFIRMACAO__', str(atraso_ms))
+                .replace('__LATENCIA_MS__', str(int(self.latencia * 1000))))
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path.rstrip('/') == '/send':
+            telefone = parse_qs(url.query).get('phone', [''])[0]
+            if self.latencia: time.sleep(self.latencia)
+            conteudo = CONTEUDO_CHAT.replace('__TELEFONE__', html.escape(telefone)) if len(telefone) >= 12 else CONTEUDO_INVALIDO
+            return self._responder_html(self._pagina(conteudo))
+        if url.path in ('', '/'):
+            return self._responder_html(self._pagina(''))
+        self._responder(404, {'error': {'message': f'Rota desconhecida: {self.path}'}})
+
+    def do_POST(self):
+        tamanho = int(self.headers.get('Content-Length', 0))
+        if self.path.rstrip('/').endswith('/media'):
+            # Upload de mídia (multipart): só o tamanho importa para o mock.
+            self.rfile.read(tamanho)
+            if self.latencia: time.sleep(self.latencia)
+            return self._responder(200, {'id': f'midia.{uuid.uuid4().hex}'})
+        try:
+            payload = json.loads(self.rfile.read(tamanho) or b'{}')
+        except json.JSONDecodeError:
+            return self._responder(400, {'error': {'message': 'JSON inválido'}})
+
+        if not self.path.rstrip('/').endswith('/messages'):
+            return self._responder(404, {'error': {'message': f'Rota desconhecida: {self.path}'}})
+        if self.latencia: time.sleep(self.latencia)
+        if random.random() < self.taxa_falha:
+            return self._responder(503, {'error': {'message': 'Falha simulada'}})
+
+        with MockHandler.trava: MockHandler.recebidas += 1
+        self._responder(200, {'messaging_product': 'whatsapp', 'contacts': [{'wa_id': payload.get('to')}],
+                              'messages': [{'id': f'wamid.{uuid.uuid4().hex}'}]})
+
+    def log_message(self, formato, *args):
+        pass
+
+def iniciar_servidor(porta: int = 8765, latencia: float = 0.0, taxa_falha: float = 0.0,
+                     atraso_confirmacao: float = 0.3) -> ThreadingHTTPServer:
+    """Sobe o servidor mock em uma thread de fundo e o retorna."""
+    MockHandler.latencia, MockHandler.taxa_falha = latencia, taxa_falha
+    MockHandler.atraso_confirmacao = atraso_confirmacao
+    servidor = ThreadingHTTPServer(('127.0.0.1', porta), MockHandler)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor mock da API de mensagens e do WhatsApp Web.")
+    parser.add_argument('--porta', type=int, default=8765)
+    parser.add_argument('--latencia', type=float, default=0.0, help="Atraso por requisição, em segundos.")
+    parser.add_argument('--taxa-falha', type=float, default=0.0, help="Fração de requisições que retornam 503.")
+    parser.add_argument('--atraso-confirmacao', type=float, default=0.3,
+                        help="Segundos até o tique de enviada no chat (negativo: nunca confirma).")
+    args = parser.parse_args()
+
+    servidor = iniciar_servidor(args.porta, args.latencia, args.taxa_falha, args.atraso_confirmacao)
+    print(f"🧪 Servidor mock ouvindo em http://127.0.0.1:{args.porta} (Ctrl+C para sair)")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        print(f"\nMensagens recebidas: {MockHandler.recebidas}")
+        servidor.shutdown()
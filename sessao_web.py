@@ -0,0 +1,246 @@
+# =============================================================================
+# SESSÃO PERSISTENTE DO WHATSAPP WEB
+# =============================================================================
+# Abre o WhatsApp Web uma única vez (via Selenium) e reaproveita a mesma aba
+# para todos os envios da execução: nada de abrir/fechar aba por mensagem nem
+# de esperas fixas. Cada envio navega para o chat do destinatário dentro da
+# aba já autenticada e escreve assim que a caixa de mensagem fica disponível.
+# A troca de chat é feita dentro do app (um link /send?phone= clicado na
+# própria página), sem recarregar o WhatsApp Web; só se o chat não abrir assim
+# em TIMEOUT_CHAT_INTERNO a URL é carregada do zero.
+#
+# O envio só conta como sucesso quando a bolha da mensagem aparece na conversa
+# com o tique de enviada (✓) ou entregue (✓✓). A bolha é reconhecida pelo
+# data-id, que não existia antes do Enter, e pelo texto, e precisa ser a
+# última de saída: o histórico que carrega atrasado (acima dela) não confirma
+# nada, e bolhas que saem da tela não atrapalham. Sem a bolha, o Enter não foi
+# registrado e o envio é retentado; com a bolha presa no relógio até o fim do
+# TIMEOUT_CONFIRMACAO, a mensagem pode ainda sair sozinha, então ela é dada
+# como falha sem nova tentativa (reenviar poderia duplicá-la).
+#
+# O perfil do navegador fica em PERFIL_NAVEGADOR, então o QR Code só precisa
+# ser lido na primeira execução. Para testar localmente, aponte
+# AUTOSENDER_URL_WHATSAPP para o servidor_mock.py, que serve uma réplica
+# estática da interface de chat.
+# =============================================================================
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+from transporte import ErroEnvio, ErroPermanente, Transporte
+
+# =============================================================================
+# CONFIGURAÇÕES DA SESSÃO
+# =============================================================================
+class ConfigSessao:
+    URL_WHATSAPP = os.environ.get('AUTOSENDER_URL_WHATSAPP', 'https://web.whatsapp.com')
+    PERFIL_NAVEGADOR = os.environ.get('AUTOSENDER_PERFIL_NAVEGADOR', str(Path('perfil_whatsapp').resolve()))
+    HEADLESS = os.environ.get('AUTOSENDER_HEADLESS', '0') == '1'
+    TIMEOUT_LOGIN = 120   # tempo para ler o QR Code na primeira execução
+    TIMEOUT_CHAT = 30     # tempo máximo para a caixa de mensagem ficar pronta
+    TIMEOUT_CHAT_INTERNO = 5   # troca de chat dentro do app; depois disso, recarrega pela URL
+    # Depois de tantas trocas internas seguidas sem sucesso, vai direto pela URL.
+    FALHAS_CHAT_INTERNO = 3
+    TIMEOUT_CONFIRMACAO = float(os.environ.get('AUTOSENDER_TIMEOUT_CONFIRMACAO', '20'))   # tique de enviada
+    INTERVALO_VERIFICACAO = 0.1   # segundos entre as consultas à página
+    SELETOR_PAINEL = '#pane-side'
+    SELETOR_COMPOSICAO = 'footer div[contenteditable="true"]'
+    SELETOR_POPUP_INVALIDO = 'div[data-animate-modal-popup="true"]'
+    SELETOR_BOLHA_SAIDA = 'div.message-out'
+    # Anexo de imagem: entrada de arquivo do rodapé e caixa de legenda da prévia que ela abre.
+    SELETOR_ENTRADA_ANEXO = 'footer input[type="file"][accept*="image"]'
+    SELETOR_LEGENDA = 'div.media-preview div[contenteditable="true"]'
+    # data-icon do status da mensagem: relógio enquanto sai; um tique (enviada) ou dois (entregue/lida).
+    ICONES_CONFIRMADOS = ('msg-check', 'msg-dblcheck')
+    # Caracteres do início da mensagem comparados com o texto da bolha (emojis e pontuação ignorados).
+    TAMANHO_MARCA = 60
+
+# Bolhas de saída em uma única ida ao navegador: [data-id da linha, texto, data-icons], na ordem da conversa.
+_JS_BOLHAS = """
+return Array.from(document.querySelectorAll(arguments[0])).map(function (bolha) {
+  var linha = bolha.closest('[data-id]');
+  return [linha ? linha.getAttribute('data-id') : '', bolha.innerText || '',
+          Array.from(bolha.querySelectorAll('[data-icon]')).map(function (i) { return i.getAttribute('data-icon'); })];
+});"""
+
+# Abre o chat pelo roteador do próprio app: um link clicado na página, como os de uma conversa.
+_JS_ABRIR_CHAT = """
+var link = document.createElement('a');
+link.href = arguments[0];
+link.style.display = 'none';
+document.body.appendChild(link);
+link.click();
+link.remove();"""
+
+def _marca(texto: str) -> str:
+    """Texto reduzido a letras e dígitos: o WhatsApp troca emojis por imagens e ajusta espaços."""
+    return re.sub(r'[\W_]+', '', texto).lower()
+
+# =============================================================================
+# TRANSPORTE DE SESSÃO
+# =============================================================================
+class TransporteSessaoWeb(Transporte):
+    """Envio por uma única aba do WhatsApp Web mantida aberta durante toda a execução."""
+    nome = 'sessao'
+
+    def __init__(self, url: str = ConfigSessao.URL_WHATSAPP, perfil: str = ConfigSessao.PERFIL_NAVEGADOR,
+                 headless: bool = ConfigSessao.HEADLESS, timeout_chat: float = ConfigSessao.TIMEOUT_CHAT,
+                 timeout_confirmacao: float = ConfigSessao.TIMEOUT_CONFIRMACAO):
+        self.url = url.rstrip('/')
+        self.perfil = perfil
+        self.headless = headless
+        self.timeout_chat = timeout_chat
+        self.timeout_confirmacao = timeout_confirmacao
+        self.driver = None
+        self.falhas_chat_interno = 0
+        self.chat_aberto: Optional[str] = None
+
+    def _criar_driver(self):
+        from selenium import webdriver
+        opcoes = webdriver.ChromeOptions()
+        opcoes.add_argument(f'--user-data-dir={self.perfil}')
+        if self.headless: opcoes.add_argument('--headless=new')
+        return webdriver.Chrome(options=opcoes)
+
+    def _garantir_sessao(self):
+        """Abre o navegador e aguarda o login apenas na primeira chamada."""
+        if self.driver is not None: return self.driver
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        logging.info(f"Abrindo sessão do WhatsApp Web em {self.url} (perfil: {self.perfil})")
+        self.driver = self._criar_driver()
+        self.driver.get(self.url)
+        try:
+            WebDriverWait(self.driver, ConfigSessao.TIMEOUT_LOGIN).until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, ConfigSessao.SELETOR_PAINEL)))
+        except Exception as e:
+            self.fechar()
+            raise ErroEnvio(f"WhatsApp Web não ficou pronto (QR Code não lido?): {e}")
+        logging.info("Sessão do WhatsApp Web pronta.")
+        return self.driver
+
+    def _aguardar_composicao(self, telefone: str, anterior=None, timeout: Optional[float] = None):
+        """Espera a caixa de mensagem do chat ficar clicável, ou o aviso de número inválido.
+
+        Com `anterior` (a caixa do chat que estava aberto), só vale uma caixa nova: a antiga
+        precisa ter saído da página, senão ainda é o chat anterior na tela.
+        """
+        from selenium.common.exceptions import StaleElementReferenceException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        timeout = self.timeout_chat if timeout is None else timeout
+
+        def pronto(driver):
+            if driver.find_elements(By.CSS_SELECTOR, ConfigSessao.SELETOR_POPUP_INVALIDO): return 'invalido'
+            if anterior is not None:
+                try:
+                    anterior.is_enabled()
+                    return False
+                except StaleElementReferenceException:
+                    pass
+            caixas = driver.find_elements(By.CSS_SELECTOR, ConfigSessao.SELETOR_COMPOSICAO)
+            return caixas[0] if caixas and caixas[0].is_displayed() and caixas[0].is_enabled() else False
+
+        try:
+            resultado = WebDriverWait(self.driver, timeout, ConfigSessao.INTERVALO_VERIFICACAO,
+                                      ignored_exceptions=(StaleElementReferenceException,)).until(pronto)
+        except Exception:
+            raise ErroEnvio(f"Chat de {telefone} não carregou em {timeout}s")
+        if resultado == 'invalido':
+            raise ErroPermanente(f"Número {telefone} não está no WhatsApp")
+        return resultado
+
+    def _abrir_chat(self, telefone: str):
+        """Abre o chat do destinatário dentro do app; recarrega pela URL só se a troca interna não acontecer."""
+        from selenium.webdriver.common.by import By
+        digitos = re.sub(r'\D', '', telefone)
+        url_chat = f"{self.url}/send?phone={digitos}"
+        anterior = next(iter(self.driver.find_elements(By.CSS_SELECTOR, ConfigSessao.SELETOR_COMPOSICAO)), None)
+        # Mesmo destinatário (por exemplo, uma retentativa): o chat já está aberto.
+        if digitos == self.chat_aberto and anterior is not None and anterior.is_displayed():
+            return anterior
+        self.chat_aberto = None
+        # O aviso de número inválido do envio anterior só sai recarregando a página.
+        aviso = self.driver.find_elements(By.CSS_SELECTOR, ConfigSessao.SELETOR_POPUP_INVALIDO)
+        if self.falhas_chat_interno < ConfigSessao.FALHAS_CHAT_INTERNO and not aviso:
+            try:
+                self.driver.execute_script(_JS_ABRIR_CHAT, url_chat)
+                caixa = self._aguardar_composicao(telefone, anterior, ConfigSessao.TIMEOUT_CHAT_INTERNO)
+                self.falhas_chat_interno, self.chat_aberto = 0, digitos
+                return caixa
+            except ErroPermanente:
+                raise
+            except Exception as e:
+                self.falhas_chat_interno += 1
+                logging.warning(f"Troca de chat dentro do app falhou para {telefone} ({e}); carregando pela URL.")
+        self.driver.get(url_chat)
+        caixa = self._aguardar_composicao(telefone)
+        self.chat_aberto = digitos
+        return caixa
+
+    def _bolhas_enviadas(self) -> list:
+        return self.driver.execute_script(_JS_BOLHAS, ConfigSessao.SELETOR_BOLHA_SAIDA)
+
+    def _aguardar_confirmacao(self, telefone: str, mensagem: str, ids_antes: set):
+        """Espera a bolha desta mensagem (nova, com o texto dela, a última da conversa) mostrar o tique."""
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.support.ui import WebDriverWait
+        marca = _marca(mensagem)[:ConfigSessao.TAMANHO_MARCA]
+        apareceu = False
+
+        def confirmada(driver):
+            nonlocal apareceu
+            bolhas = self._bolhas_enviadas()
+            if not bolhas: return False
+            # Só a última bolha de saída pode ser a nossa: o histórico atrasado entra acima dela.
+            identificador, texto, icones = bolhas[-1]
+            if (identificador and identificador in ids_antes) or marca not in _marca(texto): return False
+            apareceu = True
+            return any((icone or '').startswith(ConfigSessao.ICONES_CONFIRMADOS) for icone in icones)
+
+        try:
+            WebDriverWait(self.driver, self.timeout_confirmacao, ConfigSessao.INTERVALO_VERIFICACAO).until(confirmada)
+        except TimeoutException:
+            if not apareceu:
+                raise ErroEnvio(f"Mensagem para {telefone} não saiu: nenhuma bolha nova na conversa")
+            raise ErroPermanente(f"Mensagem para {telefone} sem confirmação em {self.timeout_confirmacao}s "
+                                 f"(não reenviada para evitar duplicidade)")
+
+    def _anexar(self, telefone: str, anexo: str):
+        """Escolhe a imagem e devolve a caixa de legenda da prévia."""
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import WebDriverWait
+        caminho = Path(anexo).resolve()
+        if not caminho.exists(): raise ErroPermanente(f"Anexo indisponível: {anexo}")
+        self.driver.find_element(By.CSS_SELECTOR, ConfigSessao.SELETOR_ENTRADA_ANEXO).send_keys(str(caminho))
+        try:
+            return WebDriverWait(self.driver, self.timeout_chat, ConfigSessao.INTERVALO_VERIFICACAO).until(
+                lambda driver: next(iter(driver.find_elements(By.CSS_SELECTOR, ConfigSessao.SELETOR_LEGENDA)), False))
+        except Exception:
+            raise ErroEnvio(f"Prévia do anexo para {telefone} não abriu em {self.timeout_chat}s")
+
+    def enviar(self, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        from selenium.webdriver.common.keys import Keys
+        driver = self._garantir_sessao()
+        caixa = self._abrir_chat(telefone)
+        ids_antes = {identificador for identificador, _, _ in self._bolhas_enviadas() if identificador}
+        # Com anexo, a mensagem vai como legenda da imagem.
+        if anexo: caixa = self._anexar(telefone, anexo)
+
+        # insertText preserva emojis e quebras de linha, que o send_keys do ChromeDriver não suporta.
+        driver.execute_script("arguments[0].focus(); document.execCommand('insertText', false, arguments[1]);",
+                              caixa, mensagem)
+        caixa.send_keys(Keys.ENTER)
+        self._aguardar_confirmacao(telefone, mensagem, ids_antes)
+
+    def fechar(self):
+        if self.driver is not None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logging.warning(f"Erro ao encerrar o navegador: {e}")
+            self.driver, self.chat_aberto = None, None
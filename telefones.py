@@ -0,0 +1,186 @@
+# =============================================================================
+# NORMALIZAÇÃO E VALIDAÇÃO DE TELEFONES BRASILEIROS
+# =============================================================================
+# A regra antiga era f"+55{tel}" sobre o texto da célula: um telefone lido
+# como float virava "+5511999998888.0", e números malformados só falhavam no
+# envio, depois de todas as tentativas e pausas. Aqui a coluna inteira é
+# normalizada de uma vez, antes do planejamento:
+#
+#   - artefatos de float e de formatação ("11999998888.0", "…,0", "(11) 9…");
+#   - prefixos de discagem (0, 00, 55, +55);
+#   - DDD existente e o nono dígito (celular com 8 dígitos ganha o 9);
+#   - números com '+' de outro país passam como estão, se tiverem tamanho E.164.
+#
+# O resultado de cada valor bruto fica em cache entre execuções
+# (.cache/telefones); as linhas rejeitadas vão para rejeitados/ com o motivo.
+# =============================================================================
+import datetime
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Optional, Set
+
+import pandas as pd
+
+# =============================================================================
+# CONFIGURAÇÕES DOS TELEFONES
+# =============================================================================
+class ConfigTelefones:
+    PASTA_CACHE = Path(os.environ.get('AUTOSENDER_PASTA_CACHE', '.cache')) / 'telefones'
+    PASTA_REJEITADOS = Path(os.environ.get('AUTOSENDER_PASTA_REJEITADOS', 'rejeitados'))
+    # Incrementar quando as regras mudarem, para não reaproveitar resultados antigos.
+    VERSAO_REGRAS = 1
+    MAXIMO_CACHE = 1_000_000
+    DDDS_VALIDOS: Set[str] = {str(ddd) for ddd in (
+        11, 12, 13, 14, 15, 16, 17, 18, 19, 21, 22, 24, 27, 28, 31, 32, 33, 34, 35, 37, 38,
+        41, 42, 43, 44, 45, 46, 47, 48, 49, 51, 53, 54, 55, 61, 62, 63, 64, 65, 66, 67, 68, 69,
+        71, 73, 74, 75, 77, 79, 81, 82, 83, 84, 85, 86, 87, 88, 89, 91, 92, 93, 94, 95, 96, 97, 98, 99)}
+
+# Motivos de rejeição
+VAZIO = 'vazio'
+CARACTERES_INVALIDOS = 'caracteres inválidos'
+TAMANHO_INVALIDO = 'tamanho inválido'
+DDD_INVALIDO = 'DDD inválido'
+NUMERO_INVALIDO = 'número inválido'
+
+# =============================================================================
+# REGRAS (VETORIZADAS)
+# =============================================================================
+def _normalizar_unicos(brutos: pd.Series) -> pd.DataFrame:
+    """Aplica as regras a valores brutos distintos. Retorna as colunas 'telefone' e 'motivo'."""
+    texto = brutos.str.strip()
+    # "11999998888.0" (célula numérica) ou "…,0" (float exportado com vírgula decimal).
+    texto = texto.str.replace(r'[.,]0+$', '', regex=True)
+    internacional = texto.str.startswith('+')
+    digitos = texto.str.replace(r'[\s()\-./]', '', regex=True).str.lstrip('+')
+
+    motivo = pd.Series(None, index=brutos.index, dtype=object)
+    motivo[digitos.eq('')] = VAZIO
+    motivo[motivo.isna() & ~digitos.str.fullmatch(r'\d+')] = CARACTERES_INVALIDOS
+
+    # 00 + país equivale a '+'; um 0 isolado é o prefixo de longa distância (0 11 9…).
+    discagem_internacional = digitos.str.startswith('00')
+    digitos = digitos.where(~discagem_internacional, digitos.str[2:])
+    internacional |= discagem_internacional
+    digitos = digitos.where(internacional, digitos.str.lstrip('0'))
+
+    estrangeiro = internacional & ~digitos.str.startswith('55')
+    tamanho = digitos.str.len()
+    com_pais = digitos.str.startswith('55') & (internacional | tamanho.isin([12, 13]))
+    nacional = digitos.where(~com_pais, digitos.str[2:])
+    tamanho_nacional = nacional.str.len()
+
+    pendente = motivo.isna() & ~estrangeiro
+    motivo[pendente & ~tamanho_nacional.isin([10, 11])] = TAMANHO_INVALIDO
+    pendente = motivo.isna() & ~estrangeiro
+    motivo[pendente & ~nacional.str[:2].isin(ConfigTelefones.DDDS_VALIDOS)] = DDD_INVALIDO
+
+    primeiro = nacional.str[2:3]
+    celular_completo = tamanho_nacional.eq(11) & primeiro.eq('9')
+    celular_sem_nove = tamanho_nacional.eq(10) & primeiro.isin(list('6789'))
+    fixo = tamanho_nacional.eq(10) & primeiro.isin(list('2345'))
+    pendente = motivo.isna() & ~estrangeiro
+    motivo[pendente & ~(celular_completo | celular_sem_nove | fixo)] = NUMERO_INVALIDO
+
+    nacional = nacional.where(~celular_sem_nove, nacional.str[:2] + '9' + nacional.str[2:])
+    telefone = ('+55' + nacional).where(~estrangeiro, '+' + digitos)
+    motivo[motivo.isna() & estrangeiro & ~tamanho.between(8, 15)] = TAMANHO_INVALIDO
+    telefone = telefone.where(motivo.isna())
+    return pd.DataFrame({'telefone': telefone.to_numpy(dtype=object, na_value=None), 'motivo': motivo})
+
+def _como_texto(valores) -> pd.Series:
+    """Com pyarrow, as operações .str rodam em C em vez de um laço Python por valor."""
+    try:
+        return pd.Series(valores, dtype='string[pyarrow]')
+    except ImportError:
+        return pd.Series(valores, dtype=object)
+
+# =============================================================================
+# CACHE ENTRE EXECUÇÕES
+# =============================================================================
+_cache: Optional[pd.DataFrame] = None
+
+def _arquivo_cache() -> Path:
+    return ConfigTelefones.PASTA_CACHE / f"normalizados_v{ConfigTelefones.VERSAO_REGRAS}.pkl"
+
+def _carregar_cache() -> pd.DataFrame:
+    global _cache
+    if _cache is None:
+        try:
+            _cache = pd.read_pickle(_arquivo_cache())
+        except FileNotFoundError:
+            _cache = pd.DataFrame({'telefone': pd.Series(dtype=object), 'motivo': pd.Series(dtype=object)})
+        except Exception as e:
+            logging.warning(f"Cache de telefones ignorado: {e}")
+            _cache = pd.DataFrame({'telefone': pd.Series(dtype=object), 'motivo': pd.Series(dtype=object)})
+    return _cache
+
+def descartar_cache():
+    """Esquece o cache em memória; o arquivo (da PASTA_CACHE atual) é relido na próxima normalização."""
+    global _cache
+    _cache = None
+
+def _gravar_cache(cache: pd.DataFrame):
+    try:
+        ConfigTelefones.PASTA_CACHE.mkdir(parents=True, exist_ok=True)
+        temporario = _arquivo_cache().with_suffix(f'.{os.getpid()}.tmp')
+        cache.to_pickle(temporario)
+        os.replace(temporario, _arquivo_cache())
+    except OSError as e:
+        logging.warning(f"Não foi possível gravar o cache de telefones: {e}")
+
+def normalizar_telefones(valores: pd.Series) -> pd.DataFrame:
+    """Normaliza a coluna de telefones. Retorna 'telefone' (+55DDNNNNNNNNN ou NaN) e 'motivo' da rejeição.
+
+    Só os valores brutos ainda não vistos passam pelas regras; os demais vêm do cache.
+    """
+    global _cache
+    brutos = valores.astype(str).to_numpy(dtype=object)
+    cache = _carregar_cache()
+    posicoes = cache.index.get_indexer(brutos)
+    faltando = posicoes < 0
+    if faltando.any():
+        codigos, novos = pd.factorize(brutos[faltando])
+        calculados = _normalizar_unicos(_como_texto(novos)).set_axis(pd.Index(novos, dtype=object))
+        posicoes[faltando] = len(cache) + codigos
+        cache = pd.concat([cache, calculados]) if len(cache) else calculados
+    resultado = cache.iloc[posicoes].set_axis(valores.index)
+    if faltando.any():
+        # Os valores mais antigos saem primeiro quando o cache passa do limite.
+        _cache = cache.iloc[-ConfigTelefones.MAXIMO_CACHE:]
+        _gravar_cache(_cache)
+    return resultado
+
+# =============================================================================
+# RELATÓRIO DE REJEITADOS
+# =============================================================================
+_relatados: Dict[Path, Set[str]] = {}   # relatório do dia -> telefones brutos já gravados nesta execução
+
+def registrar_rejeitados(rejeitados: pd.DataFrame, colunas=('Nome', 'Telefone', 'motivo_telefone')) -> Path:
+    """Grava as linhas rejeitadas no relatório do dia.
+
+    A primeira chamada da execução recria o arquivo; as seguintes (blocos do modo em fluxo,
+    novas versões no monitor) só acrescentam telefones que ainda não estão nele.
+    """
+    arquivo = ConfigTelefones.PASTA_REJEITADOS / f"telefones_rejeitados_{datetime.date.today():%Y%m%d}.csv"
+    arquivo.parent.mkdir(parents=True, exist_ok=True)
+    primeira_vez = arquivo not in _relatados
+    ja_gravados = _relatados.setdefault(arquivo, set())
+    brutos = rejeitados['Telefone'].astype(str)
+    novos = rejeitados[~brutos.isin(ja_gravados) & ~brutos.duplicated()]
+    if primeira_vez or len(novos):
+        # O BOM (para o Excel reconhecer o UTF-8) só vai no início do arquivo.
+        novos.loc[:, list(colunas)].to_csv(arquivo, sep=';', index=False, header=primeira_vez,
+                                           mode='w' if primeira_vez else 'a',
+                                           encoding='utf-8-sig' if primeira_vez else 'utf-8')
+        ja_gravados.update(brutos)
+    return arquivo
+
+def contar_motivos(motivos: pd.Series) -> str:
+    return ', '.join(f"{quantidade} {motivo}" for motivo, quantidade in motivos.value_counts().items())
+
+if __name__ == "__main__":
+    exemplos = pd.Series(['11999998888', 11999998888.0, '+5511900933457,0', '(21) 3456-7890', '1199998888',
+                          '011 99999-8888', '005511999998888', '+14155552671', '99', '10999998888', 'abc',
+                          '55999998888', '551199998888'], dtype=object)
+    print(pd.concat([exemplos.rename('bruto'), normalizar_telefones(exemplos)], axis=1).to_string())
@@ -0,0 +1,321 @@
+# =============================================================================
+# CAMADA DE TRANSPORTE DE MENSAGENS
+# =============================================================================
+# Os scripts de envio não chamam mais o pywhatkit diretamente: eles pedem um
+# transporte a `criar_transporte()` e usam `enviar()` / `enviar_lote()`.
+#
+# Backends disponíveis (variável de ambiente AUTOSENDER_TRANSPORTE):
+#   - 'pywhatkit': caminho original, uma aba do navegador por mensagem.
+#   - 'http':      API HTTP no estilo Cloud API, assíncrona, com pool de
+#                  conexões e número configurável de requisições simultâneas.
+#   - 'sessao':    WhatsApp Web em uma única aba persistente (sessao_web.py).
+#
+# Para testes locais basta apontar AUTOSENDER_API_URL para o servidor_mock.py.
+# =============================================================================
+import asyncio
+import importlib
+import inspect
+import logging
+import os
+import random
+import time
+from itertools import repeat
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import log_estruturado
+import metricas
+
+if TYPE_CHECKING:
+    from limitador import LimitadorAdaptativo
+
+# =============================================================================
+# CONFIGURAÇÕES DO TRANSPORTE
+# =============================================================================
+class ConfigTransporte:
+    BACKEND = os.environ.get('AUTOSENDER_TRANSPORTE', 'pywhatkit')
+    API_URL = os.environ.get('AUTOSENDER_API_URL', 'https://graph.facebook.com/v19.0')
+    API_PHONE_ID = os.environ.get('AUTOSENDER_API_PHONE_ID', '')
+    API_TOKEN = os.environ.get('AUTOSENDER_API_TOKEN', '')
+    MAX_EM_VOO = int(os.environ.get('AUTOSENDER_MAX_EM_VOO', '32'))
+    TIMEOUT_HTTP = 30
+    LIMITE_LEGENDA = 1024   # caracteres aceitos na legenda de uma imagem; acima disso o texto vai à parte
+    # Retentativa com espera exponencial: BASE, 2*BASE, 4*BASE... até MAXIMA, sorteada entre zero e o teto.
+    PAUSA_RETRY = float(os.environ.get('AUTOSENDER_PAUSA_RETRY', '5'))
+    PAUSA_RETRY_MAXIMA = float(os.environ.get('AUTOSENDER_PAUSA_RETRY_MAXIMA', '300'))
+    # Respostas HTTP 4xx que ainda valem nova tentativa (timeout, limite de taxa).
+    STATUS_TRANSITORIOS = {408, 425, 429}
+
+class ErroEnvio(Exception):
+    """Falha de envio reportada por um backend de transporte."""
+
+class ErroPermanente(ErroEnvio):
+    """Falha que se repetiria em qualquer nova tentativa (número inexistente, requisição recusada)."""
+
+# =============================================================================
+# POLÍTICA DE RETENTATIVA
+# =============================================================================
+def erro_transitorio(erro: Optional[BaseException]) -> bool:
+    """Indica se vale tentar de novo. Erros permanentes e de dados nunca são repetidos."""
+    return erro is not None and not isinstance(erro, (ErroPermanente, ValueError, TypeError))
+
+def pausa_retentativa(tentativa: int) -> float:
+    """Espera antes da próxima tentativa, depois de `tentativa` falhas.
+
+    Espera exponencial com jitter completo: o sorteio espalha as retentativas dos vários
+    trabalhadores em vez de mandá-las todas juntas de volta para um servidor já sobrecarregado.
+    """
+    teto = min(ConfigTransporte.PAUSA_RETRY_MAXIMA, ConfigTransporte.PAUSA_RETRY * 2 ** max(tentativa - 1, 0))
+    return random.uniform(0, teto)
+
+def _evento_envio(telefone: str, tentativa: int, latencia: float, erro: Optional[Exception]):
+    log_estruturado.evento('envio', logging.WARNING if erro else logging.INFO, telefone=telefone, tentativa=tentativa,
+                           latencia_ms=round(latencia * 1000, 1), resultado='falha' if erro else 'sucesso',
+                           erro=str(erro) if erro else None, transitorio=erro_transitorio(erro) if erro else None)
+
+# Callback chamado a cada item concluído: (indice, sucesso, erro)
+CallbackConclusao = Callable[[int, bool, Optional[Exception]], None]
+
+# =============================================================================
+# INTERFACE BASE
+# =============================================================================
+class Transporte:
+    """Interface comum dos backends de envio."""
+    nome = 'base'
+
+    def enviar(self, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        """Envia uma única mensagem (com `anexo`, a imagem e a mensagem como legenda). Lança exceção em caso de falha."""
+        raise NotImplementedError
+
+    def enviar_lote(self, itens: Iterable[Tuple[str, str]], ao_concluir: Optional[CallbackConclusao] = None,
+                    tentativas: int = 1, limitador: Optional['LimitadorAdaptativo'] = None,
+                    anexos: Optional[Sequence[Optional[str]]] = None) -> List[bool]:
+        """Envia os itens em sequência, com retry e ritmo ditado pelo limitador.
+
+        `anexos`, quando informado, traz a imagem de cada item, na mesma ordem.
+        """
+        resultados = []
+        for indice, ((telefone, mensagem), anexo) in enumerate(zip(itens, anexos if anexos is not None else repeat(None))):
+            sucesso, erro = self._enviar_com_tentativas(telefone, mensagem, tentativas, limitador, anexo)
+            resultados.append(sucesso)
+            if ao_concluir: ao_concluir(indice, sucesso, erro)
+        return resultados
+
+    def _enviar_com_tentativas(self, telefone: str, mensagem: str, tentativas: int,
+                               limitador: Optional['LimitadorAdaptativo'] = None,
+                               anexo: Optional[str] = None) -> Tuple[bool, Optional[Exception]]:
+        erro = None
+        for tentativa in range(tentativas):
+            if limitador:
+                with metricas.fase('espera_limitador'): limitador.aguardar()
+            inicio = time.monotonic()
+            try:
+                self.enviar(telefone, mensagem, anexo)
+                latencia = time.monotonic() - inicio
+                metricas.registrar_tentativa(latencia, True, tentativa + 1)
+                _evento_envio(telefone, tentativa + 1, latencia, None)
+                if limitador: limitador.registrar_sucesso(latencia)
+                if tentativa > 0: logging.info(f"Sucesso na tentativa {tentativa + 1} para {telefone}")
+                return True, None
+            except Exception as e:
+                erro = e
+                metricas.registrar_tentativa(time.monotonic() - inicio, False, tentativa + 1)
+                _evento_envio(telefone, tentativa + 1, time.monotonic() - inicio, e)
+                if limitador: limitador.registrar_falha()
+                logging.warning(f"Tentativa {tentativa + 1} falhou para {telefone}: {e}")
+                if not erro_transitorio(e): break
+                if tentativa < tentativas - 1:
+                    with metricas.fase('espera_retentativa'): time.sleep(pausa_retentativa(tentativa + 1))
+        return False, erro
+
+    def fechar(self):
+        """Libera recursos do backend (sessões, conexões)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+# =============================================================================
+# BACKEND PYWHATKIT (WHATSAPP WEB, UMA ABA POR MENSAGEM)
+# =============================================================================
+class TransportePyWhatKit(Transporte):
+    """Envio pelo WhatsApp Web via pywhatkit, como os scripts faziam antes."""
+    nome = 'pywhatkit'
+
+    def __init__(self, tempo_espera: int = 15, tempo_fechar: int = 15):
+        self.tempo_espera = tempo_espera
+        self.tempo_fechar = tempo_fechar
+
+    def enviar(self, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        # Import tardio: o pywhatkit verifica a conexão e carrega o pyautogui ao ser importado.
+        import pywhatkit
+        from pywhatkit.core.exceptions import CountryCodeException
+        try:
+            if anexo:
+                pywhatkit.sendwhats_image(receiver=telefone, img_path=anexo, caption=mensagem,
+                                          wait_time=self.tempo_espera, tab_close=True, close_time=self.tempo_fechar)
+            else:
+                pywhatkit.sendwhatmsg_instantly(phone_no=telefone, message=mensagem, wait_time=self.tempo_espera,
+                                                tab_close=True, close_time=self.tempo_fechar)
+        except CountryCodeException as e:
+            raise ErroPermanente(f"Número {telefone} recusado pelo pywhatkit: {e}") from e
+
+# =============================================================================
+# BACKEND NULO (BENCHMARK E TESTES)
+# =============================================================================
+class TransporteNulo(Transporte):
+    """Não envia nada: todo envio dá certo na hora. Mede o custo do resto do pipeline."""
+    nome = 'nulo'
+
+    def enviar(self, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        return None
+
+# =============================================================================
+# BACKEND HTTP ASSÍNCRONO (CLOUD API)
+# =============================================================================
+class TransporteHttpAsync(Transporte):
+    """Envio concorrente para um endpoint no estilo WhatsApp Cloud API."""
+    nome = 'http'
+
+    def __init__(self, url_base: str = ConfigTransporte.API_URL, phone_id: str = ConfigTransporte.API_PHONE_ID,
+                 token: str = ConfigTransporte.API_TOKEN, max_em_voo: int = ConfigTransporte.MAX_EM_VOO,
+                 timeout: float = ConfigTransporte.TIMEOUT_HTTP):
+        base = f"{url_base.rstrip('/')}/{phone_id}" if phone_id else url_base.rstrip('/')
+        self.url = f"{base}/messages"
+        self.url_midia = f"{base}/media"
+        self.token = token
+        self.max_em_voo = max(1, max_em_voo)
+        self.timeout = timeout
+        self._midias: Dict[str, str] = {}   # imagem já enviada -> id da mídia no servidor
+
+    def _payload(self, telefone: str, mensagem: str) -> dict:
+        return {'messaging_product': 'whatsapp', 'to': telefone.lstrip('+'), 'type': 'text',
+                'text': {'preview_url': False, 'body': mensagem}}
+
+    def _payload_imagem(self, telefone: str, id_midia: str, legenda: Optional[str]) -> dict:
+        imagem = {'id': id_midia, **({'caption': legenda} if legenda else {})}
+        return {'messaging_product': 'whatsapp', 'to': telefone.lstrip('+'), 'type': 'image', 'image': imagem}
+
+    @staticmethod
+    async def _verificar(resposta) -> None:
+        if resposta.status >= 400:
+            corpo = await resposta.text()
+            permanente = resposta.status < 500 and resposta.status not in ConfigTransporte.STATUS_TRANSITORIOS
+            raise (ErroPermanente if permanente else ErroEnvio)(f"HTTP {resposta.status}: {corpo[:200]}")
+
+    async def _subir_midia(self, sessao, anexo: str) -> str:
+        """Envia a imagem uma vez por execução e devolve o id da mídia."""
+        if anexo in self._midias: return self._midias[anexo]
+        import aiohttp
+        try:
+            with open(anexo, 'rb') as f: conteudo = f.read()
+        except OSError as e:
+            raise ErroPermanente(f"Anexo indisponível: {e}") from e
+        formulario = aiohttp.FormData()
+        formulario.add_field('messaging_product', 'whatsapp')
+        formulario.add_field('type', 'image/png')
+        formulario.add_field('file', conteudo, filename=os.path.basename(anexo), content_type='image/png')
+        async with sessao.post(self.url_midia, data=formulario) as resposta:
+            await self._verificar(resposta)
+            self._midias[anexo] = (await resposta.json())['id']
+        return self._midias[anexo]
+
+    async def _post(self, sessao, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        if anexo:
+            id_midia = await self._subir_midia(sessao, anexo)
+            legenda = mensagem if len(mensagem) <= ConfigTransporte.LIMITE_LEGENDA else None
+            async with sessao.post(self.url, json=self._payload_imagem(telefone, id_midia, legenda)) as resposta:
+                await self._verificar(resposta)
+            if legenda is not None: return
+        async with sessao.post(self.url, json=self._payload(telefone, mensagem)) as resposta:
+            await self._verificar(resposta)
+
+    async def _enviar_item(self, sessao, semaforo, telefone: str, mensagem: str, tentativas: int,
+                           limitador: Optional['LimitadorAdaptativo'], anexo: Optional[str] = None):
+        erro = None
+        for tentativa in range(tentativas):
+            async with semaforo:
+                # A vaga é reservada já dentro do semáforo, para a taxa ajustada valer nos próximos envios.
+                if limitador:
+                    with metricas.fase('espera_limitador'): await asyncio.sleep(limitador.reservar())
+                inicio = time.monotonic()
+                try:
+                    await self._post(sessao, telefone, mensagem, anexo)
+                    latencia = time.monotonic() - inicio
+                    metricas.registrar_tentativa(latencia, True, tentativa + 1)
+                    _evento_envio(telefone, tentativa + 1, latencia, None)
+                    if limitador: limitador.registrar_sucesso(latencia)
+                    if tentativa > 0: logging.info(f"Sucesso na tentativa {tentativa + 1} para {telefone}")
+                    return True, None
+                except Exception as e:
+                    erro = e
+                    metricas.registrar_tentativa(time.monotonic() - inicio, False, tentativa + 1)
+                    _evento_envio(telefone, tentativa + 1, time.monotonic() - inicio, e)
+                    if limitador: limitador.registrar_falha()
+                    logging.warning(f"Tentativa {tentativa + 1} falhou para {telefone}: {e}")
+            if not erro_transitorio(erro): break
+            if tentativa < tentativas - 1:
+                with metricas.fase('espera_retentativa'): await asyncio.sleep(pausa_retentativa(tentativa + 1))
+        return False, erro
+
+    async def _enviar_lote_async(self, itens: List[Tuple[str, str]], ao_concluir: Optional[CallbackConclusao],
+                                 tentativas: int, limitador: Optional['LimitadorAdaptativo'] = None,
+                                 anexos: Optional[Sequence[Optional[str]]] = None) -> List[bool]:
+        import aiohttp
+        cabecalhos = {'Authorization': f'Bearer {self.token}'} if self.token else {}
+        conector = aiohttp.TCPConnector(limit=self.max_em_voo)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        semaforo = asyncio.Semaphore(self.max_em_voo)
+        resultados = [False] * len(itens)
+
+        async with aiohttp.ClientSession(connector=conector, timeout=timeout, headers=cabecalhos) as sessao:
+            async def tarefa(indice: int, telefone: str, mensagem: str, anexo: Optional[str]):
+                sucesso, erro = await self._enviar_item(sessao, semaforo, telefone, mensagem, tentativas, limitador,
+                                                        anexo)
+                resultados[indice] = sucesso
+                if ao_concluir: ao_concluir(indice, sucesso, erro)
+
+            anexos = anexos if anexos is not None else repeat(None)
+            await asyncio.gather(*(tarefa(i, tel, msg, anexo) for i, ((tel, msg), anexo) in enumerate(zip(itens, anexos))))
+        return resultados
+
+    def enviar(self, telefone: str, mensagem: str, anexo: Optional[str] = None) -> None:
+        erros = []
+        asyncio.run(self._enviar_lote_async([(telefone, mensagem)], lambda i, s, e: erros.append(e), 1, anexos=[anexo]))
+        if erros[0]: raise erros[0]
+
+    def enviar_lote(self, itens: Iterable[Tuple[str, str]], ao_concluir: Optional[CallbackConclusao] = None,
+                    tentativas: int = 1, limitador: Optional['LimitadorAdaptativo'] = None,
+                    anexos: Optional[Sequence[Optional[str]]] = None) -> List[bool]:
+        """Envia todos os itens concorrentemente, até `max_em_voo` requisições por vez."""
+        return asyncio.run(self._enviar_lote_async(list(itens), ao_concluir, tentativas, limitador, anexos))
+
+# =============================================================================
+# FÁBRICA
+# =============================================================================
+BACKENDS = {
+    TransportePyWhatKit.nome: TransportePyWhatKit,
+    TransporteHttpAsync.nome: TransporteHttpAsync,
+    TransporteNulo.nome: TransporteNulo,
+}
+
+# Backends com dependências pesadas ficam em módulos próprios, importados sob demanda.
+BACKENDS_EXTERNOS = {
+    'sessao': ('sessao_web', 'TransporteSessaoWeb'),
+}
+
+def criar_transporte(backend: Optional[str] = None, **opcoes) -> Transporte:
+    """Cria o transporte configurado (parâmetro ou AUTOSENDER_TRANSPORTE)."""
+    backend = (backend or ConfigTransporte.BACKEND).lower()
+    if backend in BACKENDS_EXTERNOS:
+        modulo, nome_classe = BACKENDS_EXTERNOS[backend]
+        classe = getattr(importlib.import_module(modulo), nome_classe)
+    elif backend in BACKENDS:
+        classe = BACKENDS[backend]
+    else:
+        raise ValueError(f"Transporte desconhecido '{backend}'. Opções: {', '.join([*BACKENDS, *BACKENDS_EXTERNOS])}")
+    # Cada script informa as opções de todos os backends; repassa só as que este aceita.
+    aceitas = inspect.signature(classe.__init__).parameters
+    logging.info(f"Transporte selecionado: {backend}")
+    return classe(**{k: v for k, v in opcoes.items() if k in aceitas})